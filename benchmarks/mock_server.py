@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*- #
+"""
+Local stand-in of the Octoparse api for tests & benchmarks.
+
+    python -m benchmarks.mock_server --port 8765 --rows 100000 --columns 20 --latency 0.02
+
+then point a client at it: Octoparse(base_url='http://127.0.0.1:8765/')
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class MockOctoparseServer:
+    """
+    In-memory Octoparse api served over http on localhost.
+
+    Every task has `rows` generated rows of `columns` string values of
+    `value_size` characters. Responses are delayed by `latency` seconds
+    (+ up to `jitter`) & a share `error_rate` of the api calls fails with
+    `error_status`. Tokens expire after `token_expires_in` seconds.
+    Started tasks run for `run_seconds` then complete.
+    """
+
+    def __init__(self, tasks=('task-1',), rows=10000, columns=10, value_size=20, latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_status=503, token_expires_in=86400, run_seconds=1.0, port=0, seed=0):
+        """
+        Initialize the server (call start() to serve)
+        :param tasks: task ids
+        :param rows: rows of each task
+        :param columns: columns of each row
+        :param value_size: characters of each value
+        :param latency: seconds each response is delayed
+        :param jitter: max extra random delay in seconds
+        :param error_rate: share of api calls (0 - 1) failing with error_status
+        :param error_status: http status of the injected errors
+        :param token_expires_in: lifetime of the issued tokens in seconds
+        :param run_seconds: seconds a started task runs before it completes
+        :param port: port to listen on (0: any free port)
+        :param seed: seed of the random errors & jitter
+        """
+        self.columns = ['column{}'.format(i) for i in range(columns)]
+        self.value_size = value_size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.token_expires_in = token_expires_in
+        self.run_seconds = run_seconds
+        self.port = port
+        self.tasks = {task_id: {'rows': rows, 'exported': 0, 'exporting': 0, 'status': 'Ready', 'started': None,
+                                'params': {}}
+                      for task_id in tasks}
+        self.tokens = {}
+        self.refresh_tokens = set()
+        self.requests = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """
+        Base url of the server
+        """
+        return 'http://127.0.0.1:{}/'.format(self.port)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        """
+        Serve in a background thread
+        :return: self
+        """
+        self._server = ThreadingHTTPServer(('127.0.0.1', self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """
+        Serve in the current thread
+        """
+        self._server = ThreadingHTTPServer(('127.0.0.1', self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._server.serve_forever()
+
+    def stop(self):
+        """
+        Stop serving
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def row(self, index):
+        """
+        Generated row of a task
+        :param index: row No.
+        :return: data dict
+        """
+        return {column: '{0}-{1}'.format(index, column).ljust(self.value_size, 'x') for column in self.columns}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def _dispatch(self, method):
+                url = urlparse(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = parse_qs(self.rfile.read(length).decode('utf-8')) if length else {}
+                status, content, headers = server.handle(method, url.path.lstrip('/'), parse_qs(url.query), body,
+                                                         self.headers)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+        return Handler
+
+    def handle(self, method, path, query, body, headers):
+        """
+        Answer a request without going through http, e.g. from an InProcessTransport:
+        Octoparse(base_url=server.url, transport=InProcessTransport(server.handle))
+        :param method: 'GET' or 'POST'
+        :param path: url path relative to the server url
+        :param query: dict of lists of query values
+        :param body: dict of lists of urlencoded body values
+        :param headers: request headers
+        :return: tuple of http status, json bytes & response headers
+        """
+        status, payload = self._respond(method, path, query, body, headers.get('Authorization', ''))
+        data = payload.get('data')
+        if isinstance(data, dict) and isinstance(data.get('dataList'), range):
+            # rows are generated outside of the lock
+            data['dataList'] = [self.row(i) for i in data['dataList']]
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        content = json.dumps(payload).encode('utf-8')
+        headers = {'Content-Type': 'application/json', 'Content-Length': str(len(content))}
+        if status == 429 or status >= 500:
+            headers['Retry-After'] = '0'
+        return status, content, headers
+
+    def _respond(self, method, path, query, body, authorization):
+        """
+        Answer an api call
+        :return: tuple of http status & json payload
+        """
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            if path == 'token':
+                return self._token(body)
+            token = authorization[len('bearer '):]
+            if self.tokens.get(token, 0) < time.monotonic():
+                return 401, {'error': 'Unauthorized', 'error_Description': 'invalid or expired token'}
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self.error_status, {'error': 'ServerError', 'error_Description': 'injected error'}
+            return self._api(path, query)
+
+    def _token(self, body):
+        grant = body.get('grant_type', [''])[0]
+        if grant == 'refresh_token' and body.get('refresh_token', [''])[0] not in self.refresh_tokens:
+            return 400, {'error': 'invalid_grant'}
+        if grant not in ('password', 'refresh_token'):
+            return 400, {'error': 'unsupported_grant_type'}
+        access_token = uuid.uuid4().hex
+        refresh_token = uuid.uuid4().hex
+        self.tokens[access_token] = time.monotonic() + self.token_expires_in
+        self.refresh_tokens.add(refresh_token)
+        return 200, {'access_token': access_token, 'token_type': 'bearer', 'expires_in': self.token_expires_in,
+                     'refresh_token': refresh_token}
+
+    def _task(self, task_id):
+        task = self.tasks.get(task_id)
+        if task is not None and task['status'] == 'Running' and \
+                time.monotonic() - task['started'] >= self.run_seconds:
+            task['status'] = 'Completed'
+        return task
+
+    def _api(self, path, query):
+        def arg(name, default=None):
+            return query.get(name, [default])[0]
+
+        ok = {'error': 'success', 'error_Description': 'Action Success'}
+        if path == 'api/taskgroup':
+            return 200, dict(ok, data=[{'taskGroupId': 1, 'taskGroupName': 'Group 1'}])
+        if path == 'api/task':
+            return 200, dict(ok, data=[{'taskId': task_id, 'taskName': task_id} for task_id in self.tasks])
+        if path == 'api/task/getTaskStatusByIdList':
+            return 200, dict(ok, data=[{'taskId': task_id, 'taskName': task_id, 'status': self._task(task_id)['status']}
+                                       for task_id in query.get('taskIdList', []) if task_id in self.tasks])
+
+        task = self._task(arg('taskId'))
+        if task is None:
+            return 200, {'error': 'failed', 'error_Description': 'task not found'}
+        if path == 'api/alldata/GetDataOfTaskByOffset':
+            offset, size = int(arg('offset', 0)), min(int(arg('size', 1000)), 1000)
+            end = min(offset + size, task['rows'])
+            return 200, dict(ok, data={'offset': end, 'total': task['rows'], 'restTotal': task['rows'] - end,
+                                       'dataList': range(offset, end)})
+        if path == 'api/notexportdata/gettop':
+            size = min(int(arg('size', 1000)), 1000)
+            end = min(task['exported'] + size, task['rows'])
+            task['exporting'] = end
+            return 200, dict(ok, data={'total': task['rows'] - task['exported'],
+                                       'currentTotal': end - task['exported'],
+                                       'dataList': range(task['exported'], end)})
+        if path == 'api/notexportdata/update':
+            task['exported'] = max(task['exported'], task['exporting'])
+            return 200, ok
+        if path == 'api/task/removeDataByTaskId':
+            task.update(rows=0, exported=0, exporting=0)
+            return 200, ok
+        if path == 'api/task/startTask':
+            if task['status'] == 'Running':
+                return 200, dict(ok, data=2)
+            task.update(status='Running', started=time.monotonic())
+            return 200, dict(ok, data=1)
+        if path == 'api/task/stopTask':
+            task['status'] = 'Stopped'
+            return 200, ok
+        if path == 'api/task/GetTaskRulePropertyByName':
+            return 200, dict(ok, data=task['params'].get(arg('name'), []))
+        if path in ('api/task/updateTaskRule', 'api/task/AddUrlOrTextToTask'):
+            value = json.loads(arg('value', '[]'))
+            values = value if isinstance(value, list) else [value]
+            if path == 'api/task/updateTaskRule':
+                task['params'][arg('name')] = values
+            else:
+                task['params'].setdefault(arg('name'), []).extend(values)
+            return 200, ok
+        return 404, {'error': 'not found'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local mock of the Octoparse api')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--tasks', type=int, default=1, help='No. of tasks (task-1, task-2...)')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--columns', type=int, default=10)
+    parser.add_argument('--value-size', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--token-expires-in', type=int, default=86400)
+    parser.add_argument('--run-seconds', type=float, default=1.0)
+    args = parser.parse_args()
+    server = MockOctoparseServer(tasks=['task-{}'.format(i + 1) for i in range(args.tasks)], rows=args.rows,
+                                 columns=args.columns, value_size=args.value_size, latency=args.latency,
+                                 jitter=args.jitter, error_rate=args.error_rate, error_status=args.error_status,
+                                 token_expires_in=args.token_expires_in, run_seconds=args.run_seconds,
+                                 port=args.port)
+    print('serving on', server.url)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
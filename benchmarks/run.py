@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*- #
+"""
+Benchmarks of the client against the local mock server, nothing goes over the network.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --rows 200000 --columns 30 --latency 0.02 --output results.json
+    python -m benchmarks.run --baseline results.json --tolerance 0.15
+
+Each benchmark runs in its own process (peak RSS is per benchmark) against a
+server running in another process (the server doesn't compete for the GIL).
+Reported: rows/s, p50/p99 latency of the api calls, peak RSS & the time spent
+getting tokens (tokens expire every --token-expires-in seconds).
+With --baseline, exits with status 1 when rows/s dropped or p99 latency or
+peak RSS grew by more than --tolerance.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import socket
+import sys
+import tempfile
+import time
+
+from octoparse.auth import DEFAULT_REFRESH_MARGIN
+
+TASK_ID = 'task-1'
+
+BENCHMARKS = {
+    'get_task_data': lambda octo, size: len(octo.get_task_data(TASK_ID, size=size)),
+    'get_task_data_df': lambda octo, size: len(octo.get_task_data_df(TASK_ID, size=size)),
+    'get_task_data_generator': lambda octo, size: sum(len(data) for data in
+                                                      octo.get_task_data_generator(TASK_ID, size=size)),
+}
+
+
+def _serve(options, port):
+    from benchmarks.mock_server import MockOctoparseServer
+    MockOctoparseServer(tasks=[TASK_ID], rows=options['rows'], columns=options['columns'],
+                        value_size=options['value_size'], latency=options['latency'],
+                        error_rate=options['error_rate'], token_expires_in=options['token_expires_in'],
+                        port=port).serve_forever()
+
+
+def _peak_rss():
+    """
+    Peak resident set size of the current process in bytes
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _percentile(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(percent / 100.0 * (len(values) - 1))))]
+
+
+def _timed(function, timings):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timings.append(time.perf_counter() - start)
+    return wrapper
+
+
+def _run_benchmark(name, options, base_url, results):
+    """
+    Run a benchmark in the current (child) process
+    """
+    os.environ.setdefault('OCTOPARSE_USERNAME', 'benchmark')
+    os.environ.setdefault('OCTOPARSE_PASSWORD', 'benchmark')
+    from octoparse import Octoparse, TokenStore
+
+    rss_before = _peak_rss()
+    with tempfile.TemporaryDirectory() as directory:
+        octo = Octoparse(base_url=base_url, token_store=TokenStore(os.path.join(directory, 'token.json')),
+                         refresh_margin=options['refresh_margin'])
+        calls, token_calls, token_requests = [], [], []
+        octo._request = _timed(octo._request, calls)
+        octo.token_manager.get_access_token = _timed(octo.token_manager.get_access_token, token_calls)
+        octo.token_manager._request_token = _timed(octo.token_manager._request_token, token_requests)
+
+        start = time.perf_counter()
+        rows = 0
+        for _ in range(options['repeat']):
+            rows += BENCHMARKS[name](octo, options['page_size'])
+        seconds = time.perf_counter() - start
+        octo.close()
+
+    results.put({
+        'benchmark': name,
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds,
+        'calls': len(calls),
+        'p50_ms': _percentile(calls, 50) * 1000,
+        'p99_ms': _percentile(calls, 99) * 1000,
+        'peak_rss_mb': _peak_rss() / 1024 ** 2,
+        'rss_growth_mb': (_peak_rss() - rss_before) / 1024 ** 2,
+        'token_requests': len(token_requests),
+        'token_ms': sum(token_calls) * 1000,
+        'token_overhead': sum(token_calls) / seconds,
+    })
+
+
+def run(options, names=None):
+    """
+    Run benchmarks against a mock server in a separate process
+    :param options: dict of benchmark options (see the command line arguments)
+    :param names: benchmarks to run (default all)
+    :return: list of result dicts
+    """
+    context = multiprocessing.get_context('spawn')
+    port = options['port']
+    server = context.Process(target=_serve, args=(options, port), daemon=True)
+    server.start()
+    base_url = 'http://127.0.0.1:{}/'.format(port)
+    try:
+        _wait_for_server(port)
+        results = []
+        for name in names or BENCHMARKS:
+            queue = context.Queue()
+            process = context.Process(target=_run_benchmark, args=(name, options, base_url, queue))
+            process.start()
+            results.append(queue.get())
+            process.join()
+        return results
+    finally:
+        server.terminate()
+        server.join()
+
+
+def _wait_for_server(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results to a baseline
+    :return: list of regression messages
+    """
+    previous = {result['benchmark']: result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result['benchmark'])
+        if before is None:
+            continue
+        if result['rows_per_second'] < before['rows_per_second'] * (1 - tolerance):
+            regressions.append('{benchmark}: rows/s {0:.0f} -> {1:.0f}'.format(
+                before['rows_per_second'], result['rows_per_second'], **result))
+        for key in ('p99_ms', 'peak_rss_mb'):
+            if result[key] > before[key] * (1 + tolerance):
+                regressions.append('{benchmark}: {0} {1:.1f} -> {2:.1f}'.format(
+                    key, before[key], result[key], **result))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks against a local mock Octoparse server')
+    parser.add_argument('benchmarks', nargs='*', help='benchmarks to run: {} (default all)'.format(
+        ', '.join(BENCHMARKS)))
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--columns', type=int, default=10)
+    parser.add_argument('--value-size', type=int, default=20)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.0, help='server latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--token-expires-in', type=int, default=86400)
+    parser.add_argument('--refresh-margin', type=float, default=DEFAULT_REFRESH_MARGIN,
+                        help='seconds before expiry to refresh the token (default: the client default)')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--output', help='write the results as json to this file')
+    parser.add_argument('--baseline', help='json results to compare to')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error('unknown benchmarks: {}'.format(', '.join(sorted(unknown))))
+
+    options = {key: value for key, value in vars(args).items()
+               if key not in ('benchmarks', 'output', 'baseline', 'tolerance')}
+    results = run(options, args.benchmarks)
+
+    print('{:<26}{:>10}{:>12}{:>9}{:>9}{:>10}{:>8}{:>10}'.format(
+        'benchmark', 'rows', 'rows/s', 'p50 ms', 'p99 ms', 'RSS MB', 'tokens', 'token %'))
+    for result in results:
+        print('{benchmark:<26}{rows:>10}{rows_per_second:>12.0f}{p50_ms:>9.2f}{p99_ms:>9.2f}'
+              '{peak_rss_mb:>10.1f}{token_requests:>8}{0:>10.2f}'.format(result['token_overhead'] * 100, **result))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION', regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*- #
+"""
+Cold start benchmark: the time a new process takes to import octoparse,
+create a client & make its first api call against the local mock server.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --repeat 20 --output startup.json
+    python -m benchmarks.startup --baseline startup.json --tolerance 0.2
+
+Each sample is a new python process. Reported: median & max milliseconds of
+the import, of Octoparse() & of the first call (login included), the process
+wall time & the heavy modules loaded by the import (pandas, dotenv, httpx...).
+Exits with status 1 when a heavy module is loaded by `import octoparse` or,
+with --baseline, when a median grew by more than --tolerance.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.run import _serve, _wait_for_server
+
+# modules which must only be imported when a feature needs them
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'polars', 'dotenv', 'httpx', 'zstandard')
+
+# runs in a new interpreter, only the stdlib is imported before octoparse
+CHILD = '''
+import json, os, sys, time
+start = time.perf_counter()
+import octoparse
+imported = time.perf_counter()
+heavy = [name for name in {heavy!r} if name in sys.modules]
+octo = octoparse.Octoparse(base_url={base_url!r}, token_store=octoparse.TokenStore({token_path!r}))
+created = time.perf_counter()
+octo.list_all_task_groups()
+called = time.perf_counter()
+octo.close()
+print(json.dumps({{'import_ms': (imported - start) * 1000, 'init_ms': (created - imported) * 1000,
+                  'first_call_ms': (called - created) * 1000, 'heavy_modules': heavy}}))
+'''
+
+PHASES = ('import_ms', 'init_ms', 'first_call_ms', 'process_ms')
+
+
+def _sample(base_url, directory):
+    """
+    Start a process importing octoparse & making a first call
+    :return: dict of timings in milliseconds & the heavy modules loaded
+    """
+    token_path = os.path.join(directory, 'token-{}.json'.format(time.monotonic_ns()))
+    code = CHILD.format(heavy=HEAVY_MODULES, base_url=base_url, token_path=token_path)
+    env = dict(os.environ, OCTOPARSE_USERNAME='benchmark', OCTOPARSE_PASSWORD='benchmark')
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', code], env=env, check=True, stdout=subprocess.PIPE).stdout
+    sample = json.loads(output.decode('utf-8').splitlines()[-1])
+    sample['process_ms'] = (time.perf_counter() - start) * 1000
+    return sample
+
+
+def run(repeat=10, port=8766):
+    """
+    Measure the cold start against a mock server in a separate process
+    :param repeat: No. of processes started
+    :param port: port of the mock server
+    :return: result dict {'samples', 'heavy_modules', '<phase>': {'median', 'max'}}
+    """
+    options = {'rows': 10, 'columns': 2, 'value_size': 10, 'latency': 0.0, 'error_rate': 0.0,
+               'token_expires_in': 86400}
+    server = multiprocessing.get_context('spawn').Process(target=_serve, args=(options, port), daemon=True)
+    server.start()
+    try:
+        _wait_for_server(port)
+        with tempfile.TemporaryDirectory() as directory:
+            samples = [_sample('http://127.0.0.1:{}/'.format(port), directory) for _ in range(repeat)]
+    finally:
+        server.terminate()
+        server.join()
+    result = {'samples': repeat,
+              'heavy_modules': sorted({name for sample in samples for name in sample['heavy_modules']})}
+    for phase in PHASES:
+        values = [sample[phase] for sample in samples]
+        result[phase] = {'median': statistics.median(values), 'max': max(values)}
+    return result
+
+
+def compare(result, baseline, tolerance):
+    """
+    Compare a result to a baseline
+    :return: list of regression messages
+    """
+    regressions = []
+    for phase in PHASES:
+        before, after = baseline[phase]['median'], result[phase]['median']
+        if after > before * (1 + tolerance):
+            regressions.append('{0}: {1:.1f} -> {2:.1f}'.format(phase, before, after))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold start benchmark of the octoparse client')
+    parser.add_argument('--repeat', type=int, default=10, help='No. of processes')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--output', help='write the result as json to this file')
+    parser.add_argument('--baseline', help='json result to compare to')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    result = run(args.repeat, args.port)
+    print('{:<16}{:>10}{:>10}'.format('phase', 'median ms', 'max ms'))
+    for phase in PHASES:
+        print('{0:<16}{median:>10.1f}{max:>10.1f}'.format(phase, **result[phase]))
+    print('heavy modules imported:', ', '.join(result['heavy_modules']) or 'none')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    regressions = ['heavy modules imported: ' + ', '.join(result['heavy_modules'])] if result['heavy_modules'] else []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions += compare(result, json.load(f), args.tolerance)
+    for regression in regressions:
+        print('REGRESSION', regression)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,3 +4,19 @@ from .__version__ import __author__, __license__, __copyright__
 
 from .octoparse import Octoparse
 from .octoparse import _get_request, _post_request
+from .async_octoparse import AsyncOctoparse
+from .export import export_task_data
+from .checkpoint import CheckpointStore
+from .drain import drain_not_exported
+from .cache import PageCache, MetadataCache
+from .auth import TokenManager, TokenStore
+from .ratelimit import RateLimiter, AdaptiveConcurrencyLimiter
+from .retry import RetryPolicy, CircuitBreaker
+from .exceptions import OctoparseError, APIError, CircuitOpenError
+from .rows import RowSet
+from .watcher import TaskWatcher
+from .loop import load_loop_values, load_loops
+from .harvest import harvest_tasks
+from .transport import Transport, RequestsTransport, HttpxTransport, InProcessTransport
+from .metrics import Metrics
+from .tracing import Tracer, CallbackTracer, OpenTelemetryTracer
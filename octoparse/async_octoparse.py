@@ -0,0 +1,489 @@
+# -*- coding: utf-8 -*- #
+
+import asyncio
+import time
+from datetime import datetime
+
+from .auth import TokenStore, TOKEN_FILE, DEFAULT_REFRESH_MARGIN
+from .auth import _get_login_content, _is_token_expired
+from .decoder import get_loads
+from .exceptions import APIError
+from .metrics import Metrics
+from .octoparse import DEFAULT_POOL_MAXSIZE, _get_base_url
+
+
+class AsyncOctoparse:
+    """
+    asyncio version of the Octoparse api client.
+    Every api method is a coroutine, so many tasks can be
+    processed concurrently on a single event loop.
+    Requires httpx (pip install octoparse[async]).
+    """
+
+    def __init__(self, advanced_api=False, china=False, client=None, max_concurrency=None,
+                 max_connections=DEFAULT_POOL_MAXSIZE, max_keepalive_connections=DEFAULT_POOL_MAXSIZE,
+                 timeout=30, token_store=None, refresh_margin=DEFAULT_REFRESH_MARGIN, json_backend=None,
+                 base_url=None, http2=False, metrics=None):
+        """
+        Initialize the object. Authentication happens on the first request.
+        :param advanced_api: whether use advanced api or not
+        :param china: access from china or not
+        :param client: an existing httpx.AsyncClient to use (it won't be closed by close())
+        :param max_concurrency: max number of requests in flight at once (None: unbounded)
+        :param max_connections: max connections of the pool
+        :param max_keepalive_connections: max idle connections kept alive
+        :param timeout: request timeout in seconds
+        :param token_store: TokenStore sharing the token with other clients & processes
+        (default: octoparse_token.json in the working directory)
+        :param refresh_margin: seconds before expiry to refresh the token
+        :param json_backend: 'orjson', 'simdjson' or 'json' to decode responses
+        (default: the fastest installed)
+        :param base_url: url of the api, e.g. a local mock server (default: from advanced_api & china)
+        :param http2: multiplex the concurrent requests over HTTP/2 connections
+        (needs the h2 package: pip install octoparse[http2])
+        :param metrics: Metrics recording the api calls (can be shared, default: one per client)
+        """
+        # imported here as it is slow to import & optional
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError('AsyncOctoparse requires httpx: pip install octoparse[async]')
+
+        self.token_entity = None
+        self.base_url = base_url or _get_base_url(advanced_api, china)
+        self.token_store = token_store if token_store is not None else TokenStore(TOKEN_FILE)
+        self.refresh_margin = refresh_margin
+        self.json_loads = get_loads(json_backend)
+        self.metrics = metrics if metrics is not None else Metrics()
+        if client is None:
+            limits = httpx.Limits(max_connections=max_connections,
+                                  max_keepalive_connections=max_keepalive_connections)
+            self.client = httpx.AsyncClient(http2=http2, limits=limits, timeout=timeout)
+            self._owns_client = True
+        else:
+            self.client = client
+            self._owns_client = False
+        self.max_concurrency = max_concurrency
+        # asyncio primitives are created lazily inside the running loop
+        self._token_lock = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        """
+        Close the pooled connections of this client
+        """
+        if self._owns_client:
+            await self.client.aclose()
+
+    def _is_fresh(self, token_entity):
+        """
+        Check if a token entity is valid for longer than the refresh margin
+        """
+        return (token_entity is not None and 'access_token' in token_entity
+                and not _is_token_expired(token_entity, self.refresh_margin))
+
+    async def _get_access_token(self):
+        """
+        Return the valid access token, refreshing it before it expires.
+        Only one coroutine logs in or refreshes at a time, the others wait
+        & reuse its token. A fresh token saved by another process is reused.
+        :return: access token string
+        """
+        if self._is_fresh(self.token_entity):
+            return self.token_entity['access_token']
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            if not self._is_fresh(self.token_entity):
+                # the file lock makes other processes wait & reuse the token of this one
+                lock = self.token_store.lock()
+                await self._run_blocking(lock.__enter__)
+                try:
+                    stored = await self._run_blocking(self.token_store.load)
+                    if self._is_fresh(stored):
+                        self.token_entity = stored
+                    else:
+                        current = stored or self.token_entity
+                        if current is not None and 'refresh_token' in current:
+                            self.token_entity = current
+                            await self.refresh_token()
+                        else:
+                            await self.log_in()
+                finally:
+                    await self._run_blocking(lock.__exit__, None, None, None)
+            return self.token_entity['access_token']
+
+    async def _run_blocking(self, function, *args):
+        """
+        Run a blocking call (file lock & token file i/o) in a thread, off the event loop
+        :return: result of the call
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def _set_token_entity(self, token_entity):
+        """
+        Keep & store a new token entity
+        """
+        # add time to token
+        token_entity['datetime'] = datetime.now()
+        self.token_entity = token_entity
+        await self._run_blocking(self.token_store.save, token_entity)
+
+    def _get_url(self, path):
+        """
+        Returns the absolute url
+        :param path: relative url path
+        :return: absolute url
+        """
+        return self.base_url + path
+
+    async def _request(self, method, path, params=None, body=None):
+        """
+        Send an authorized request, bounded by max_concurrency
+        :param method: 'GET' or 'POST'
+        :param path: relative url path
+        :param params: URL Parameters
+        :param body: body to be sent with request
+        :return: json of response
+        :raises APIError: when the api answers with an error status
+        """
+        if self.max_concurrency and self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        headers = {
+            'Authorization': 'bearer ' + await self._get_access_token()
+        }
+        if self._semaphore is None:
+            res = await self._send(method, path, headers=headers, params=params, data=body)
+        else:
+            async with self._semaphore:
+                res = await self._send(method, path, headers=headers, params=params, data=body)
+        if not 200 <= res.status_code < 300:
+            raise APIError('{0} {1} failed with status {2}'.format(method, path.split('?')[0], res.status_code),
+                           status_code=res.status_code, response=res)
+        response = self.json_loads(res.content)
+        data = response.get('data') if isinstance(response, dict) else None
+        if isinstance(data, dict) and isinstance(data.get('dataList'), list):
+            self.metrics.observe_rows(path.split('?')[0], len(data['dataList']))
+        return response
+
+    async def _send(self, method, path, **kwargs):
+        """
+        Send a request, recording it in the metrics
+        :param method: 'GET' or 'POST'
+        :param path: relative url path
+        :param kwargs: arguments of httpx.AsyncClient.request
+        :return: httpx.Response
+        """
+        status = 'error'
+        size = 0
+        start = time.perf_counter()
+        try:
+            res = await self.client.request(method, self._get_url(path), **kwargs)
+            status = res.status_code
+            size = len(res.content)
+            return res
+        finally:
+            self.metrics.observe_request(path.split('?')[0], status, time.perf_counter() - start, size)
+
+    async def log_in(self):
+        """
+        Login & get a access token
+        :return: token entity
+        """
+        content = _get_login_content()
+        self.metrics.observe_token('password')
+        response = await self._send('POST', 'token', content=content,
+                                    headers={'Content-Type': 'application/x-www-form-urlencoded'})
+        if not 200 <= response.status_code < 300:
+            raise APIError('POST token failed with status {}'.format(response.status_code),
+                           status_code=response.status_code, response=response)
+        token_entity = response.json()
+
+        if 'access_token' in token_entity:
+            await self._set_token_entity(token_entity)
+            return token_entity
+        else:
+            exit(1)
+
+    async def refresh_token(self):
+        """
+        refresh the token with refresh token id
+        :return: new refreshed token string
+        """
+        content = 'refresh_token=' + self.token_entity['refresh_token'] + '&grant_type=refresh_token'
+        self.metrics.observe_token('refresh_token')
+        response = await self._send('POST', 'token', content=content,
+                                    headers={'Content-Type': 'application/x-www-form-urlencoded'})
+        if response.status_code == 200:
+            token_entity = response.json()
+            if 'access_token' in token_entity:
+                await self._set_token_entity(token_entity)
+                return token_entity['access_token']
+        await self.log_in()
+        return self.token_entity['access_token']
+
+    async def is_task_running(self, task_id, time_gap=5):
+        """
+        Check if a Task is currently running. This isn't provided in Standard API.
+        We can detect if the No. of rows in Task increases over time_gap seconds.
+        :param task_id:  octoparse task id
+        :param time_gap: Time interval to check between
+        :return: Boolean True or False
+        """
+        params = {
+            'taskId': task_id,
+            'offset': 0,
+            'size': 10
+        }
+
+        path = 'api/alldata/GetDataOfTaskByOffset'
+
+        resp = await self._request('GET', path, params=params)
+        total1 = resp.get('data', {}).get('total', 0)
+
+        await asyncio.sleep(time_gap)
+
+        resp = await self._request('GET', path, params=params)
+        total2 = resp.get('data', {}).get('total', 0)
+
+        return total1 != total2
+
+    async def get_task_data(self, task_id, size=1000, offset=0):
+        """
+        Fetch data for a task id.
+        This will fetch all the data rows present for the task starting from offset
+        till the end of data.
+        This method is only used to get data but will not affect the status of data.
+
+        :param task_id: octoparse task id
+        :param size: chunk size to be fetched in each request
+        :param offset: offset of data to be fetched from start
+        :return: list of data dict
+        """
+        data_list = []
+        async for data in self.get_task_data_generator(task_id, size=size, offset=offset):
+            data_list += data
+        return data_list
+
+    async def get_tasks_data(self, task_ids, size=1000):
+        """
+        Fetch all the data of many tasks concurrently.
+        Pages of a task are fetched in order, different tasks run in parallel
+        (bounded by max_concurrency).
+
+        :param task_ids: list of octoparse task ids
+        :param size: chunk size to be fetched in each request
+        :return: dict of task id -> list of data dict
+        """
+        results = await asyncio.gather(*[self.get_task_data(task_id, size=size) for task_id in task_ids])
+        return dict(zip(task_ids, results))
+
+    async def get_task_data_df(self, task_id):
+        """
+        Fetch data for a task id & returns it as pandas.DataFrame
+
+        :param task_id: octoparse task id
+        :return: pandas.DataFrame data
+        """
+        data = await self.get_task_data(task_id)
+        import pandas as pd
+        return pd.DataFrame.from_dict(data)
+
+    async def get_data_by_offset(self, task_id, size=1000, offset=0):
+        """
+        Fetch data for a task starting from the offset. Only rows equal to less than
+        size will be fetched & returned.
+        :param task_id: octoparse task id
+        :param size: rows to be fetched (max: 1000)
+        :param offset: offset of data to be fetched from start
+        :return: list of data dict
+        """
+        data = list()
+
+        path = 'api/alldata/GetDataOfTaskByOffset'
+
+        if size > 1000:
+            size = 1000
+
+        params = {
+            'taskId': task_id,
+            'offset': offset,
+            'size': size
+        }
+
+        response = await self._request('GET', path, params=params)
+        if 'data' in response:
+            data = response['data'].get('dataList', [])
+        return data
+
+    async def get_task_data_generator(self, task_id, size=1000, offset=0):
+        """
+        Fetch data for a task id.
+        This is an async generator so can be used in an `async for` loop.
+        This method is only used to get data but will not affect the status of data.
+
+        :param task_id: octoparse task id
+        :param size: chunk size to be fetched in each request
+        :param offset: offset of data to be fetched from start
+        :return: list of data dict
+        """
+        path = 'api/alldata/GetDataOfTaskByOffset'
+
+        if size > 1000:
+            size = 1000
+
+        while True:
+            params = {
+                'taskId': task_id,
+                'offset': offset,
+                'size': size
+            }
+
+            response = await self._request('GET', path, params=params)
+            yield response['data'].get('dataList', [])
+
+            if response['data']['restTotal'] != 0:
+                offset = response['data']['offset']
+            else:
+                return
+
+    async def clear_task_data(self, task_id):
+        """
+        Clear data of a task
+        :param task_id: octoparse task id
+        :return: response from api
+        """
+        path = 'api/task/removeDataByTaskId?taskId=' + task_id
+        return await self._request('POST', path)
+
+    async def list_all_task_groups(self):
+        """
+        List All Task Groups
+        :return: list -- all task groups
+        """
+        response = await self._request('GET', 'api/taskgroup')
+        return response.get('data', list())
+
+    async def list_all_tasks_in_group(self, group_id):
+        """
+        List All Tasks in a Group
+        :param group_id: a task group id
+        :return: list -- all tasks in a group
+        """
+        params = {
+            'taskgroupId': group_id
+        }
+        response = await self._request('GET', 'api/task', params=params)
+        return response.get('data', list())
+
+    async def get_not_exported_data(self, task_id, size=1000):
+        """
+        This returns non-exported data. Data will be tagged status = exporting
+        (instead of status=exported) after the export.
+        :param task_id: octoparse task id
+        :param size: The amount of data rows(range from 1 to 1000)
+        :return: json -- task dataList and relevant information
+        """
+        params = {
+            'taskId': task_id,
+            'size': size
+        }
+        response = await self._request('GET', 'api/notexportdata/gettop', params=params)
+        return response.get('data', list())
+
+    async def update_data_status(self, task_id):
+        """
+        This updates data status from ‘exporting’ to ‘exported’.
+        :return: string -- remind message(include error if exists)
+        """
+        params = {
+            'taskId': task_id
+        }
+        return await self._request('POST', 'api/notexportdata/update', params=params)
+
+    # below are Advanced API access functions
+
+    async def get_task_status(self, task_id_list=[]):
+        """
+        This returns status of multiple tasks.
+        :param task_id_list: List of task's id
+        :return: List of status'
+        """
+        params = {
+            "taskIdList": task_id_list
+        }
+        return await self._request('POST', 'api/task/getTaskStatusByIdList', params=params)
+
+    async def get_task_params(self, task_id, name):
+        """
+        This returns the different parameters for a specific task.
+        :param task_id: Task ID
+        :param name: Configuration parameter name (navigateAction1.Url,loopAction1.UrlList,loopAction1.TextList, etc.)
+        :return: Task parameters values (or value arrays) and request status
+        """
+        params = {
+            "taskId": task_id,
+            'name': name
+        }
+        return await self._request('POST', 'api/task/GetTaskRulePropertyByName', params=params)
+
+    async def update_task_param(self, task_id, name, value):
+        """
+        Use this method to update task parameters.
+        :param task_id: Task ID
+        :param name: parameters name
+        :param value: parameters value
+        :return: The task parameter has been updated successfully or not.
+        """
+        params = {
+            "taskId": task_id,
+            'name': name,
+            'value': value
+        }
+        return await self._request('POST', 'api/task/updateTaskRule', params=params)
+
+    async def add_url_text_to_loop(self, task_id, name, value):
+        """
+        Use this method to add new URLs/text to an existing loop.
+        :param task_id: Task ID
+        :param name: parameters name
+        :param value: parameters value
+        :return: The new parameter values have been added successfully or not.
+        """
+        params = {
+            "taskId": task_id,
+            'name': name,
+            'value': value
+        }
+        return await self._request('POST', 'api/task/AddUrlOrTextToTask', params=params)
+
+    async def start_task(self, task_id):
+        """
+        Start Running Task
+        :param task_id: Task ID
+        :return: Status Codes ("data" parameter in response content): 1 = Task starts successfully,
+        2 = Task is running,
+        5 = Task Configuration is incorrect,
+        6 = Permission denied, 100 = Other Error
+        """
+        params = {
+            "taskId": task_id
+        }
+        return await self._request('POST', 'api/task/startTask', params=params)
+
+    async def stop_task(self, task_id):
+        """
+        Stop Running Task
+        :param task_id: Task ID
+        :return: The task has been stopped successfully or not.
+        """
+        params = {
+            "taskId": task_id
+        }
+        return await self._request('POST', 'api/task/stopTask', params=params)
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*- #
+
+import getpass
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from .checkpoint import _atomic_write_json
+from .exceptions import APIError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - windows
+    fcntl = None
+    import msvcrt
+
+TOKEN_FILE = 'octoparse_token.json'
+
+# refresh tokens this many seconds before they expire
+DEFAULT_REFRESH_MARGIN = 300
+
+
+def _get_credentials():
+    """
+    read .env file and load env variables
+    :return:
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return os.getenv('OCTOPARSE_USERNAME'), os.getenv('OCTOPARSE_PASSWORD')
+
+
+def _get_login_content():
+    """
+    Build the body of a password grant token request,
+    asking for the credentials if they are not configured
+    :return: urlencoded body string
+    """
+    username, password = _get_credentials()
+    if not username or not password:
+        username = input("Enter Octoparse Username: ")
+        password = getpass.getpass('Password: ')
+    return 'username={0}&password={1}&grant_type=password'.format(username, password)
+
+
+def _is_token_expired(token_entity, margin=0):
+    """
+    Check if a token entity has expired
+    :param token_entity: token entity dict
+    :param margin: consider the token expired this many seconds early
+    (at most half its lifetime, or a short lived token would always be expired)
+    :return: Boolean True or False
+    """
+    timedelta = datetime.now() - token_entity['datetime']
+    expires_in = token_entity['expires_in']
+    return timedelta.total_seconds() > expires_in - min(margin, expires_in / 2)
+
+
+class TokenStore:
+    """
+    Token entity stored as json on disk & shared by processes.
+    Writes are atomic, a lock file serializes the processes refreshing the token.
+    """
+
+    def __init__(self, path=TOKEN_FILE):
+        """
+        Initialize the store
+        :param path: json file path
+        """
+        self.path = path
+
+    def load(self):
+        """
+        Read the token entity from disk
+        :return: token entity dict or None
+        """
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                token_entity = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        token_entity['datetime'] = datetime.fromtimestamp(token_entity['datetime'])
+        return token_entity
+
+    def save(self, token_entity):
+        """
+        Atomically write the token entity to disk
+        :param token_entity: token entity dict
+        """
+        _atomic_write_json(self.path, dict(token_entity, datetime=token_entity['datetime'].timestamp()))
+
+    @contextmanager
+    def lock(self):
+        """
+        Hold an exclusive lock across processes
+        """
+        with open(self.path + '.lock', 'a+') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class TokenManager:
+    """
+    Keeps a valid access token for a client.
+    Tokens are refreshed refresh_margin seconds before they expire.
+    Only one thread refreshes at a time (the others wait & reuse its token)
+    and with a TokenStore the processes share the token: a process first
+    looks for a fresh token on disk before doing its own round-trip.
+    Nothing is read or requested before the first token is needed.
+    """
+
+    def __init__(self, request_token, store=None, refresh_margin=DEFAULT_REFRESH_MARGIN):
+        """
+        Initialize the manager
+        :param request_token: callable(content) sending a token request, returns the requests.Response
+        :param store: optional TokenStore shared with other processes
+        :param refresh_margin: seconds before expiry to refresh the token
+        """
+        self._request_token = request_token
+        self.store = store
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        # loaded from the store by the first get_access_token()
+        self.token_entity = None
+
+    def _is_fresh(self, token_entity):
+        """
+        Check if a token entity is valid for longer than the refresh margin
+        """
+        return (token_entity is not None and 'access_token' in token_entity
+                and not _is_token_expired(token_entity, self.refresh_margin))
+
+    @contextmanager
+    def _store_lock(self):
+        """
+        Hold the thread lock & the lock of the store
+        """
+        with self._lock:
+            if self.store is None:
+                yield
+            else:
+                with self.store.lock():
+                    yield
+
+    def get_access_token(self):
+        """
+        Return a valid access token, refreshing it if it is about to expire
+        :return: access token string
+        """
+        token_entity = self.token_entity
+        if self._is_fresh(token_entity):
+            return token_entity['access_token']
+        with self._store_lock():
+            if not self._is_fresh(self.token_entity):
+                stored = self.store.load() if self.store is not None else None
+                if self._is_fresh(stored):
+                    # another process already refreshed it
+                    self.token_entity = stored
+                else:
+                    self._refresh(stored or self.token_entity)
+            return self.token_entity['access_token']
+
+    def log_in(self):
+        """
+        Login with the credentials & get a new token
+        :return: token entity
+        """
+        with self._store_lock():
+            return self._log_in()
+
+    def refresh(self):
+        """
+        Refresh the token with the refresh token, login if that fails
+        :return: token entity
+        """
+        with self._store_lock():
+            token_entity = self.token_entity
+            if token_entity is None and self.store is not None:
+                token_entity = self.store.load()
+            return self._refresh(token_entity)
+
+    def _set(self, token_entity):
+        """
+        Keep & store a new token entity
+        """
+        # add time to token
+        token_entity['datetime'] = datetime.now()
+        self.token_entity = token_entity
+        if self.store is not None:
+            self.store.save(token_entity)
+        return token_entity
+
+    def _log_in(self):
+        response = self._request_token(_get_login_content())
+        token_entity = response.json()
+
+        if 'access_token' in token_entity:
+            return self._set(token_entity)
+        else:
+            exit(1)
+
+    def _refresh(self, token_entity):
+        if not token_entity or 'refresh_token' not in token_entity:
+            return self._log_in()
+        content = 'refresh_token=' + token_entity['refresh_token'] + '&grant_type=refresh_token'
+        try:
+            response = self._request_token(content)
+        except APIError as e:
+            if not 400 <= e.status_code < 500 or e.status_code == 429:
+                raise
+            # the refresh token was rejected
+            return self._log_in()
+        token_entity = response.json()
+        if 'access_token' in token_entity:
+            return self._set(token_entity)
+        return self._log_in()
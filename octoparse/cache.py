@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*- #
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS pages (
+    task_id TEXT NOT NULL,
+    page_offset INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    next_offset INTEGER NOT NULL,
+    rest_total INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    nbytes INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (task_id, page_offset)
+)
+'''
+
+
+class PageCache:
+    """
+    Persistent on-disk cache of GetDataOfTaskByOffset pages, stored
+    zlib compressed in a SQLite database & keyed by task id & offset.
+    The least recently used pages are evicted once the cache grows
+    over max_bytes. It can be shared by the threads of a client.
+    """
+
+    def __init__(self, path='octoparse_cache.sqlite', max_bytes=1024 ** 3):
+        """
+        Open (or create) the cache
+        :param path: SQLite database file
+        :param max_bytes: max size of the compressed pages kept
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(_SCHEMA)
+
+    def close(self):
+        """
+        Close the database
+        """
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def _page(row):
+        """
+        Rebuild the 'data' part of a GetDataOfTaskByOffset response from a row
+        """
+        page_offset, size, next_offset, rest_total, total, data = row
+        return {'offset': next_offset, 'restTotal': rest_total, 'total': total, 'size': size,
+                'dataList': json.loads(zlib.decompress(data).decode('utf-8'))}
+
+    def get(self, task_id, offset):
+        """
+        Get a cached page
+        :param task_id: octoparse task id
+        :param offset: offset the page was requested with
+        :return: 'data' dict of the response (offset is the next offset) or None
+        """
+        with self._lock, self._db:
+            row = self._db.execute('SELECT page_offset, size, next_offset, rest_total, total, data FROM pages '
+                                   'WHERE task_id = ? AND page_offset = ?', (task_id, offset)).fetchone()
+            if row is None:
+                return None
+            self._db.execute('UPDATE pages SET accessed = ? WHERE task_id = ? AND page_offset = ?',
+                             (time.time(), task_id, offset))
+        return self._page(row)
+
+    def tail(self, task_id):
+        """
+        Get the last cached page of a task (the one with restTotal 0)
+        :param task_id: octoparse task id
+        :return: tuple of the offset of the page & its 'data' dict, or None
+        """
+        with self._lock:
+            row = self._db.execute('SELECT page_offset, size, next_offset, rest_total, total, data FROM pages '
+                                   'WHERE task_id = ? AND rest_total = 0 ORDER BY next_offset DESC LIMIT 1',
+                                   (task_id,)).fetchone()
+        return None if row is None else (row[0], self._page(row))
+
+    def put(self, task_id, offset, size, data):
+        """
+        Store a page & evict the least recently used pages if needed
+        :param task_id: octoparse task id
+        :param offset: offset the page was requested with
+        :param size: size the page was requested with
+        :param data: 'data' dict of the GetDataOfTaskByOffset response
+        """
+        blob = zlib.compress(json.dumps(data.get('dataList', [])).encode('utf-8'))
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                             (task_id, offset, size, data['offset'], data['restTotal'], data.get('total', 0),
+                              blob, len(blob), time.time()))
+            self._evict()
+
+    def extend_tail(self, task_id, offset, rest_total):
+        """
+        Mark a cached tail page as followed by rest_total new rows
+        :param task_id: octoparse task id
+        :param offset: offset of the tail page
+        :param rest_total: No. of rows after the page
+        """
+        with self._lock, self._db:
+            self._db.execute('UPDATE pages SET rest_total = ? WHERE task_id = ? AND page_offset = ?',
+                             (rest_total, task_id, offset))
+
+    def _evict(self):
+        """
+        Delete the least recently used pages till the cache fits in max_bytes
+        """
+        cached = self._db.execute('SELECT COALESCE(SUM(nbytes), 0) FROM pages').fetchone()[0]
+        if cached <= self.max_bytes:
+            return
+        for task_id, offset, nbytes in self._db.execute('SELECT task_id, page_offset, nbytes FROM pages '
+                                                         'ORDER BY accessed').fetchall():
+            self._db.execute('DELETE FROM pages WHERE task_id = ? AND page_offset = ?', (task_id, offset))
+            cached -= nbytes
+            if cached <= self.max_bytes:
+                return
+
+    def invalidate(self, task_id=None):
+        """
+        Drop the cached pages of a task (or of all tasks)
+        :param task_id: octoparse task id, None for all
+        """
+        with self._lock, self._db:
+            if task_id is None:
+                self._db.execute('DELETE FROM pages')
+            else:
+                self._db.execute('DELETE FROM pages WHERE task_id = ?', (task_id,))
+
+    @property
+    def nbytes(self):
+        """
+        Size of the compressed pages cached
+        """
+        with self._lock:
+            return self._db.execute('SELECT COALESCE(SUM(nbytes), 0) FROM pages').fetchone()[0]
+
+
+class MetadataCache:
+    """
+    In-process TTL & LRU cache of the read-only metadata calls
+    (list_all_task_groups, list_all_tasks_in_group, get_task_params).
+    Each endpoint has its own time to live, the least recently used entries
+    are dropped over maxsize. It can be shared by threads & clients.
+    Cached values are returned as is, don't modify them.
+    """
+
+    DEFAULT_TTLS = {
+        'list_all_task_groups': 300,
+        'list_all_tasks_in_group': 300,
+        'get_task_params': 60,
+    }
+
+    def __init__(self, maxsize=1024, ttls=None):
+        """
+        Initialize the cache
+        :param maxsize: max No. of entries
+        :param ttls: dict of endpoint -> seconds to keep its responses, merged over DEFAULT_TTLS
+        """
+        self.maxsize = maxsize
+        self.ttls = dict(self.DEFAULT_TTLS, **(ttls or {}))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, endpoint, *key):
+        """
+        Get a cached response
+        :param endpoint: method name
+        :param key: arguments of the call
+        :return: tuple (found, value)
+        """
+        with self._lock:
+            entry = self._entries.get((endpoint,) + key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end((endpoint,) + key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, endpoint, *key, value):
+        """
+        Cache a response for the ttl of its endpoint
+        :param endpoint: method name
+        :param key: arguments of the call
+        :param value: response to cache
+        """
+        ttl = self.ttls.get(endpoint)
+        if not ttl:
+            return
+        with self._lock:
+            self._entries[(endpoint,) + key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end((endpoint,) + key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, endpoint=None, task_id=None):
+        """
+        Drop cached responses
+        :param endpoint: only of this method name (default all)
+        :param task_id: only of calls whose first argument is this task id (default all)
+        """
+        with self._lock:
+            for entry in list(self._entries):
+                if endpoint is not None and entry[0] != endpoint:
+                    continue
+                if task_id is not None and (len(entry) < 2 or entry[1] != task_id):
+                    continue
+                del self._entries[entry]
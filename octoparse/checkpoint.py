@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*- #
+
+import json
+import os
+import re
+import tempfile
+from datetime import datetime
+
+
+def _atomic_write_json(path, obj):
+    """
+    Write json to a file atomically: write a temporary file in the
+    same directory, flush it to disk & rename it over the target
+    :param path: file path
+    :param obj: json serializable object
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(obj, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class CheckpointStore:
+    """
+    Small local store of export checkpoints, one json file per task.
+    A checkpoint records the last confirmed offset & row count of a task
+    so an interrupted export can resume where it stopped.
+    """
+
+    def __init__(self, directory='.octoparse_checkpoints'):
+        """
+        Initialize the store
+        :param directory: directory holding the checkpoint files
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, task_id):
+        """
+        Returns the checkpoint file path of a task
+        :param task_id: octoparse task id
+        :return: file path
+        """
+        return os.path.join(self.directory, re.sub(r'[^\w.-]', '_', str(task_id)) + '.json')
+
+    def load(self, task_id):
+        """
+        Load the checkpoint of a task
+        :param task_id: octoparse task id
+        :return: checkpoint dict or None
+        """
+        try:
+            with open(self._path(task_id), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, task_id, offset, rows, **extra):
+        """
+        Atomically save the checkpoint of a task
+        :param task_id: octoparse task id
+        :param offset: offset of the next page to fetch
+        :param rows: No. of rows confirmed so far
+        :param extra: extra state to keep with the checkpoint
+        :return: checkpoint dict
+        """
+        checkpoint = dict(extra, task_id=task_id, offset=offset, rows=rows,
+                          updated=datetime.now().isoformat())
+        _atomic_write_json(self._path(task_id), checkpoint)
+        return checkpoint
+
+    def delete(self, task_id):
+        """
+        Delete the checkpoint of a task
+        :param task_id: octoparse task id
+        """
+        try:
+            os.remove(self._path(task_id))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*- #
+
+import codecs
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:  # pragma: no cover - optional dependency
+    simdjson = None
+
+if orjson is not None:
+    JSON_BACKEND = 'orjson'
+elif simdjson is not None:  # pragma: no cover - optional dependency
+    JSON_BACKEND = 'simdjson'
+else:  # pragma: no cover - optional dependency
+    JSON_BACKEND = 'json'
+
+# start of the rows array of a data page
+_DATA_LIST = re.compile(r'"dataList"\s*:\s*\[')
+# whitespace & commas between rows
+_SEPARATOR = re.compile(r'[ \t\n\r,]*')
+
+# bytes read from the socket at a time when streaming
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def loads(content, backend=None):
+    """
+    Decode json with the fastest backend installed:
+    orjson, simdjson or the standard library json
+    :param content: bytes or str
+    :param backend: 'orjson', 'simdjson' or 'json' (default: JSON_BACKEND)
+    :return: decoded object
+    """
+    backend = backend or JSON_BACKEND
+    if backend == 'orjson':
+        return orjson.loads(content)
+    if backend == 'simdjson':
+        return simdjson.loads(content)
+    return json.loads(content)
+
+
+def get_loads(backend=None):
+    """
+    Returns the decode function of a backend
+    :param backend: 'orjson', 'simdjson', 'json' or None for the fastest installed
+    :return: callable(bytes or str) -> object
+    """
+    backend = backend or JSON_BACKEND
+    if backend == 'orjson':
+        if orjson is None:
+            raise ImportError('orjson is not installed: pip install octoparse[fastjson]')
+        return orjson.loads
+    if backend == 'simdjson':
+        if simdjson is None:
+            raise ImportError('simdjson is not installed: pip install pysimdjson')
+        return simdjson.loads
+    if backend == 'json':
+        return json.loads
+    raise ValueError('unknown json backend: {}'.format(backend))
+
+
+class DataListParser:
+    """
+    Incremental parser of a data page: rows of the 'dataList' array are
+    yielded as soon as they are fully received, without holding the whole
+    body or the decoded page in memory. The rest of the response (offset,
+    restTotal, error...) is available as envelope once all rows were read,
+    with an empty 'dataList'.
+    Responses without a 'dataList' (e.g. errors) are decoded as a whole.
+
+    for row in parser: ...
+    parser.envelope['data']['offset']
+    """
+
+    def __init__(self, chunks, loads=loads):
+        """
+        Initialize the parser
+        :param chunks: iterable of bytes chunks of the body (e.g. Response.iter_content())
+        :param loads: decoder of the envelope
+        """
+        self._chunks = iter(chunks)
+        self._loads = loads
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._row_decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._eof = False
+        self.rows = 0
+        self.envelope = None
+
+    def _read(self):
+        """
+        Append the next chunk to the buffer
+        :return: False at the end of the body
+        """
+        if self._eof:
+            return False
+        for chunk in self._chunks:
+            if chunk:
+                self._buffer += self._decoder.decode(chunk)
+                return True
+        self._buffer += self._decoder.decode(b'', final=True)
+        self._eof = True
+        return False
+
+    def __iter__(self):
+        # find the start of the rows, the envelope before it is kept
+        while True:
+            match = _DATA_LIST.search(self._buffer)
+            if match is not None:
+                break
+            if not self._read():
+                self.envelope = self._loads(self._buffer) if self._buffer.strip() else {}
+                data = self.envelope.get('data') if isinstance(self.envelope, dict) else None
+                if isinstance(data, dict):
+                    rows = data.get('dataList') or []
+                    data['dataList'] = []
+                    for row in rows:
+                        self.rows += 1
+                        yield row
+                return
+        prefix = self._buffer[:match.end()]
+        self._buffer = self._buffer[match.end():]
+
+        pos = 0
+        while True:
+            pos = _SEPARATOR.match(self._buffer, pos).end()
+            if pos == len(self._buffer):
+                self._buffer = ''
+                pos = 0
+                if not self._read():
+                    raise ValueError('truncated data page: dataList is not closed')
+                continue
+            if self._buffer[pos] == ']':
+                break
+            try:
+                row, end = self._row_decoder.raw_decode(self._buffer, pos)
+            except ValueError:
+                row, end = None, None
+            # a row running to the end of the buffer may be cut short (e.g. a number)
+            if end is None or (end == len(self._buffer) and not self._eof):
+                self._buffer = self._buffer[pos:]
+                pos = 0
+                if not self._read() and end is None:
+                    raise ValueError('truncated data page: incomplete row')
+                continue
+            pos = end
+            self.rows += 1
+            yield row
+
+        suffix = self._buffer[pos:]
+        self._buffer = ''
+        while self._read():
+            suffix += self._buffer
+            self._buffer = ''
+        self.envelope = self._loads(prefix + suffix)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*- #
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _drain_task(octo, task_id, sink, size, follow, poll_interval, stop, on_progress):
+    """
+    Drain the not exported data of a single task, see drain_not_exported()
+    :return: stats dict
+    """
+    stats = {'rows': 0, 'batches': 0, 'seconds': 0.0, 'rows_per_second': 0.0, 'error': None}
+    start = time.monotonic()
+    try:
+        while not stop.is_set():
+            batch = octo.get_not_exported_data(task_id, size=size)
+            data = batch.get('dataList', []) if batch else []
+            if not data:
+                if not follow:
+                    break
+                # the task is still scraping, wait for new rows
+                stop.wait(poll_interval)
+                continue
+
+            if not sink(task_id, data):
+                raise RuntimeError('sink did not confirm the batch, it is left as exporting')
+            # only mark the batch exported once the sink has it: at least once delivery
+            octo.update_data_status(task_id)
+
+            stats['rows'] += len(data)
+            stats['batches'] += 1
+            stats['seconds'] = time.monotonic() - start
+            stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+            if on_progress is not None:
+                on_progress(task_id, dict(stats))
+    except Exception as e:
+        stats['error'] = e
+    stats['seconds'] = time.monotonic() - start
+    stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+
+def drain_not_exported(octo, task_ids, sink, size=1000, workers=4, follow=False, poll_interval=30,
+                       stop=None, on_progress=None):
+    """
+    Drain the not exported data of many tasks at once.
+    For each task, batches are fetched with get_not_exported_data() & handed
+    to the sink. update_data_status() is only called once the sink confirmed
+    the batch, so every row is delivered at least once.
+    A task is drained by one worker at a time (a batch must be confirmed before
+    the next one is fetched), so a slow sink holds back its task (backpressure)
+    without blocking the other tasks.
+
+    :param octo: Octoparse client
+    :param task_ids: list of octoparse task ids
+    :param sink: callable(task_id, data_list) called from the worker threads,
+    returns True once the batch is safely stored
+    :param size: rows per batch (max: 1000)
+    :param workers: No. of tasks drained at once
+    :param follow: keep polling tasks which are still scraping instead of stopping at the first empty batch
+    :param poll_interval: seconds between polls of an empty task when following
+    :param stop: optional threading.Event to stop following
+    :param on_progress: optional callable(task_id, stats) called after each confirmed batch
+    :return: dict of task id -> stats dict ('rows', 'batches', 'seconds', 'rows_per_second', 'error')
+    """
+    if stop is None:
+        stop = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [(task_id, executor.submit(_drain_task, octo, task_id, sink, size, follow,
+                                             poll_interval, stop, on_progress))
+                   for task_id in task_ids]
+        return {task_id: future.result() for task_id, future in futures}
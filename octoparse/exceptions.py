@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*- #
+
+
+class OctoparseError(Exception):
+    """
+    Base class of the errors raised by the client
+    """
+
+
+class APIError(OctoparseError):
+    """
+    The api answered with an error status (after retries)
+    """
+
+    def __init__(self, message, status_code=None, response=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = response
+
+
+class CircuitOpenError(OctoparseError):
+    """
+    The circuit breaker of an endpoint is open, the request was not sent
+    """
+
+    def __init__(self, endpoint, retry_in):
+        super().__init__('circuit breaker open for {0}, retry in {1:.1f}s'.format(endpoint, retry_in))
+        self.endpoint = endpoint
+        self.retry_in = retry_in
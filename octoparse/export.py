@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*- #
+
+import csv
+import gzip
+import io
+import json
+import os
+
+from .octoparse import _import_optional, _infer_arrow_schema, _page_to_arrow, _prefetch
+
+FILE_FORMATS = ('ndjson', 'csv', 'parquet')
+COMPRESSIONS = (None, 'gzip', 'zstd')
+
+
+def _check_columns(columns, data_list, offset=None):
+    """
+    Raise when a row has a key outside the columns of the file
+    :param columns: list of columns of the file
+    :param data_list: list of data dict
+    :param offset: No. of rows before the page, for the error message
+    """
+    known = set(columns)
+    for number, row in enumerate(data_list):
+        for key in row:
+            if key not in known:
+                raise ValueError('column {0!r}{1} is not in the columns taken from the first page, '
+                                 'pass columns= to export_task_data to choose them'.format(
+                                     key, '' if offset is None else ' at offset {}'.format(offset + number)))
+
+
+class _RowWriter:
+    """
+    Base writer of text rows (ndjson/csv) to a file.
+    Every page is encoded & compressed on its own and appended to the file,
+    gzip members & zstd frames can be concatenated into a valid stream.
+    """
+
+    def __init__(self, path, compression=None, columns=None, resume_size=None, extrasaction='raise'):
+        self.path = path
+        self.columns = columns
+        self.extrasaction = extrasaction
+        if compression == 'gzip':
+            self._compress = gzip.compress
+        elif compression == 'zstd':
+            self._compress = _import_optional('zstandard', 'zstd').ZstdCompressor().compress
+        else:
+            self._compress = None
+        if resume_size and os.path.exists(path):
+            # drop whatever was written after the last checkpoint
+            self._file = open(path, 'r+b')
+            self._file.truncate(resume_size)
+            self._file.seek(resume_size)
+        else:
+            self._file = open(path, 'wb')
+
+    def _encode(self, data_list, offset=None):
+        raise NotImplementedError
+
+    def write_page(self, data_list, offset=None):
+        """
+        Append a page of data rows to the file
+        :param data_list: list of data dict
+        :param offset: No. of rows before the page, for error messages
+        """
+        chunk = self._encode(data_list, offset)
+        if self._compress is not None:
+            chunk = self._compress(chunk)
+        self._file.write(chunk)
+
+    @property
+    def size(self):
+        """
+        Bytes written to the file
+        """
+        return self._file.tell()
+
+    def sync(self):
+        """
+        Flush the written pages to disk
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+
+class _NdjsonWriter(_RowWriter):
+    """
+    Writes one json document per line, all the keys of a row unless the columns are set
+    """
+
+    def _encode(self, data_list, offset=None):
+        if self.columns is not None:
+            data_list = [{column: row.get(column) for column in self.columns} for row in data_list]
+        rows = [json.dumps(row, ensure_ascii=False) for row in data_list]
+        return ('\n'.join(rows) + '\n').encode('utf-8')
+
+
+class _CsvWriter(_RowWriter):
+    """
+    Writes csv rows, the header is taken from the columns or the first page.
+    With extrasaction 'raise', a row with a key outside the header is an error
+    instead of losing the column.
+    """
+
+    def __init__(self, path, compression=None, columns=None, resume_size=None, extrasaction='raise'):
+        super().__init__(path, compression=compression, columns=columns, resume_size=resume_size,
+                         extrasaction=extrasaction)
+        self._header = self.size > 0
+
+    def _encode(self, data_list, offset=None):
+        if self.columns is None:
+            self.columns = list(dict.fromkeys(key for row in data_list for key in row))
+        elif self.extrasaction == 'raise':
+            _check_columns(self.columns, data_list, offset)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.columns, extrasaction='ignore')
+        if not self._header:
+            writer.writeheader()
+            self._header = True
+        writer.writerows(data_list)
+        return buffer.getvalue().encode('utf-8')
+
+
+class _ParquetWriter:
+    """
+    Writes a parquet file with one row group per page.
+    A parquet file can't be appended to, an interrupted part is rewritten.
+    The schema is fixed by the first page: with extrasaction 'raise', a row with
+    a key outside it or a value not fitting its column type is an error.
+    """
+
+    def __init__(self, path, compression=None, columns=None, resume_size=None, extrasaction='raise'):
+        self.path = path
+        self.columns = columns
+        self.extrasaction = extrasaction
+        self.compression = compression or 'snappy'
+        self._pa = _import_optional('pyarrow', 'arrow')
+        self._pq = _import_optional('pyarrow.parquet', 'arrow')
+        self._sink = self._pa.OSFile(path, 'wb')
+        self._writer = None
+        self.schema = None
+
+    def write_page(self, data_list, offset=None):
+        """
+        Append a page of data rows to the file as a row group
+        :param data_list: list of data dict
+        :param offset: No. of rows before the page, for error messages
+        """
+        if self.schema is None:
+            self.schema = _infer_arrow_schema(self._pa, data_list, self.columns)
+        elif self.extrasaction == 'raise':
+            _check_columns(self.schema.names, data_list, offset)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._sink, self.schema, compression=self.compression)
+        batch = _page_to_arrow(self._pa, data_list, self.schema, offset=offset)
+        self._writer.write_table(self._pa.Table.from_batches([batch]))
+
+    @property
+    def size(self):
+        """
+        Bytes written to the file
+        """
+        return self._sink.tell()
+
+    def sync(self):
+        """
+        Parquet parts are only usable once closed, nothing to sync
+        """
+
+    def close(self):
+        if self._sink.closed:
+            return
+        if self._writer is None:
+            # no rows, still write a valid (empty) file
+            schema = self._pa.schema([(column, self._pa.string()) for column in self.columns or []])
+            self._writer = self._pq.ParquetWriter(self._sink, schema, compression=self.compression)
+        self._writer.close()
+        self._sink.close()
+
+
+_WRITERS = {
+    'ndjson': _NdjsonWriter,
+    'csv': _CsvWriter,
+    'parquet': _ParquetWriter,
+}
+
+
+def _part_path(path, part):
+    """
+    Returns the path of a numbered part file, e.g. data.csv.gz -> data-00001.csv.gz
+    :param path: export path
+    :param part: part number
+    :return: part path
+    """
+    directory, name = os.path.split(path)
+    stem, dot, extension = name.partition('.')
+    return os.path.join(directory, '{0}-{1:05d}{2}{3}'.format(stem, part, dot, extension))
+
+
+def export_task_data(octo, task_id, path, file_format='ndjson', compression=None, columns=None,
+                     max_file_size=None, size=1000, prefetch=0, checkpoint=None):
+    """
+    Stream all the data of a task to disk, writing each page as it arrives,
+    so memory stays flat whatever the No. of rows.
+    Files are written to a temporary path & renamed once the whole export
+    succeeded, a partial export never looks complete.
+
+    With a checkpoint store, the offset, row count & file positions are saved
+    after each page & the temporary files are kept if the export fails. Calling
+    again with the same path & options resumes the export, only the missing tail
+    of the task is downloaded. (An interrupted parquet part is rewritten from its start.)
+
+    :param octo: Octoparse client
+    :param task_id: octoparse task id
+    :param path: file path to write
+    :param file_format: 'ndjson', 'csv' or 'parquet'
+    :param compression: None, 'gzip' or 'zstd' (for parquet: any parquet codec, default snappy)
+    :param columns: list of columns to write, other keys are left out (default all the columns
+    of the first page, a key first appearing on a later page then raises a ValueError)
+    :param max_file_size: roll over to a new file after this many bytes, files are then
+    named with a part number (data.csv -> data-00000.csv, data-00001.csv, ...)
+    :param size: chunk size to be fetched in each request
+    :param prefetch: No. of pages to read ahead while writing
+    :param checkpoint: optional CheckpointStore to resume from & save progress to
+    :return: dict -- 'rows' written & list of 'files'
+    """
+    if file_format not in FILE_FORMATS:
+        raise ValueError('file_format must be one of {}'.format(FILE_FORMATS))
+    if file_format != 'parquet' and compression not in COMPRESSIONS:
+        raise ValueError('compression must be one of {}'.format(COMPRESSIONS))
+    writer_class = _WRITERS[file_format]
+    # keys outside the columns are only dropped when the caller chose them
+    extrasaction = 'raise' if columns is None else 'ignore'
+
+    def open_part(part, resume_size=None):
+        final = path if max_file_size is None else _part_path(path, part)
+        return final, writer_class(final + '.tmp', compression=compression, columns=columns,
+                                   resume_size=resume_size, extrasaction=extrasaction)
+
+    files = []
+    offset = 0
+    rows = 0
+    part_rows = 0
+    resume_size = None
+    state = checkpoint.load(task_id) if checkpoint is not None else None
+    if state is not None and state.get('path') == path:
+        files = state['files']
+        columns = state['columns'] or columns
+        if file_format == 'parquet':
+            # restart the interrupted part
+            offset, rows = state['part_offset'], state['rows'] - state['part_rows']
+        else:
+            offset, rows, part_rows = state['offset'], state['rows'], state['part_rows']
+            resume_size = state['part_size']
+    part_offset = offset
+    final, writer = open_part(len(files), resume_size)
+
+    pages = octo._iter_task_pages(task_id, size=size, offset=offset)
+    if prefetch > 0:
+        pages = _prefetch(pages, prefetch)
+    try:
+        for response in pages:
+            data = response['data'].get('dataList', [])
+            offset = response['data']['offset']
+            if data:
+                writer.write_page(data, offset=rows)
+                rows += len(data)
+                part_rows += len(data)
+                if max_file_size is not None and writer.size >= max_file_size:
+                    writer.close()
+                    files.append(final)
+                    final, writer = open_part(len(files))
+                    part_rows = 0
+                    part_offset = offset
+            if checkpoint is not None:
+                writer.sync()
+                checkpoint.save(task_id, offset, rows, path=path, files=files, columns=writer.columns,
+                                part_rows=part_rows, part_size=writer.size, part_offset=part_offset)
+        writer.close()
+        if part_rows or not files:
+            files.append(final)
+        else:
+            # nothing was written after the last roll over
+            os.remove(final + '.tmp')
+    except BaseException:
+        writer.close()
+        if checkpoint is None:
+            for name in files + [final]:
+                if os.path.exists(name + '.tmp'):
+                    os.remove(name + '.tmp')
+        raise
+
+    for name in files:
+        os.replace(name + '.tmp', name)
+    if checkpoint is not None:
+        checkpoint.delete(task_id)
+    return {'rows': rows, 'files': files}
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*- #
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from .drain import _drain_task
+from .watcher import TaskWatcher, STARTED
+
+
+def _harvest_all(octo, task_id, sink, size, stop):
+    """
+    Hand all the data of a task to the sink page by page
+    :return: stats dict
+    """
+    stats = {'rows': 0, 'batches': 0, 'seconds': 0.0, 'rows_per_second': 0.0, 'error': None}
+    start = time.monotonic()
+    try:
+        for data in octo.get_task_data_generator(task_id, size=size):
+            if stop.is_set():
+                break
+            if data and not sink(task_id, data):
+                raise RuntimeError('sink did not confirm the batch')
+            stats['rows'] += len(data)
+            stats['batches'] += 1
+    except Exception as e:
+        stats['error'] = e
+    stats['seconds'] = time.monotonic() - start
+    stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+
+def harvest_tasks(octo, task_ids, sink, max_running=10, start_workers=4, harvest_workers=4, size=1000,
+                  not_exported=True, run_timeout=None, harvest_timeout=None, start_grace=60,
+                  min_interval=10, max_interval=60, status_rate=1.0, on_progress=None, stop=None):
+    """
+    Run many tasks & harvest their data as a pipeline (Advanced API):
+    tasks are started in the cloud with at most max_running of them running
+    at once, their statuses are watched with batched get_task_status() calls
+    & each task is harvested as soon as it finishes, while the others are
+    still running. A harvested task frees its slot for the next one.
+
+    A task running longer than run_timeout is stopped & harvested. A harvest
+    taking longer than harvest_timeout is interrupted between two batches.
+
+    :param octo: Octoparse client (Advanced API)
+    :param task_ids: list of octoparse task ids
+    :param sink: callable(task_id, data_list) called from the harvest threads,
+    returns True once the batch is safely stored
+    :param max_running: max tasks running in the cloud at once
+    :param start_workers: No. of start_task calls at once
+    :param harvest_workers: No. of tasks harvested at once
+    :param size: rows per batch (max: 1000)
+    :param not_exported: harvest the not exported data & mark it exported (at least once delivery),
+    or all the data of the task (False)
+    :param run_timeout: seconds after which a running task is stopped (None: no limit)
+    :param harvest_timeout: seconds after which a harvest is interrupted (None: no limit)
+    :param start_grace: seconds a started task must be seen running before its status is trusted,
+    so the status of a previous run isn't mistaken for the end of the new one
+    :param min_interval: shortest seconds between status polls of a task
+    :param max_interval: longest seconds between status polls of a task
+    :param status_rate: max get_task_status calls per second
+    :param on_progress: optional callable(task_id, result) called when a task changes stage
+    :param stop: optional threading.Event to stop the pipeline (running tasks are left running)
+    :return: dict of task id -> {'stage': 'pending', 'starting', 'running', 'harvesting', 'done',
+    'failed' or 'stopped' (harvest interrupted by stop), 'start': start outcome,
+    'timed_out': None, 'run' or 'harvest', 'run_seconds', 'harvest': harvest stats dict,
+    'error': exception or None}
+    """
+    if stop is None:
+        stop = threading.Event()
+    results = {task_id: {'stage': 'pending', 'start': None, 'timed_out': None, 'run_seconds': None,
+                         'harvest': None, 'error': None}
+               for task_id in task_ids}
+    pending = list(task_ids)
+    running = {}
+    harvesting = {}
+    watcher = TaskWatcher(octo, advanced_api=True, min_interval=min_interval, max_interval=max_interval,
+                          rate=status_rate, stall_timeout=None)
+
+    def stage(task_id, name, **update):
+        results[task_id].update(update, stage=name)
+        if on_progress is not None:
+            on_progress(task_id, dict(results[task_id]))
+
+    def harvest(task_id, task_stop):
+        if not_exported:
+            return _drain_task(octo, task_id, sink, size, False, 0, task_stop, None)
+        return _harvest_all(octo, task_id, sink, size, task_stop)
+
+    def start_harvest(task_id):
+        watcher.remove([task_id])
+        started = running.pop(task_id)
+        task_stop = threading.Event()
+        harvesting[task_id] = (executor.submit(harvest, task_id, task_stop), task_stop, time.monotonic())
+        stage(task_id, 'harvesting', run_seconds=time.monotonic() - started['at'])
+
+    with ThreadPoolExecutor(max_workers=harvest_workers) as executor:
+        while not stop.is_set() and (pending or running or harvesting):
+            # start tasks in the free slots
+            free = max_running - len(running)
+            if pending and free > 0:
+                batch, pending = pending[:free], pending[free:]
+                for task_id in batch:
+                    stage(task_id, 'starting')
+                summary = octo.start_tasks(batch, workers=start_workers)
+                now = time.monotonic()
+                for outcome, tasks in summary.items():
+                    for task_id, result in tasks.items():
+                        if outcome in ('started', 'running'):
+                            running[task_id] = {'at': now, 'seen_running': outcome == 'running'}
+                            watcher.add([task_id])
+                            stage(task_id, 'running', start=outcome)
+                        else:
+                            stage(task_id, 'failed', start=outcome, error=result['error'])
+
+            # harvest the finished tasks
+            for event in watcher.poll():
+                if event['event'] == STARTED and event['task_id'] in running:
+                    running[event['task_id']]['seen_running'] = True
+            now = time.monotonic()
+            for task_id, started in list(running.items()):
+                state = watcher.state(task_id)
+                if state['running']:
+                    started['seen_running'] = True
+                if state['finished'] and (started['seen_running'] or now - started['at'] >= start_grace):
+                    start_harvest(task_id)
+                elif run_timeout is not None and now - started['at'] >= run_timeout:
+                    results[task_id]['timed_out'] = 'run'
+                    try:
+                        octo.stop_task(task_id)
+                    except Exception as e:
+                        results[task_id]['error'] = e
+                    start_harvest(task_id)
+
+            for task_id, (future, task_stop, started) in list(harvesting.items()):
+                if future.done():
+                    del harvesting[task_id]
+                    stats = future.result()
+                    error = stats['error'] or results[task_id]['error']
+                    stage(task_id, 'failed' if stats['error'] else 'done', harvest=stats, error=error)
+                elif harvest_timeout is not None and now - started >= harvest_timeout and not task_stop.is_set():
+                    results[task_id]['timed_out'] = 'harvest'
+                    task_stop.set()
+
+            if (pending and len(running) < max_running) or not (running or harvesting):
+                continue
+            timeout = watcher.next_poll_in() if running else 1.0
+            if harvesting:
+                # wake up as soon as a harvest is done, checking stop & timeouts every second
+                wait([future for future, task_stop, started in harvesting.values()],
+                     timeout=min(timeout, 1.0), return_when=FIRST_COMPLETED)
+            else:
+                stop.wait(timeout)
+
+        # interrupt the harvests in progress when stopped
+        for future, task_stop, started in harvesting.values():
+            task_stop.set()
+    for task_id, (future, task_stop, started) in harvesting.items():
+        stats = future.result()
+        stage(task_id, 'failed' if stats['error'] else 'stopped', harvest=stats, error=stats['error'])
+    return results
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*- #
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote_plus
+
+import requests
+
+from .exceptions import OctoparseError
+
+# the values are sent in the query string, keep it well under common url limits
+DEFAULT_MAX_BATCH_BYTES = 8000
+
+
+def _encode_values(values):
+    """
+    Encode a list of URLs/text the way the loop parameters expect it:
+    a compact json array
+    :param values: list of str
+    :return: str
+    """
+    return json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+
+
+def _batch_values(values, batch_size, max_batch_bytes):
+    """
+    Split values into batches of at most batch_size items whose
+    url encoded json array fits in max_batch_bytes
+    :param values: list of str
+    :param batch_size: max items per batch
+    :param max_batch_bytes: max encoded size of a batch
+    :return: list of lists
+    """
+    batches = []
+    batch = []
+    # encoded "[" & "]"
+    size = 6
+    for value in values:
+        # encoded item & its "," separator
+        item_size = len(quote_plus(json.dumps(value, ensure_ascii=False))) + 3
+        if item_size + 6 > max_batch_bytes:
+            raise ValueError('value too long for a batch of {} bytes: {:.50}'.format(max_batch_bytes, value))
+        if batch and (len(batch) >= batch_size or size + item_size > max_batch_bytes):
+            batches.append(batch)
+            batch = []
+            size = 6
+        batch.append(value)
+        size += item_size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _loop_count(octo, task_id, name):
+    """
+    Current No. of values of a loop parameter, bypassing the metadata cache
+    :return: int or None if unknown
+    """
+    if octo.metadata_cache is not None:
+        octo.metadata_cache.invalidate('get_task_params', task_id=task_id)
+    data = octo.get_task_params(task_id, name).get('data')
+    return len(data) if isinstance(data, list) else None
+
+
+def load_loop_values(octo, task_id, name, values, replace=True, batch_size=1000,
+                     max_batch_bytes=DEFAULT_MAX_BATCH_BYTES, retries=3, verify=True):
+    """
+    Load a large list of URLs/text into the loop of a task in batches.
+    The first batch replaces the list with update_task_param() (or is appended
+    when replace is False), the next ones are appended in order with
+    add_url_text_to_loop(). A failed batch is retried with backoff; before a
+    retry the loop is counted with get_task_params() so a batch which was
+    applied despite the error isn't appended twice. Loading stops at the first
+    batch failing after retries, the later batches are not sent.
+
+    :param octo: Octoparse client (Advanced API)
+    :param task_id: octoparse task id
+    :param name: loop parameter name (loopAction1.UrlList, loopAction1.TextList, etc.)
+    :param values: list of URLs/text
+    :param replace: replace the current values (True) or append to them (False)
+    :param batch_size: max values per request
+    :param max_batch_bytes: max url encoded size of the values of a request
+    :param retries: max retries of a batch
+    :param verify: count the loop values with get_task_params() at the end (& before retries)
+    :return: dict {'loaded': No. of values confirmed, 'count': final count (None if not verified),
+    'verified': whether count is as expected, 'batches': list of {'size', 'attempts', 'seconds', 'error'},
+    'error': exception which stopped the load or None}
+    """
+    batches = _batch_values(list(values), batch_size, max_batch_bytes)
+    if not batches and replace:
+        # clear the list
+        batches = [[]]
+    report = {'loaded': 0, 'count': None, 'verified': False, 'batches': [], 'error': None}
+    base = 0 if replace or not verify else _loop_count(octo, task_id, name)
+
+    for index, batch in enumerate(batches):
+        first = index == 0 and replace
+        control = octo.update_task_param if first else octo.add_url_text_to_loop
+        expected = len(batch) if first else report['loaded'] + len(batch)
+        stats = {'size': len(batch), 'attempts': 0, 'seconds': 0.0, 'error': None}
+        report['batches'].append(stats)
+        start = time.monotonic()
+        while True:
+            stats['attempts'] += 1
+            try:
+                response = control(task_id, name, _encode_values(batch))
+                if response.get('error') != 'success':
+                    raise OctoparseError('{0} rejected the batch: {1}'.format(control.__name__, response))
+                stats['error'] = None
+                break
+            except (OctoparseError, requests.RequestException) as e:
+                stats['error'] = e
+            if verify and base is not None:
+                try:
+                    # the batch may have been applied even though the call failed
+                    if _loop_count(octo, task_id, name) == base + expected:
+                        stats['error'] = None
+                        break
+                except (OctoparseError, requests.RequestException):
+                    pass
+            if stats['attempts'] > retries:
+                break
+            time.sleep(octo.retry_policy.backoff(stats['attempts'] - 1))
+        stats['seconds'] = time.monotonic() - start
+        if stats['error'] is not None:
+            report['error'] = stats['error']
+            break
+        report['loaded'] = expected
+
+    if verify:
+        try:
+            report['count'] = _loop_count(octo, task_id, name)
+        except (OctoparseError, requests.RequestException) as e:
+            report['error'] = report['error'] or e
+        if report['count'] is not None and base is not None:
+            report['verified'] = report['count'] == base + report['loaded']
+    return report
+
+
+def load_loops(octo, task_values, name, workers=4, **kwargs):
+    """
+    Load the loop lists of many tasks in parallel, see load_loop_values().
+    The batches of a task are sent in order, different tasks are loaded concurrently.
+    :param octo: Octoparse client (Advanced API)
+    :param task_values: dict of task id -> list of URLs/text
+    :param name: loop parameter name
+    :param workers: No. of tasks loaded at once
+    :param kwargs: arguments of load_loop_values()
+    :return: dict of task id -> report
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [(task_id, executor.submit(load_loop_values, octo, task_id, name, values, **kwargs))
+                   for task_id, values in task_values.items()]
+        return {task_id: future.result() for task_id, future in futures}
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*- #
+
+import threading
+from bisect import bisect_left
+
+# upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _EndpointStats:
+    """
+    Counters of an endpoint
+    """
+    __slots__ = ('statuses', 'buckets', 'latency_sum', 'latency_count', 'bytes', 'rows', 'retries')
+
+    def __init__(self, buckets):
+        self.statuses = {}
+        # per bucket counts (not cumulative), the last one is +Inf
+        self.buckets = [0] * (len(buckets) + 1)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.bytes = 0
+        self.rows = 0
+        self.retries = 0
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_bound(bound):
+    return repr(float(bound))
+
+
+class Metrics:
+    """
+    Thread safe counters of the api calls of one or more clients, labelled
+    by endpoint (url path): requests by status, latency histogram, response
+    bytes, rows returned & retries, plus token requests by grant type.
+    Recording a call costs a lock & a few dict updates, cheap enough to
+    leave on in pagination loops.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, namespace='octoparse'):
+        """
+        Initialize the metrics
+        :param buckets: sorted upper bounds in seconds of the latency histogram buckets
+        :param namespace: prefix of the metric names in the text exposition
+        """
+        self.bucket_bounds = tuple(float(bound) for bound in buckets)
+        self.namespace = namespace
+        self._endpoints = {}
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, endpoint):
+        # called with the lock held
+        stats = self._endpoints.get(endpoint)
+        if stats is None:
+            stats = self._endpoints[endpoint] = _EndpointStats(self.bucket_bounds)
+        return stats
+
+    def observe_request(self, endpoint, status, seconds, size=0):
+        """
+        Record an http request (each retry is a request)
+        :param endpoint: url path without query
+        :param status: http status code or 'error' when no response was received
+        :param seconds: latency
+        :param size: response bytes
+        """
+        index = bisect_left(self.bucket_bounds, seconds)
+        with self._lock:
+            stats = self._stats(endpoint)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.buckets[index] += 1
+            stats.latency_sum += seconds
+            stats.latency_count += 1
+            stats.bytes += size
+
+    def observe_rows(self, endpoint, rows):
+        """
+        Record data rows returned by an endpoint
+        :param endpoint: url path without query
+        :param rows: No. of rows
+        """
+        with self._lock:
+            self._stats(endpoint).rows += rows
+
+    def observe_retry(self, endpoint):
+        """
+        Record a retry of a request
+        :param endpoint: url path without query
+        """
+        with self._lock:
+            self._stats(endpoint).retries += 1
+
+    def observe_token(self, grant):
+        """
+        Record a token request
+        :param grant: 'password' (login) or 'refresh_token'
+        """
+        with self._lock:
+            self._tokens[grant] = self._tokens.get(grant, 0) + 1
+
+    def reset(self):
+        """
+        Drop all the recorded values
+        """
+        with self._lock:
+            self._endpoints = {}
+            self._tokens = {}
+
+    def snapshot(self):
+        """
+        Copy of the recorded values
+        :return: dict {'endpoints': {endpoint: {'requests': {status: count}, 'latency': {'count', 'sum',
+        'buckets': [(upper bound, cumulative count)...]}, 'bytes', 'rows', 'retries'}},
+        'token_requests': {grant: count}}
+        """
+        with self._lock:
+            endpoints = {}
+            for endpoint, stats in self._endpoints.items():
+                cumulative = 0
+                buckets = []
+                for bound, count in zip(self.bucket_bounds + (float('inf'),), stats.buckets):
+                    cumulative += count
+                    buckets.append((bound, cumulative))
+                endpoints[endpoint] = {
+                    'requests': dict(stats.statuses),
+                    'latency': {'count': stats.latency_count, 'sum': stats.latency_sum, 'buckets': buckets},
+                    'bytes': stats.bytes,
+                    'rows': stats.rows,
+                    'retries': stats.retries,
+                }
+            return {'endpoints': endpoints, 'token_requests': dict(self._tokens)}
+
+    def to_openmetrics(self):
+        """
+        OpenMetrics text exposition (content type
+        application/openmetrics-text; version=1.0.0; charset=utf-8)
+        :return: str
+        """
+        return self._exposition(openmetrics=True)
+
+    def to_prometheus(self):
+        """
+        Prometheus text exposition (content type text/plain; version=0.0.4; charset=utf-8)
+        :return: str
+        """
+        return self._exposition(openmetrics=False)
+
+    def _exposition(self, openmetrics):
+        snapshot = self.snapshot()
+        endpoints = sorted(snapshot['endpoints'].items())
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            # counters are declared without their _total suffix in OpenMetrics
+            declared = name[:-len('_total')] if openmetrics and kind == 'counter' else name
+            lines.append('# HELP {0}_{1} {2}'.format(self.namespace, declared, help_text))
+            lines.append('# TYPE {0}_{1} {2}'.format(self.namespace, declared, kind))
+            for suffix, labels, value in samples:
+                label_text = ','.join('{0}="{1}"'.format(key, _escape(label)) for key, label in labels)
+                lines.append('{0}_{1}{2} {3}'.format(self.namespace, suffix,
+                                                     '{' + label_text + '}' if label_text else '', value))
+
+        family('requests_total', 'counter', 'Http requests by endpoint & status.',
+               [('requests_total', (('endpoint', endpoint), ('status', status)), count)
+                for endpoint, stats in endpoints
+                for status, count in sorted(stats['requests'].items(), key=lambda item: str(item[0]))])
+
+        samples = []
+        for endpoint, stats in endpoints:
+            for bound, count in stats['latency']['buckets']:
+                le = '+Inf' if bound == float('inf') else _format_bound(bound)
+                samples.append(('request_duration_seconds_bucket', (('endpoint', endpoint), ('le', le)), count))
+            samples.append(('request_duration_seconds_count', (('endpoint', endpoint),), stats['latency']['count']))
+            samples.append(('request_duration_seconds_sum', (('endpoint', endpoint),), stats['latency']['sum']))
+        family('request_duration_seconds', 'histogram', 'Latency of the http requests.', samples)
+
+        for name, key, help_text in (('response_bytes_total', 'bytes', 'Bytes of the responses.'),
+                                     ('rows_total', 'rows', 'Data rows returned.'),
+                                     ('retries_total', 'retries', 'Retried requests.')):
+            family(name, 'counter', help_text,
+                   [(name, (('endpoint', endpoint),), stats[key]) for endpoint, stats in endpoints])
+
+        family('token_requests_total', 'counter', 'Token requests by grant type.',
+               [('token_requests_total', (('grant', grant),), count)
+                for grant, count in sorted(snapshot['token_requests'].items())])
+
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
@@ -1,14 +1,22 @@
 # -*- coding: utf-8 -*- #
 
-import os
-from dotenv import load_dotenv
-import pickle
+import importlib
+import json
+import queue
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
-import pandas as pd
-import getpass
-from datetime import datetime
+
+from .auth import TokenManager, TokenStore, TOKEN_FILE, DEFAULT_REFRESH_MARGIN
+from .decoder import DataListParser, STREAM_CHUNK_SIZE, get_loads
+from .exceptions import APIError, CircuitOpenError
+from .metrics import Metrics
+from .tracing import _trace, _trace_iter, REQUEST, TOKEN, PAGE, EXPORT
+from .retry import RetryPolicy, CircuitBreaker, _retry_after
+from .rows import RowSet
+from .transport import RequestsTransport, DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE
 
 BASE_URL = 'https://dataapi.octoparse.com/'
 ADV_BASE_URL = 'http://advancedapi.octoparse.com/'
@@ -17,6 +25,17 @@ ADV_BASE_URL = 'http://advancedapi.octoparse.com/'
 CHINA_BASE_URL = 'https://dataapi.bazhuayu.com/'
 CHINA_ADV_BASE_URL = 'https://advancedapi.bazhuayu.com/'
 
+# parts of error messages telling the request rate is too high
+THROTTLE_MESSAGES = ('too many', 'too frequent', 'rate limit', 'throttl')
+
+# POST endpoints which only read & can be retried
+IDEMPOTENT_POSTS = ('api/task/getTaskStatusByIdList', 'api/task/GetTaskRulePropertyByName')
+
+# startTask status codes ("data" of the response) -> outcome of start_tasks()
+START_TASK_OUTCOMES = {1: 'started', 2: 'running', 5: 'misconfigured', 6: 'denied', 100: 'failed'}
+# "Other error", worth another try
+RETRY_TASK_STATUS = 100
+
 # Helper Methods
 
 
@@ -37,10 +56,6 @@ def _post_request(url, token, params=None, body=None):
         res = requests.post(url, headers=headers, params=params)
     else:
         res = requests.post(url, headers=headers, params=params, data=body)
-    if res.status_code == 200:
-        pass
-    else:
-        pass
     return res.json()
 
 
@@ -59,21 +74,284 @@ def _get_request(url, token, params=None):
         res = requests.get(url, headers=headers)
     else:
         res = requests.get(url, headers=headers, params=params)
-
-    if res.status_code == 200:
-        pass
-    else:
-        pass
     return res.json()
 
 
-def _get_credentials():
+def _is_throttled(res, inspect_body=True):
+    """
+    Check if the api is throttling or overloaded:
+    429 / 5xx status or a small error payload about the request rate
+    :param res: requests.Response
+    :param inspect_body: look for a throttling payload (False for streamed responses)
+    :return: Boolean True or False
+    """
+    if res.status_code == 429 or res.status_code >= 500:
+        return True
+    if not inspect_body:
+        return False
+    # data pages are big, only error payloads are worth inspecting
+    if len(res.content) > 1024:
+        return False
+    try:
+        data = res.json()
+    except ValueError:
+        return False
+    if not isinstance(data, dict):
+        return False
+    message = '{} {}'.format(data.get('error', ''), data.get('error_Description', '')).lower()
+    return any(text in message for text in THROTTLE_MESSAGES)
+
+
+def _prefetch(iterable, depth):
+    """
+    Iterate over iterable in a background thread, reading ahead
+    up to depth items into a bounded queue.
+    Exceptions raised by the iterable are re-raised to the consumer.
+    :param iterable: iterable to read ahead
+    :param depth: max No. of items buffered
+    :return: generator of the items
+    """
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(('item', item)):
+                    return
+            put(('end', None))
+        except Exception as e:
+            put(('error', e))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            kind, item = items.get()
+            if kind == 'end':
+                return
+            if kind == 'error':
+                raise item
+            yield item
+    finally:
+        # consumer finished or stopped early, release the producer
+        stop.set()
+
+
+def _page_to_df(data_list, columns=None, downcast=False, categories=None):
+    """
+    Convert a page of data rows to pandas.DataFrame
+    :param data_list: list of data dict
+    :param columns: list of columns to keep
+    :param downcast: downcast numeric columns to the smallest dtype
+    :param categories: list of columns to store as categoricals
+    :return: pandas.DataFrame
+    """
+    # pandas is slow to import, only load it when a DataFrame is built
+    import pandas as pd
+
+    df = pd.DataFrame.from_records(data_list, columns=columns)
+    if downcast:
+        for column in df.select_dtypes(include='integer').columns:
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+        for column in df.select_dtypes(include='floating').columns:
+            df[column] = pd.to_numeric(df[column], downcast='float')
+    for column in categories or []:
+        if column in df:
+            df[column] = df[column].astype('category')
+    return df
+
+
+def _concat_frames(frames, categories=None):
+    """
+    Concatenate DataFrames, keeping the categorical columns categorical
+    :param frames: list of pandas.DataFrame
+    :param categories: list of categorical columns
+    :return: pandas.DataFrame
+    """
+    if len(frames) == 1:
+        return frames[0]
+    import pandas as pd
+    from pandas.api.types import union_categoricals
+
+    for column in categories or []:
+        present = [frame[column] for frame in frames if column in frame]
+        if not present:
+            continue
+        # align the categories so concat doesn't fall back to object dtype
+        union = union_categoricals(present).categories
+        for frame in frames:
+            if column in frame:
+                frame[column] = frame[column].cat.set_categories(union)
+            else:
+                frame[column] = pd.Categorical([None] * len(frame), categories=union)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _import_optional(name, extra):
+    """
+    Import an optional dependency
+    :param name: module name
+    :param extra: name of the setup.py extra providing it
+    :return: module
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise ImportError('{0} is required for this method: pip install octoparse[{1}]'.format(name, extra))
+
+
+def _infer_arrow_schema(pa, data_list, columns=None):
+    """
+    Infer the arrow schema of a task from a page of data rows.
+    Columns without any value in the page are typed as string.
+    :param pa: pyarrow module
+    :param data_list: list of data dict
+    :param columns: list of columns to keep (default all the keys of the page)
+    :return: pyarrow.Schema
+    """
+    if columns is None:
+        columns = list(dict.fromkeys(key for row in data_list for key in row))
+    fields = []
+    for column in columns:
+        array = pa.array([row.get(column) for row in data_list])
+        fields.append(pa.field(column, pa.string() if pa.types.is_null(array.type) else array.type))
+    return pa.schema(fields)
+
+
+def _string_array(pa, values):
+    """
+    Convert values to an arrow string array, values other than str are json encoded
+    :param pa: pyarrow module
+    :param values: list of values
+    :return: pyarrow.Array
+    """
+    return pa.array([value if value is None or isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+                     for value in values], type=pa.string())
+
+
+def _promote_arrow_type(pa, left, right):
+    """
+    Returns the arrow type holding the values of both types:
+    null -> any type, int -> float, anything else -> string
+    :param pa: pyarrow module
+    :return: pyarrow.DataType
+    """
+    if left == right or pa.types.is_null(right):
+        return left
+    if pa.types.is_null(left):
+        return right
+    if pa.types.is_integer(left) and pa.types.is_integer(right):
+        return pa.int64()
+    if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in (left, right)):
+        return pa.float64()
+    return pa.string()
+
+
+def _column_to_arrow(pa, values, type, promote=False):
+    """
+    Convert the values of a column to an arrow array.
+    Values not fitting a string column are json encoded, with promote the
+    type is widened to fit the values instead of failing.
+    :param pa: pyarrow module
+    :param values: list of values
+    :param type: pyarrow.DataType of the column
+    :param promote: widen the type if needed
+    :return: pyarrow.Array
+    """
+    if pa.types.is_string(type):
+        try:
+            return pa.array(values, type=type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return _string_array(pa, values)
+    # inferred then cast, pa.array(values, type=int64) would truncate floats
+    try:
+        array = pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        if not promote:
+            raise
+        # mixed types
+        return _string_array(pa, values)
+    if array.type == type:
+        return array
+    if promote:
+        type = _promote_arrow_type(pa, type, array.type)
+        if pa.types.is_string(type):
+            return _string_array(pa, values)
+    return array.cast(type)
+
+
+def _page_to_arrow(pa, data_list, schema, offset=None, promote=False):
+    """
+    Convert a page of data rows to an arrow record batch
+    :param pa: pyarrow module
+    :param data_list: list of data dict
+    :param schema: pyarrow.Schema of the task
+    :param offset: No. of rows before the page, for error messages
+    :param promote: widen the column types to fit the page, the batch schema is then the widened schema
+    :return: pyarrow.RecordBatch
+    """
+    fields = []
+    arrays = []
+    for field in schema:
+        try:
+            array = _column_to_arrow(pa, [row.get(field.name) for row in data_list], field.type, promote)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+            raise ValueError('column {0!r}{1} does not fit the {2} type of the first page: {3}'.format(
+                field.name, '' if offset is None else ' at offset {}'.format(offset), field.type, e)) from e
+        fields.append(pa.field(field.name, array.type))
+        arrays.append(array)
+    return pa.RecordBatch.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def _cast_arrow_batch(pa, batch, schema):
+    """
+    Cast a record batch to a wider schema, missing columns are filled with nulls
+    :param pa: pyarrow module
+    :param batch: pyarrow.RecordBatch
+    :param schema: pyarrow.Schema with the columns of the batch & maybe more
+    :return: pyarrow.RecordBatch
+    """
+    if batch.schema == schema:
+        return batch
+    arrays = []
+    for field in schema:
+        index = batch.schema.get_field_index(field.name)
+        if index < 0:
+            arrays.append(pa.nulls(batch.num_rows, type=field.type))
+        elif batch.column(index).type == field.type:
+            arrays.append(batch.column(index))
+        elif pa.types.is_string(field.type):
+            arrays.append(_string_array(pa, batch.column(index).to_pylist()))
+        else:
+            # int -> float, precision loss of huge ints is expected
+            arrays.append(batch.column(index).cast(field.type, safe=False))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _get_base_url(advanced_api=False, china=False):
     """
-    read .env file and load env variables
-    :return:
+    Returns the api base url
+    :param advanced_api: whether use advanced api or not
+    :param china: access from china or not
+    :return: base url
     """
-    load_dotenv()
-    return os.getenv('OCTOPARSE_USERNAME'), os.getenv('OCTOPARSE_PASSWORD')
+    if advanced_api:
+        if china:
+            return CHINA_ADV_BASE_URL
+        return ADV_BASE_URL
+    if china:
+        return CHINA_BASE_URL
+    return BASE_URL
 
 
 class Octoparse:
@@ -82,63 +360,101 @@ class Octoparse:
     All the requests can be made through this class.
     """
 
-    def __init__(self, advanced_api=False, china=False):
+    def __init__(self, advanced_api=False, china=False, session=None,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 pool_block=False, keep_alive=True, page_cache=None, metadata_cache=None,
+                 token_store=None, refresh_margin=DEFAULT_REFRESH_MARGIN,
+                 rate_limiter=None, concurrency_limiter=None, retry_policy=None,
+                 circuit_breaker_threshold=5, circuit_breaker_timeout=30, json_backend=None, base_url=None,
+                 transport=None, metrics=None, tracer=None):
         """
-        Initialize the object
+        Initialize the object. Nothing is read from disk or sent before the first request.
         :param advanced_api: whether use advanced api or not
         :param china: access from china or not
+        :param session: an existing requests.Session to use (it won't be closed by close())
+        :param pool_connections: number of per-host connection pools to keep
+        :param pool_maxsize: max connections kept alive per host
+        :param pool_block: block when all connections to a host are busy
+        :param keep_alive: reuse connections between requests
+        :param page_cache: optional PageCache keeping the fetched pages of task data on disk
+        :param metadata_cache: optional MetadataCache of task groups, task lists & task parameters
+        :param token_store: TokenStore sharing the token with other processes
+        (default: octoparse_token.json in the working directory)
+        :param refresh_margin: seconds before expiry to refresh the token
+        :param rate_limiter: optional RateLimiter every request waits on (can be shared)
+        :param concurrency_limiter: optional AdaptiveConcurrencyLimiter bounding the requests
+        in flight (can be shared)
+        :param retry_policy: RetryPolicy of the idempotent requests (default: 3 retries with backoff)
+        :param circuit_breaker_threshold: consecutive failures of an endpoint making it fail fast (None: disabled)
+        :param circuit_breaker_timeout: seconds an endpoint fails fast before a trial request
+        :param json_backend: 'orjson', 'simdjson' or 'json' to decode responses
+        (default: the fastest installed)
+        :param base_url: url of the api, e.g. a local mock server (default: from advanced_api & china)
+        :param transport: Transport sending the requests, e.g. HttpxTransport for HTTP/2 (it won't be closed
+        by close(), default: RequestsTransport built from session & the pool arguments)
+        :param metrics: Metrics recording the api calls (can be shared, default: one per client)
+        :param tracer: optional Tracer called around requests, token refreshes, pages & exports,
+        e.g. CallbackTracer or OpenTelemetryTracer
         """
 
-        self.token_entity = None
-        if advanced_api:
-            if china:
-                self.base_url = CHINA_ADV_BASE_URL
-            else:
-                self.base_url = ADV_BASE_URL
+        self.page_cache = page_cache
+        self.rate_limiter = rate_limiter
+        self.concurrency_limiter = concurrency_limiter
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.circuit_breaker_threshold = circuit_breaker_threshold
+        self.circuit_breaker_timeout = circuit_breaker_timeout
+        self._circuit_breakers = {}
+        self._circuit_breakers_lock = threading.Lock()
+        self.metadata_cache = metadata_cache
+        self.json_loads = get_loads(json_backend)
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.tracer = tracer
+        if transport is None:
+            self.transport = RequestsTransport(session=session,
+                                               pool_connections=pool_connections,
+                                               pool_maxsize=pool_maxsize,
+                                               pool_block=pool_block,
+                                               keep_alive=keep_alive)
+            self._owns_transport = True
         else:
-            if china:
-                self.base_url = CHINA_BASE_URL
-            else:
-                self.base_url = BASE_URL
-        self._token_file = 'octoparse_token.pickle'
-        self._read_token_file()
-
-    def __del__(self):
-        self._save_token_file()
-
-    def _read_token_file(self):
+            self.transport = transport
+            self._owns_transport = False
+        # requests.Session of the transport (None when it doesn't use one)
+        self.session = getattr(self.transport, 'session', None)
+        self.advanced_api = advanced_api
+        self.base_url = base_url or _get_base_url(advanced_api, china)
+        if token_store is None:
+            token_store = TokenStore(TOKEN_FILE)
+        # authentication happens on the first request
+        self.token_manager = TokenManager(self._request_token, store=token_store, refresh_margin=refresh_margin)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
         """
-        Read token pickle file from disk
+        Close the pooled connections of this client
         """
-        if os.path.exists(self._token_file):
-            with open(self._token_file, 'rb') as token:
-                self.token_entity = pickle.load(token)
-        else:
-            self.log_in()
+        if self._owns_transport:
+            self.transport.close()
 
-    def _save_token_file(self):
+    @property
+    def token_entity(self):
         """
-        Save token pickle file to disk
+        Current token entity (None before the first request)
         """
-        if 'access_token' not in self.token_entity:
-            return
-        with open(self._token_file, 'wb') as token:
-            pickle.dump(self.token_entity, token)
+        return self.token_manager.token_entity
 
     def _get_access_token(self):
         """
         Return the valid access token
-        if expired then first refresh the token
+        if about to expire then first refresh the token
         :return: access token string
         """
-        if self.token_entity is None:
-            self.log_in()
-        else:
-            # check if token expired
-            timedelta = datetime.now() - self.token_entity['datetime']
-            if timedelta.total_seconds() > self.token_entity['expires_in']:
-                self.refresh_token()
-        return self.token_entity['access_token']
+        return self.token_manager.get_access_token()
 
     def _get_url(self, path):
         """
@@ -148,76 +464,188 @@ class Octoparse:
         """
         return self.base_url + path
 
+    def _send_once(self, method, url, endpoint, attempt=0, **kwargs):
+        """
+        Send a request on the transport through the rate limiter
+        & the concurrency limiter of the client
+        :param method: 'GET' or 'POST'
+        :param url: absolute url
+        :param endpoint: url path without query, labels the metrics
+        :param attempt: No. of previous attempts of the request
+        :param kwargs: arguments of Transport.request
+        :return: tuple of the response & whether the api is throttling
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        limiter = self.concurrency_limiter
+        ticket = limiter.acquire() if limiter is not None else None
+        outcome = 'error'
+        status = 'error'
+        size = 0
+        start = time.perf_counter()
+        try:
+            with _trace(self.tracer, REQUEST, {'method': method, 'endpoint': endpoint, 'attempt': attempt}) as context:
+                res = self.transport.request(method, url, **kwargs)
+                status = res.status_code
+                stream = kwargs.get('stream')
+                # streamed bodies aren't read yet, count them by their announced size
+                size = int(res.headers.get('Content-Length') or 0) if stream else len(res.content)
+                context.update(status=status, bytes=size)
+            outcome = 'throttled' if _is_throttled(res, not stream) else 'success'
+            return res, outcome == 'throttled'
+        finally:
+            self.metrics.observe_request(endpoint, status, time.perf_counter() - start, size)
+            if limiter is not None:
+                limiter.release(ticket, outcome)
+
+    def _get_circuit_breaker(self, endpoint):
+        """
+        Returns the circuit breaker of an endpoint
+        :param endpoint: url path without query
+        :return: CircuitBreaker or None if disabled
+        """
+        if not self.circuit_breaker_threshold:
+            return None
+        with self._circuit_breakers_lock:
+            breaker = self._circuit_breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(self.circuit_breaker_threshold, self.circuit_breaker_timeout)
+                self._circuit_breakers[endpoint] = breaker
+            return breaker
+
+    def _send(self, method, url, endpoint, idempotent=True, **kwargs):
+        """
+        Send a request, retrying transient failures of idempotent requests
+        with backoff, behind the circuit breaker of its endpoint
+        :param method: 'GET' or 'POST'
+        :param url: absolute url
+        :param endpoint: url path without query, keys the circuit breaker
+        :param idempotent: whether the request can be safely retried
+        :param kwargs: arguments of Transport.request
+        :return: requests.Response
+        :raises APIError: when the status isn't 2xx (after retries for transient errors)
+        """
+        breaker = self._get_circuit_breaker(endpoint)
+        policy = self.retry_policy
+        policy.record_request()
+        attempt = 0
+        while True:
+            if breaker is not None and not breaker.allow():
+                raise CircuitOpenError(endpoint, breaker.retry_in)
+            try:
+                res, throttled = self._send_once(method, url, endpoint, attempt, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if breaker is not None:
+                    breaker.record_failure()
+                if idempotent and policy.should_retry(attempt):
+                    self.metrics.observe_retry(endpoint)
+                    time.sleep(policy.backoff(attempt))
+                    attempt += 1
+                    continue
+                raise
+            except Exception:
+                # any other error (e.g. a broken body) still counts, or a trial request would keep it half open
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
+
+            transient = throttled or res.status_code in policy.retry_statuses
+            if breaker is not None:
+                if transient:
+                    breaker.record_failure()
+                else:
+                    # a client error (e.g. 401, 404) doesn't mean the endpoint is down
+                    breaker.record_success()
+            if not transient and 200 <= res.status_code < 300:
+                return res
+            if transient and idempotent and policy.should_retry(attempt):
+                self.metrics.observe_retry(endpoint)
+                # give the connection back, a streamed body would otherwise hold it
+                res.close()
+                time.sleep(policy.backoff(attempt, _retry_after(res)))
+                attempt += 1
+                continue
+            if kwargs.get('stream'):
+                # read the (small) error body so it stays on the error, then release the connection
+                res.content
+                res.close()
+            raise APIError('{0} {1} failed with status {2}'.format(method, endpoint, res.status_code),
+                           status_code=res.status_code, response=res)
+
+    def _request(self, method, path, params=None, body=None):
+        """
+        Send an authorized api request
+        :param method: 'GET' or 'POST'
+        :param path: relative url path
+        :param params: URL Parameters
+        :param body: body to be sent with request
+        :return: json of response
+        """
+        response = self.json_loads(self._request_response(method, path, params=params, body=body).content)
+        data = response.get('data') if isinstance(response, dict) else None
+        if isinstance(data, dict) and isinstance(data.get('dataList'), list):
+            self.metrics.observe_rows(path.split('?')[0], len(data['dataList']))
+        return response
+
+    def _request_response(self, method, path, params=None, body=None, stream=False):
+        """
+        Send an authorized api request
+        :param method: 'GET' or 'POST'
+        :param path: relative url path
+        :param params: URL Parameters
+        :param body: body to be sent with request
+        :param stream: don't read the body yet, the response must then be closed
+        :return: requests.Response
+        """
+        headers = {
+            'Authorization': 'bearer ' + self._get_access_token()
+        }
+        endpoint = path.split('?')[0]
+        idempotent = method == 'GET' or endpoint in IDEMPOTENT_POSTS
+        return self._send(method, self._get_url(path), endpoint, idempotent=idempotent,
+                          headers=headers, params=params, data=body, stream=stream)
+
+    def _request_token(self, content):
+        """
+        Send a token request
+        :param content: urlencoded body
+        :return: requests.Response
+        """
+        grant = 'refresh_token' if 'grant_type=refresh_token' in content else 'password'
+        self.metrics.observe_token(grant)
+        with _trace(self.tracer, TOKEN, {'grant': grant}):
+            return self._send('POST', self.base_url + 'token', 'token', data=content)
+
     def log_in(self):
         """
         Login & get a access token
         :return: token entity
         """
-        username, password = _get_credentials()
-        if not username or not password:
-            username = input("Enter Octoparse Username: ")
-            password = getpass.getpass('Password: ')
-        content = 'username={0}&password={1}&grant_type=password'.format(username, password)
-        token_entity = requests.post(self.base_url + 'token', data=content).json()
-
-        if 'access_token' in token_entity:
-            self.token_entity = token_entity
-            # add time to token
-            self.token_entity['datetime'] = datetime.now()
-            self._save_token_file()
-            return token_entity
-        else:
-            exit(1)
+        return self.token_manager.log_in()
 
     def refresh_token(self):
         """
         refresh the token with refresh token id
         :return: new refreshed token string
         """
-
-        content = 'refresh_token=' + self.token_entity['refresh_token'] + '&grant_type=refresh_token'
-        response = requests.post(self.base_url + 'token', data=content)
-        if response.status_code == 200:
-            token_entity = response.json()
-            refresh_token = token_entity.get('access_token', token_entity)
-            self.token_entity = token_entity
-            # add time to token
-            self.token_entity['datetime'] = datetime.now()
-            self._save_token_file()
-            return refresh_token
-        else:
-            self.log_in()
-            return self.token_entity['refresh_token']
+        return self.token_manager.refresh()['access_token']
 
     def is_task_running(self, task_id, time_gap=5):
         """
         Check if a Task is currently running. This isn't provided in Standard API.
         We can detect if the No. of rows in Task increases over time_gap seconds.
+        To watch many tasks, use a TaskWatcher instead.
         :param task_id:  octoparse task id
         :param time_gap: Time interval to check between
         :return: Boolean True or False
         """
 
-        params = {
-            'taskId': task_id,
-            'offset': 0,
-            'size': 10
-        }
-
-        path = 'api/alldata/GetDataOfTaskByOffset'
-
-        resp = _get_request(self._get_url(path),
-                            self._get_access_token(),
-                            params=params
-                            )
+        resp = self._get_task_page(task_id, 10, 0)
         total1 = resp.get('data', {}).get('total', 0)
 
         time.sleep(time_gap)
 
-        resp = _get_request(self._get_url(path),
-                            self._get_access_token(),
-                            params=params
-                            )
+        resp = self._get_task_page(task_id, 10, 0)
         total2 = resp.get('data', {}).get('total', 0)
 
         if total1 == total2:
@@ -240,48 +668,154 @@ class Octoparse:
         :return: list of data dict
         """
 
-        offset = offset
         data_list = []
 
-        path = 'api/alldata/GetDataOfTaskByOffset'
-
         if size > 1000:
             size = 1000
 
-        while True:
-            params = {
-                'taskId': task_id,
-                'offset': offset,
-                'size': size
-            }
+        context = {'task_id': task_id, 'method': 'get_task_data', 'offset': offset, 'size': size, 'pages': 0}
+        with _trace(self.tracer, EXPORT, context):
+            for response in self._iter_task_pages(task_id, size=size, offset=offset):
+                data_list += response['data'].get('dataList', [])
+                context['pages'] += 1
+            context['rows'] = len(data_list)
+        return data_list
 
-            data = _get_request(self._get_url(path),
-                                self._get_access_token(),
-                                params=params
-                                )
-            data_list += data['data'].get('dataList', [])
+    def get_task_data_rowset(self, task_id, size=1000, offset=0):
+        """
+        Fetch data for a task id & returns it as a compact RowSet.
+        Same as get_task_data() but the column names are stored once & each row
+        is a tuple, which takes a fraction of the memory of a list of dicts.
+        Pages are added as they arrive so the dicts of one page at a time are alive.
 
-            if data['data']['restTotal'] != 0:
-                offset = data['data']['offset']
-            else:
-                break
-        return data_list
+        :param task_id: octoparse task id
+        :param size: chunk size to be fetched in each request
+        :param offset: offset of data to be fetched from start
+        :return: RowSet
+        """
+
+        rows = RowSet()
+
+        if size > 1000:
+            size = 1000
 
-    def get_task_data_df(self, task_id):
+        for response in self._iter_task_pages(task_id, size=size, offset=offset):
+            rows.extend(response['data'].get('dataList', []))
+        return rows
+
+    def get_task_data_df(self, task_id, size=1000, columns=None, max_rows=None,
+                         downcast=False, categories=None, chunk_rows=100000):
         """
         Fetch data for a task id & returns it as pandas.DataFrame
         This will fetch all the data rows present for the task starting from offset
         till the end of data. It may be a blocking call. If you are interested in
         only a subset of data get_data_by_offset() may be better option.
 
+        The frame is built page by page, so peak memory stays close to the
+        size of the final DataFrame.
+
         :param task_id: octoparse task id
+        :param size: chunk size to be fetched in each request
+        :param columns: list of columns to keep (default all)
+        :param max_rows: stop after this many rows (default all)
+        :param downcast: downcast numeric columns to the smallest dtype
+        :param categories: list of (repetitive string) columns to store as categoricals
+        :param chunk_rows: pages are merged into chunks of about this many rows
         :return: pandas.DataFrame data
         """
 
-        data = self.get_task_data(task_id)
-        df = pd.DataFrame.from_dict(data)
+        if size > 1000:
+            size = 1000
+
+        chunks = []
+        pages = []
+        page_rows = 0
+        rows = 0
+        for data in self.get_task_data_generator(task_id, size=size):
+            if max_rows is not None:
+                data = data[:max_rows - rows]
+            if data:
+                pages.append(_page_to_df(data, columns, downcast, categories))
+                page_rows += len(data)
+                rows += len(data)
+            if page_rows >= chunk_rows:
+                chunks.append(_concat_frames(pages, categories))
+                pages = []
+                page_rows = 0
+            if max_rows is not None and rows >= max_rows:
+                break
+        if pages:
+            chunks.append(_concat_frames(pages, categories))
+
+        if not chunks:
+            import pandas as pd
+            return pd.DataFrame(columns=columns)
+        return _concat_frames(chunks, categories)
+
+    def get_task_data_arrow(self, task_id, size=1000, columns=None, max_rows=None):
+        """
+        Fetch data for a task id & returns it as pyarrow.Table
+        The rows of each page are appended straight into column arrays.
+        The schema is inferred from the pages: a column first seen on a later
+        page is added, a column whose type changes is widened (int -> float,
+        otherwise string, values json encoded) & the earlier pages are cast.
+        Requires pyarrow (pip install octoparse[arrow]).
+
+        :param task_id: octoparse task id
+        :param size: chunk size to be fetched in each request
+        :param columns: list of columns to keep (default all)
+        :param max_rows: stop after this many rows (default all)
+        :return: pyarrow.Table data
+        """
+        pa = _import_optional('pyarrow', 'arrow')
+
+        if size > 1000:
+            size = 1000
+
+        # columns without any value yet are typed null until a page has values
+        schema = pa.schema([(column, pa.null()) for column in columns or []])
+        batches = []
+        rows = 0
+        for data in self.get_task_data_generator(task_id, size=size):
+            if max_rows is not None:
+                data = data[:max_rows - rows]
+            if data:
+                page_schema = schema
+                if columns is None:
+                    names = set(schema.names)
+                    for key in dict.fromkeys(key for row in data for key in row):
+                        if key not in names:
+                            page_schema = page_schema.append(pa.field(key, pa.null()))
+                batch = _page_to_arrow(pa, data, page_schema, offset=rows, promote=True)
+                if batch.schema != schema:
+                    # a column appeared or was widened, the earlier pages are cast to the new schema
+                    schema = batch.schema
+                    batches = [_cast_arrow_batch(pa, earlier, schema) for earlier in batches]
+                batches.append(batch)
+                rows += len(data)
+            if max_rows is not None and rows >= max_rows:
+                break
+
+        # columns without any value are typed as string
+        schema = pa.schema([pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+                            for field in schema])
+        return pa.Table.from_batches([_cast_arrow_batch(pa, batch, schema) for batch in batches], schema=schema)
+
+    def get_task_data_polars(self, task_id, size=1000, columns=None, max_rows=None):
+        """
+        Fetch data for a task id & returns it as polars.DataFrame
+        Built on get_task_data_arrow(), the arrow columns are handed to polars without a copy.
+        Requires polars & pyarrow (pip install octoparse[polars]).
 
-        return df
+        :param task_id: octoparse task id
+        :param size: chunk size to be fetched in each request
+        :param columns: list of columns to keep (default all)
+        :param max_rows: stop after this many rows (default all)
+        :return: polars.DataFrame data
+        """
+        pl = _import_optional('polars', 'polars')
+        table = self.get_task_data_arrow(task_id, size=size, columns=columns, max_rows=max_rows)
+        return pl.from_arrow(table)
 
     def get_data_by_offset(self, task_id, size=1000, offset=0):
         """
@@ -306,26 +840,23 @@ class Octoparse:
         """
         data = list()
 
-        path = 'api/alldata/GetDataOfTaskByOffset'
-
         if size > 1000:
             size = 1000
 
-        params = {
-            'taskId': task_id,
-            'offset': offset,
-            'size': size
-        }
+        if self.page_cache is not None:
+            cached = self.page_cache.get(task_id, offset)
+            # the tail page may have grown since it was cached
+            if cached is not None and cached['size'] == size and cached['restTotal'] != 0:
+                return cached['dataList']
 
-        response = _get_request(self._get_url(path),
-                            self._get_access_token(),
-                            params=params
-                            )
+        response = self._get_task_page(task_id, size, offset)
         if 'data' in response:
             data = response['data'].get('dataList', [])
+            if self.page_cache is not None:
+                self.page_cache.put(task_id, offset, size, response['data'])
         return data
 
-    def get_task_data_generator(self, task_id, size=1000, offset=0):
+    def get_task_data_generator(self, task_id, size=1000, offset=0, prefetch=0, checkpoint=None):
         """
         Fetch data for a task id.
         This will fetch all the data rows present for the task starting from offset
@@ -334,34 +865,204 @@ class Octoparse:
         This method is only used to get data but will not affect the status of data.
         (Non-exported data will still remain as non-exported)
 
+        With prefetch > 0 the next pages are fetched in a background thread while
+        the caller is still processing the current one, so network time & processing
+        time overlap. At most prefetch pages are buffered.
+
+        With a checkpoint store, a page is confirmed when the caller asks for the
+        next one & the offset is saved. A later call resumes after the last confirmed
+        page (offset is then ignored), the checkpoint is deleted once all data is read.
+
         :param task_id: octoparse task id
         :param size: chunk size to be fetched in each request
         :param offset: offset of data to be fetched from start
+        :param prefetch: No. of pages to read ahead (0: no read-ahead)
+        :param checkpoint: optional CheckpointStore to resume from & save progress to
         :return: list of data dict
         """
-
-        offset = offset
+        rows = 0
+        if checkpoint is not None:
+            state = checkpoint.load(task_id)
+            if state is not None:
+                offset, rows = state['offset'], state['rows']
+
+        pages = self._iter_task_pages(task_id, size=size, offset=offset)
+        if prefetch > 0:
+            pages = _prefetch(pages, prefetch)
+        context = {'task_id': task_id, 'method': 'get_task_data_generator', 'offset': offset, 'size': size,
+                   'pages': 0, 'rows': 0, 'consumer_seconds': 0.0}
+        # the export span is only active while a page is fetched, not while the caller holds it
+        pages = _trace_iter(self.tracer, EXPORT, context, pages)
+        try:
+            for response in pages:
+                data = response['data'].get('dataList', [])
+                context['pages'] += 1
+                context['rows'] += len(data)
+                yielded = time.perf_counter()
+                yield data
+                context['consumer_seconds'] += time.perf_counter() - yielded
+                if checkpoint is not None:
+                    rows += len(data)
+                    checkpoint.save(task_id, response['data']['offset'], rows)
+        finally:
+            pages.close()
+        if checkpoint is not None:
+            checkpoint.delete(task_id)
+
+    def stream_task_rows(self, task_id, size=1000, offset=0):
+        """
+        Fetch data for a task id row by row.
+        Each page is parsed while it is being downloaded: rows are yielded as
+        soon as they are received, so neither the raw page nor the decoded
+        page is held in memory. The page cache isn't used.
+        This method is only used to get data but will not affect the status of data.
+        (Non-exported data will still remain as non-exported)
+        :param task_id: octoparse task id
+        :param size: rows to be fetched in each request (max: 1000)
+        :param offset: offset of data to be fetched from start
+        :return: data dict
+        """
+        if size > 1000:
+            size = 1000
 
         path = 'api/alldata/GetDataOfTaskByOffset'
-
         while True:
             params = {
                 'taskId': task_id,
                 'offset': offset,
                 'size': size
             }
+            res = self._request_response('GET', path, params=params, stream=True)
+            parser = DataListParser(res.iter_content(STREAM_CHUNK_SIZE), loads=self.json_loads)
+            try:
+                for row in parser:
+                    yield row
+            finally:
+                res.close()
+                self.metrics.observe_rows(path, parser.rows)
+
+            data = parser.envelope.get('data') if isinstance(parser.envelope, dict) else None
+            if not isinstance(data, dict):
+                raise APIError('GET {0} failed: {1}'.format(path, parser.envelope), status_code=res.status_code,
+                               response=res)
+            if data['restTotal'] == 0:
+                return
+            offset = data['offset']
+
+    def _iter_task_pages(self, task_id, size=1000, offset=0):
+        """
+        Generator of the raw GetDataOfTaskByOffset responses of a task,
+        following the returned offsets till the end of data.
+        With a page cache, cached pages are served from disk & only the rows
+        past the cached tail are downloaded.
+        :param task_id: octoparse task id
+        :param size: chunk size to be fetched in each request
+        :param offset: offset of data to be fetched from start
+        :return: response dict
+        """
+        if self.page_cache is not None:
+            self._refresh_cached_tail(task_id, size)
 
-            response = _get_request(self._get_url(path),
-                                self._get_access_token(),
-                                params=params
-                                )
-            yield response['data'].get('dataList', [])
+        while True:
+            with _trace(self.tracer, PAGE, {'task_id': task_id, 'offset': offset, 'size': size}) as context:
+                cached = None
+                if self.page_cache is not None:
+                    cached = self.page_cache.get(task_id, offset)
+                if cached is not None:
+                    response = {'data': cached}
+                else:
+                    response = self._get_task_page(task_id, size, offset)
+                    if self.page_cache is not None and 'data' in response:
+                        self.page_cache.put(task_id, offset, size, response['data'])
+                data = response.get('data')
+                if isinstance(data, dict):
+                    context.update(cached=cached is not None, rows=len(data.get('dataList', [])),
+                                   next_offset=data.get('offset'), rest_total=data.get('restTotal'))
+            yield response
 
             if response['data']['restTotal'] != 0:
                 offset = response['data']['offset']
             else:
                 return
 
+    def _get_task_page(self, task_id, size, offset):
+        """
+        Request a page of task data
+        :param task_id: octoparse task id
+        :param size: rows to be fetched
+        :param offset: offset of data to be fetched
+        :return: GetDataOfTaskByOffset response dict
+        """
+        path = 'api/alldata/GetDataOfTaskByOffset'
+
+        params = {
+            'taskId': task_id,
+            'offset': offset,
+            'size': size
+        }
+
+        return self._request('GET', path, params=params)
+
+    def _refresh_cached_tail(self, task_id, size):
+        """
+        Fetch the rows added after the cached tail of a task & link them to it.
+        If the task has less rows than when it was cached, its data was
+        cleared & the cached pages are dropped.
+        :param task_id: octoparse task id
+        :param size: chunk size to be fetched
+        """
+        cached = self.page_cache.tail(task_id)
+        if cached is None:
+            return
+        tail_offset, tail = cached
+        response = self._get_task_page(task_id, size, tail['offset'])
+        data = response.get('data')
+        if not data or data.get('total', 0) < tail['total']:
+            self.page_cache.invalidate(task_id)
+            return
+        rows = len(data.get('dataList', []))
+        if rows:
+            self.page_cache.put(task_id, tail['offset'], size, data)
+            self.page_cache.extend_tail(task_id, tail_offset, rows + data['restTotal'])
+
+    def export_tasks(self, task_ids, workers=4, size=1000, callback=None):
+        """
+        Fetch all the data of many tasks in parallel over a pool of threads.
+        Pages of a task are fetched in order, different tasks are fetched
+        concurrently sharing the token & the connection pool of this client
+        (keep pool_maxsize >= workers).
+        An error in one task doesn't stop the others, it is reported in its result.
+
+        :param task_ids: list of octoparse task ids
+        :param workers: number of tasks fetched at once
+        :param size: chunk size to be fetched in each request
+        :param callback: optional callable(task_id, data_list) called from the worker
+        threads with each page as it arrives. The pages are then not kept in the result.
+        :return: dict of task id -> {'data': list of data dict (None with callback),
+        'rows': No. of rows fetched, 'error': exception raised or None}
+        """
+
+        def export_task(task_id):
+            if callback is None:
+                data = self.get_task_data(task_id, size=size)
+                return data, len(data)
+            rows = 0
+            for data in self.get_task_data_generator(task_id, size=size):
+                callback(task_id, data)
+                rows += len(data)
+            return None, rows
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [(task_id, executor.submit(export_task, task_id)) for task_id in task_ids]
+            for task_id, future in futures:
+                try:
+                    data, rows = future.result()
+                    results[task_id] = {'data': data, 'rows': rows, 'error': None}
+                except Exception as e:
+                    results[task_id] = {'data': None, 'rows': 0, 'error': e}
+        return results
+
     def clear_task_data(self, task_id):
         """
         Clear data of a task
@@ -370,7 +1071,9 @@ class Octoparse:
         """
 
         path = 'api/task/removeDataByTaskId?taskId=' + task_id
-        response = _post_request(self._get_url(path), self._get_access_token())
+        response = self._request('POST', path)
+        if self.page_cache is not None:
+            self.page_cache.invalidate(task_id)
         return response
 
     def list_all_task_groups(self):
@@ -381,11 +1084,18 @@ class Octoparse:
 
         path = 'api/taskgroup'
 
+        if self.metadata_cache is not None:
+            found, task_groups = self.metadata_cache.get('list_all_task_groups')
+            if found:
+                return task_groups
+
         task_groups = list()
-        response = _get_request(self._get_url(path), self._get_access_token())
+        response = self._request('GET', path)
 
         if 'data' in response:
             task_groups = response['data']
+            if self.metadata_cache is not None:
+                self.metadata_cache.set('list_all_task_groups', value=task_groups)
         return task_groups
 
     def list_all_tasks_in_group(self, group_id):
@@ -401,11 +1111,18 @@ class Octoparse:
             'taskgroupId': group_id
         }
 
+        if self.metadata_cache is not None:
+            found, task_list = self.metadata_cache.get('list_all_tasks_in_group', group_id)
+            if found:
+                return task_list
+
         task_list = list()
-        response = _get_request(self._get_url(path), self._get_access_token(), params=params)
+        response = self._request('GET', path, params=params)
 
         if 'data' in response:
             task_list = response['data']
+            if self.metadata_cache is not None:
+                self.metadata_cache.set('list_all_tasks_in_group', group_id, value=task_list)
         return task_list
 
     def get_not_exported_data(self, task_id, size=1000):
@@ -428,7 +1145,7 @@ class Octoparse:
         }
 
         data = list()
-        response = _get_request(self._get_url(path), self._get_access_token(), params=params)
+        response = self._request('GET', path, params=params)
 
         if 'data' in response:
             data = response['data']
@@ -444,7 +1161,7 @@ class Octoparse:
         params = {
             'taskId': task_id
         }
-        response = _post_request(self._get_url(path), self._get_access_token(), params=params)
+        response = self._request('POST', path, params=params)
 
         return response
 
@@ -462,7 +1179,7 @@ class Octoparse:
             "taskIdList": task_id_list
         }
 
-        response = _post_request(self._get_url(path), self._get_access_token(), params=params)
+        response = self._request('POST', path, params=params)
 
         return response
 
@@ -479,13 +1196,20 @@ class Octoparse:
         """
         path = 'api/task/GetTaskRulePropertyByName'
 
+        if self.metadata_cache is not None:
+            found, response = self.metadata_cache.get('get_task_params', task_id, name)
+            if found:
+                return response
+
         params = {
             "taskId": task_id,
             'name': name
         }
 
-        response = _post_request(self._get_url(path), self._get_access_token(), params=params)
+        response = self._request('POST', path, params=params)
 
+        if self.metadata_cache is not None and 'data' in response:
+            self.metadata_cache.set('get_task_params', task_id, name, value=response)
         return response
 
     def update_task_param(self, task_id, name, value):
@@ -509,8 +1233,10 @@ class Octoparse:
             'value': value
         }
 
-        response = _post_request(self._get_url(path), self._get_access_token(), params=params)
+        response = self._request('POST', path, params=params)
 
+        if self.metadata_cache is not None:
+            self.metadata_cache.invalidate('get_task_params', task_id=task_id)
         return response
 
     def add_url_text_to_loop(self, task_id, name, value):
@@ -534,8 +1260,10 @@ class Octoparse:
             'value': value
         }
 
-        response = _post_request(self._get_url(path), self._get_access_token(), params=params)
+        response = self._request('POST', path, params=params)
 
+        if self.metadata_cache is not None:
+            self.metadata_cache.invalidate('get_task_params', task_id=task_id)
         return response
 
     def start_task(self, task_id):
@@ -553,7 +1281,7 @@ class Octoparse:
             "taskId": task_id
         }
 
-        response = _post_request(self._get_url(path), self._get_access_token(), params=params)
+        response = self._request('POST', path, params=params)
 
         return response
 
@@ -569,6 +1297,72 @@ class Octoparse:
             "taskId": task_id
         }
 
-        response = _post_request(self._get_url(path), self._get_access_token(), params=params)
+        response = self._request('POST', path, params=params)
 
         return response
+
+    def start_tasks(self, task_ids, workers=8, retries=3):
+        """
+        Start many tasks concurrently over a pool of threads.
+        Tasks answered with status 100 (other error) are retried with backoff.
+        :param task_ids: list of task ids
+        :param workers: number of tasks started at once
+        :param retries: max retries of a task answered with status 100
+        :return: dict of outcome ('started', 'running', 'misconfigured', 'denied', 'failed' or 'error')
+        -> dict of task id -> {'status': status code or None, 'attempts': No. of calls, 'error': exception or None}
+        """
+        def outcome(response):
+            status = response.get('data')
+            return START_TASK_OUTCOMES.get(status, 'failed'), status
+
+        return self._control_tasks(self.start_task, outcome, task_ids, workers, retries)
+
+    def stop_tasks(self, task_ids, workers=8, retries=3):
+        """
+        Stop many tasks concurrently over a pool of threads.
+        Tasks answered with status 100 (other error) are retried with backoff.
+        :param task_ids: list of task ids
+        :param workers: number of tasks stopped at once
+        :param retries: max retries of a task answered with status 100
+        :return: dict of outcome ('stopped', 'failed' or 'error')
+        -> dict of task id -> {'status': status code or None, 'attempts': No. of calls, 'error': exception or None}
+        """
+        def outcome(response):
+            status = response.get('data')
+            if response.get('error') == 'success' and status != RETRY_TASK_STATUS:
+                return 'stopped', status
+            return 'failed', status
+
+        return self._control_tasks(self.stop_task, outcome, task_ids, workers, retries)
+
+    def _control_tasks(self, control, outcome, task_ids, workers, retries):
+        """
+        Call start_task / stop_task for many tasks & group the results by outcome
+        :param control: bound method called with a task id
+        :param outcome: callable(response) -> (outcome, status code)
+        :param task_ids: list of task ids
+        :param workers: number of tasks controlled at once
+        :param retries: max retries of a task answered with status 100
+        :return: dict of outcome -> dict of task id -> result dict
+        """
+
+        def control_task(task_id):
+            attempt = 0
+            while True:
+                result, status = outcome(control(task_id))
+                if status != RETRY_TASK_STATUS or attempt >= retries:
+                    return result, status, attempt + 1
+                time.sleep(self.retry_policy.backoff(attempt))
+                attempt += 1
+
+        summary = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [(task_id, executor.submit(control_task, task_id)) for task_id in task_ids]
+            for task_id, future in futures:
+                try:
+                    result, status, attempts = future.result()
+                    summary.setdefault(result, {})[task_id] = {'status': status, 'attempts': attempts,
+                                                               'error': None}
+                except Exception as e:
+                    summary.setdefault('error', {})[task_id] = {'status': None, 'attempts': None, 'error': e}
+        return summary
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*- #
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter shared by threads (& clients).
+    Allows rate requests per second on average with bursts of up to burst requests.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        Initialize the limiter
+        :param rate: requests per second
+        :param burst: max requests sent at once (default: rate, at least 1)
+        """
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take a token, waiting till one is available
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits the No. of requests in flight with AIMD (additive increase,
+    multiplicative decrease): the limit grows by about one for every
+    `limit` successful responses & is cut by `decrease` when the api
+    throttles (429/5xx or a throttling payload).
+    Only one cut is made per round of requests in flight, so a burst
+    of throttled responses halves the limit once.
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=64, decrease=0.5):
+        """
+        Initialize the limiter
+        :param initial: initial limit
+        :param min_limit: lowest limit
+        :param max_limit: highest limit
+        :param decrease: factor applied to the limit when throttled
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease = decrease
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._sequence = 0
+        self._last_decrease = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self):
+        """
+        Current concurrency limit
+        """
+        return int(self._limit)
+
+    @property
+    def in_flight(self):
+        """
+        No. of requests in flight
+        """
+        return self._in_flight
+
+    def acquire(self):
+        """
+        Wait for a free slot
+        :return: ticket to hand back to release()
+        """
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+            self._sequence += 1
+            return self._sequence
+
+    def release(self, ticket, outcome='success'):
+        """
+        Free a slot & adapt the limit
+        :param ticket: value returned by acquire()
+        :param outcome: 'success', 'throttled' or 'error' (neither grows nor shrinks the limit)
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if outcome == 'success':
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            elif outcome == 'throttled' and ticket > self._last_decrease:
+                self._limit = max(self.min_limit, self._limit * self.decrease)
+                # requests already in flight were sent with the old limit
+                self._last_decrease = self._sequence
+            self._condition.notify_all()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*- #
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _retry_after(res):
+    """
+    Parse the Retry-After header of a response
+    :param res: response
+    :return: seconds to wait or None
+    """
+    value = res.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Retries of idempotent requests with exponential backoff & full jitter.
+    A retry budget shared by all the requests of the policy caps retries to
+    about budget_ratio of the requests, so an outage isn't made worse by retries.
+    """
+
+    def __init__(self, max_retries=3, backoff_base=0.5, backoff_max=30, jitter=True,
+                 budget=10, budget_ratio=0.2, retry_statuses=RETRY_STATUSES):
+        """
+        Initialize the policy
+        :param max_retries: max retries of a request
+        :param backoff_base: backoff of the first retry in seconds, doubled on each retry
+        :param backoff_max: max backoff in seconds
+        :param jitter: pick the backoff at random between 0 & its value
+        :param budget: max retries in the budget (also the initial budget)
+        :param budget_ratio: retries earned by each request
+        :param retry_statuses: http status codes worth retrying
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.budget = budget
+        self.budget_ratio = budget_ratio
+        self.retry_statuses = retry_statuses
+        self._tokens = float(budget)
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        """
+        Earn budget for a new request
+        """
+        with self._lock:
+            self._tokens = min(self.budget, self._tokens + self.budget_ratio)
+
+    def should_retry(self, attempt):
+        """
+        Check if a failed attempt can be retried & spend budget for it
+        :param attempt: No. of retries already made
+        :return: Boolean True or False
+        """
+        if attempt >= self.max_retries:
+            return False
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        Seconds to wait before a retry
+        :param attempt: No. of retries already made
+        :param retry_after: seconds asked by the server in Retry-After
+        :return: seconds
+        """
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of an endpoint. After failure_threshold consecutive
+    failures it opens & requests fail fast for reset_timeout seconds, then
+    a single trial request is let through (half open): its success closes
+    the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        """
+        Initialize the breaker
+        :param failure_threshold: consecutive failures opening the circuit
+        :param reset_timeout: seconds before a trial request once open
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = 'closed'
+        self._opened = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Check if a request can be sent
+        :return: Boolean True or False
+        """
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() >= self._opened + self.reset_timeout:
+                # let a single trial request through
+                self.state = 'half_open'
+                return True
+            return False
+
+    @property
+    def retry_in(self):
+        """
+        Seconds till the next trial request
+        """
+        return max(0.0, self._opened + self.reset_timeout - time.monotonic())
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = 'closed'
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self._opened = time.monotonic()
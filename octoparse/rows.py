@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*- #
+
+import sys
+
+
+class RowSet:
+    """
+    Compact in-memory result set: the column names are stored once
+    (interned) & each row is a tuple of values in column order, instead
+    of a dict repeating every key.
+    Rows missing a column hold None. New columns met while extending are
+    appended to the schema & the rows already stored are padded with None.
+
+    rows = RowSet.from_dicts(data_list)
+    rows[0], rows[-10:], len(rows), rows.column('title')
+    rows.to_dicts(), rows.to_df()
+    """
+
+    __slots__ = ('_columns', '_index', '_rows')
+
+    def __init__(self, columns=()):
+        """
+        Initialize an empty result set
+        :param columns: initial column names
+        """
+        self._columns = ()
+        self._index = {}
+        self._rows = []
+        self._add_columns(columns)
+
+    @classmethod
+    def from_dicts(cls, data_list, columns=()):
+        """
+        Build a result set from a list of data dict
+        :param data_list: list of data dict
+        :param columns: initial column names (fixes the order of the first columns)
+        :return: RowSet
+        """
+        rows = cls(columns)
+        rows.extend(data_list)
+        return rows
+
+    @property
+    def columns(self):
+        """
+        Tuple of the column names
+        """
+        return self._columns
+
+    def _add_columns(self, names):
+        """
+        Append new columns to the schema, padding the stored rows
+        :param names: column names, the ones already known are ignored
+        """
+        new = []
+        for name in names:
+            if name not in self._index:
+                name = sys.intern(name) if type(name) is str else name
+                self._index[name] = len(self._columns) + len(new)
+                new.append(name)
+        if not new:
+            return
+        self._columns += tuple(new)
+        if self._rows:
+            padding = (None,) * len(new)
+            self._rows = [row + padding for row in self._rows]
+
+    def append(self, data):
+        """
+        Add a row
+        :param data: data dict
+        """
+        index = self._index
+        values = [None] * len(self._columns)
+        try:
+            for key, value in data.items():
+                values[index[key]] = value
+        except KeyError:
+            self._add_columns(data)
+            values = [None] * len(self._columns)
+            for key, value in data.items():
+                values[index[key]] = value
+        self._rows.append(tuple(values))
+
+    def extend(self, data_list):
+        """
+        Add rows
+        :param data_list: list of data dict
+        """
+        for data in data_list:
+            self.append(data)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __getitem__(self, item):
+        """
+        Row tuple at an index, or a RowSet of a slice with the same columns
+        """
+        if isinstance(item, slice):
+            rows = RowSet()
+            # the column names are shared, the index is copied as the slice may get new columns
+            rows._columns = self._columns
+            rows._index = dict(self._index)
+            rows._rows = self._rows[item]
+            return rows
+        return self._rows[item]
+
+    def __repr__(self):
+        return '<RowSet {0} rows x {1} columns>'.format(len(self._rows), len(self._columns))
+
+    def column(self, name):
+        """
+        Values of a column
+        :param name: column name
+        :return: list of values
+        """
+        position = self._index[name]
+        return [row[position] for row in self._rows]
+
+    def get(self, index, name, default=None):
+        """
+        Value of a column in a row
+        :param index: row index
+        :param name: column name
+        :param default: returned if the column doesn't exist
+        :return: value
+        """
+        position = self._index.get(name)
+        if position is None:
+            return default
+        return self._rows[index][position]
+
+    def to_dict(self, index):
+        """
+        Row at an index as a data dict
+        :param index: row index
+        :return: data dict
+        """
+        return dict(zip(self._columns, self._rows[index]))
+
+    def to_dicts(self):
+        """
+        Rows as a list of data dict, as returned by get_task_data
+        :return: list of data dict
+        """
+        columns = self._columns
+        return [dict(zip(columns, row)) for row in self._rows]
+
+    def to_df(self):
+        """
+        Rows as a pandas DataFrame
+        :return: pandas.DataFrame
+        """
+        import pandas as pd
+        return pd.DataFrame.from_records(self._rows, columns=list(self._columns))
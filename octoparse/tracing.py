@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*- #
+
+import importlib
+import time
+from contextlib import contextmanager
+
+# names of the traced operations
+REQUEST = 'request'
+TOKEN = 'token'
+PAGE = 'page'
+EXPORT = 'export'
+
+
+class Tracer:
+    """
+    Hook points around the work of a client. start() is called when an
+    operation begins & end() when it is over, with the same context dict:
+    the client fills it in while the operation runs (e.g. status & bytes
+    of a request, rows of a page), so end() sees the final values.
+
+    Operations (name: context keys):
+    'export': task_id, method, offset, size then pages, rows, consumer_seconds
+    (time the caller spent between pages of a generator)
+    'page': task_id, offset, size, cached then rows, next_offset, rest_total
+    'token': grant ('password' or 'refresh_token')
+    'request': method, endpoint, attempt then status, bytes
+
+    Requests are nested in token refreshes & pages, pages in exports:
+    activate() is called while a span is the parent of the operations
+    started, e.g. only while a generator fetches its next page, not while
+    the caller holds the page.
+    Subclass it or use CallbackTracer.
+    """
+
+    def start(self, name, context):
+        """
+        An operation begins
+        :param name: 'export', 'page', 'token' or 'request'
+        :param context: dict describing the operation
+        :return: any value, handed to end()
+        """
+
+    def end(self, span, name, context, error=None):
+        """
+        An operation is over
+        :param span: value returned by start()
+        :param name: 'export', 'page', 'token' or 'request'
+        :param context: dict describing the operation
+        :param error: exception raised by the operation or None
+        """
+
+    def activate(self, span):
+        """
+        Make a span the parent of the operations started till deactivate()
+        :param span: value returned by start()
+        :return: any value, handed to deactivate()
+        """
+
+    def deactivate(self, token):
+        """
+        Restore the parent active before activate()
+        :param token: value returned by activate()
+        """
+
+
+class CallbackTracer(Tracer):
+    """
+    Tracer calling functions: on_start(name, context) & on_end(name, context, seconds, error)
+    """
+
+    def __init__(self, on_start=None, on_end=None, clock=None):
+        """
+        Initialize the tracer
+        :param on_start: optional callable(name, context)
+        :param on_end: optional callable(name, context, seconds, error)
+        :param clock: callable returning seconds (default: time.perf_counter)
+        """
+        self.on_start = on_start
+        self.on_end = on_end
+        self.clock = clock if clock is not None else time.perf_counter
+
+    def start(self, name, context):
+        if self.on_start is not None:
+            self.on_start(name, context)
+        return self.clock()
+
+    def end(self, span, name, context, error=None):
+        if self.on_end is not None:
+            self.on_end(name, context, self.clock() - span, error)
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Tracer recording the operations as OpenTelemetry spans named
+    octoparse.<name>, with the context as attributes.
+    Requires opentelemetry-api (pip install octoparse[otel]).
+    """
+
+    def __init__(self, tracer=None):
+        """
+        Initialize the tracer
+        :param tracer: opentelemetry Tracer (default: the global tracer provider's 'octoparse' tracer)
+        """
+        try:
+            self._trace = importlib.import_module('opentelemetry.trace')
+            self._context = importlib.import_module('opentelemetry.context')
+        except ImportError:
+            raise ImportError('OpenTelemetryTracer requires opentelemetry-api: pip install octoparse[otel]')
+        self.tracer = tracer if tracer is not None else self._trace.get_tracer('octoparse')
+
+    def start(self, name, context):
+        # child of the current span, it only becomes current when activated
+        return self.tracer.start_span('octoparse.' + name, attributes=_attributes(context))
+
+    def end(self, span, name, context, error=None):
+        span.set_attributes(_attributes(context))
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, str(error)))
+        span.end()
+
+    def activate(self, span):
+        return self._context.attach(self._trace.set_span_in_context(span))
+
+    def deactivate(self, token):
+        self._context.detach(token)
+
+
+def _attributes(context):
+    """
+    OpenTelemetry attributes of a context: None values are dropped, other types are stringified
+    """
+    return {'octoparse.' + key: value if isinstance(value, (bool, int, float, str)) else str(value)
+            for key, value in context.items() if value is not None}
+
+
+@contextmanager
+def _trace(tracer, name, context):
+    """
+    Trace an operation with a tracer (does nothing when tracer is None).
+    The span is active till the operation is over: don't yield from a
+    generator inside, use _trace_iter() instead.
+    :param tracer: Tracer or None
+    :param name: operation name
+    :param context: dict describing the operation, filled in while it runs
+    :return: context manager yielding context
+    """
+    if tracer is None:
+        yield context
+        return
+    span = tracer.start(name, context)
+    token = tracer.activate(span)
+    error = None
+    try:
+        yield context
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        tracer.deactivate(token)
+        tracer.end(span, name, context, error)
+
+
+def _trace_iter(tracer, name, context, iterable):
+    """
+    Trace an operation made of the items of an iterable, for generators:
+    the span is only active while the next item is produced, never while
+    the caller holds an item, so the context of the caller isn't changed.
+    The operation is over when the iterable is exhausted or the returned
+    generator is closed (the caller stopped early, not an error).
+    :param tracer: Tracer or None
+    :param name: operation name
+    :param context: dict describing the operation, filled in while it runs
+    :param iterable: iterable producing the items
+    :return: generator of the items
+    """
+    iterator = iter(iterable)
+    if tracer is None:
+        yield from iterator
+        return
+    span = tracer.start(name, context)
+    error = None
+    try:
+        while True:
+            token = tracer.activate(span)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                tracer.deactivate(token)
+            yield item
+    except GeneratorExit:
+        raise
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        tracer.end(span, name, context, error)
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*- #
+
+import json
+from urllib.parse import urlencode, urlparse, parse_qs
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 10
+# seconds to wait for a connection or for data before a requests.Timeout
+DEFAULT_TIMEOUT = 30
+
+
+def _create_session(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                    pool_block=False, keep_alive=True):
+    """
+    Create a requests.Session backed by a connection pool
+    :param pool_connections: number of per-host pools to keep
+    :param pool_maxsize: max connections kept alive per host
+    :param pool_block: block when the pool of a host is exhausted instead of opening extra connections
+    :param keep_alive: reuse connections between requests
+    :return: requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          pool_block=pool_block)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+class Transport:
+    """
+    Sends the http requests of a client.
+    request() returns a response with the requests.Response interface used by
+    the client: status_code, headers, content, json(), iter_content() & close().
+    Network errors are raised as requests.ConnectionError / requests.Timeout
+    whatever the backend, so retries work the same.
+    """
+
+    def request(self, method, url, headers=None, params=None, data=None, stream=False):
+        """
+        Send a request
+        :param method: 'GET' or 'POST'
+        :param url: absolute url
+        :param headers: dict of headers
+        :param params: URL Parameters
+        :param data: urlencoded str or dict body
+        :param stream: don't read the body yet, the response must then be closed
+        :return: response
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Release the connections
+        """
+
+
+class RequestsTransport(Transport):
+    """
+    Transport over a pooled requests.Session (HTTP/1.1)
+    """
+
+    def __init__(self, session=None, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 pool_block=False, keep_alive=True, timeout=DEFAULT_TIMEOUT):
+        """
+        Initialize the transport
+        :param session: an existing requests.Session to use (it won't be closed by close())
+        :param pool_connections: number of per-host connection pools to keep
+        :param pool_maxsize: max connections kept alive per host
+        :param pool_block: block when all connections to a host are busy
+        :param keep_alive: reuse connections between requests
+        :param timeout: request timeout in seconds (None: wait forever)
+        """
+        self.timeout = timeout
+        if session is None:
+            self.session = _create_session(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                           pool_block=pool_block, keep_alive=keep_alive)
+            self._owns_session = True
+        else:
+            self.session = session
+            self._owns_session = False
+
+    def request(self, method, url, headers=None, params=None, data=None, stream=False):
+        return self.session.request(method, url, headers=headers, params=params, data=data, stream=stream,
+                                    timeout=self.timeout)
+
+    def close(self):
+        if self._owns_session:
+            self.session.close()
+
+
+class _HttpxResponse:
+    """
+    requests.Response like view of a httpx.Response
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+
+    @property
+    def content(self):
+        return self._response.read()
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=None):
+        return self._response.iter_bytes(chunk_size)
+
+    def close(self):
+        self._response.close()
+
+
+class HttpxTransport(Transport):
+    """
+    Transport over a httpx.Client, with HTTP/2 by default: concurrent
+    requests of the threads sharing the client are multiplexed over a few
+    connections instead of one connection per request in flight.
+    Requires httpx (pip install octoparse[http2] for HTTP/2).
+    """
+
+    def __init__(self, client=None, http2=True, max_connections=DEFAULT_POOL_CONNECTIONS,
+                 max_keepalive_connections=DEFAULT_POOL_CONNECTIONS, timeout=DEFAULT_TIMEOUT):
+        """
+        Initialize the transport
+        :param client: an existing httpx.Client to use (it won't be closed by close())
+        :param http2: negotiate HTTP/2 (https only, needs the h2 package)
+        :param max_connections: max connections of the pool
+        :param max_keepalive_connections: max idle connections kept alive
+        :param timeout: request timeout in seconds
+        """
+        # imported here as it is slow to import & optional
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError('HttpxTransport requires httpx: pip install octoparse[http2]')
+        self._httpx = httpx
+        if client is None:
+            limits = httpx.Limits(max_connections=max_connections,
+                                  max_keepalive_connections=max_keepalive_connections)
+            self.client = httpx.Client(http2=http2, limits=limits, timeout=timeout)
+            self._owns_client = True
+        else:
+            self.client = client
+            self._owns_client = False
+
+    def request(self, method, url, headers=None, params=None, data=None, stream=False):
+        body = {'content': data} if isinstance(data, (str, bytes)) else {'data': data}
+        try:
+            request = self.client.build_request(method, url, headers=headers, params=params, **body)
+            return _HttpxResponse(self.client.send(request, stream=stream))
+        except self._httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except self._httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+    def close(self):
+        if self._owns_client:
+            self.client.close()
+
+
+class InProcessResponse:
+    """
+    requests.Response like response built in memory
+    """
+
+    def __init__(self, status_code, content=b'', headers=None):
+        """
+        :param status_code: http status
+        :param content: bytes, str or json serializable object
+        :param headers: dict of headers
+        """
+        if not isinstance(content, (bytes, str)):
+            content = json.dumps(content)
+        self.status_code = status_code
+        self.content = content.encode('utf-8') if isinstance(content, str) else content
+        self.headers = CaseInsensitiveDict(headers or {})
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=None):
+        chunk_size = chunk_size or len(self.content) or 1
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class InProcessTransport(Transport):
+    """
+    Transport calling a python handler instead of the network, for tests:
+    handler(method, path, query, body, headers) returns a tuple of
+    (status code, body as bytes / str / json serializable object, headers dict).
+    path is relative to the base url, query & body are dicts of lists of values.
+    """
+
+    def __init__(self, handler):
+        """
+        Initialize the transport
+        :param handler: callable(method, path, query, body, headers) -> (status, body, headers)
+        """
+        self.handler = handler
+        self.requests = []
+
+    def request(self, method, url, headers=None, params=None, data=None, stream=False):
+        parsed = urlparse(url)
+        query = parse_qs(parsed.query)
+        for key, value in parse_qs(urlencode(params or {}, doseq=True)).items():
+            query.setdefault(key, []).extend(value)
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        body = parse_qs(data if isinstance(data, str) else urlencode(data or {}, doseq=True))
+        self.requests.append((method, url))
+        status, content, response_headers = self.handler(method, parsed.path.lstrip('/'), query, body,
+                                                         CaseInsensitiveDict(headers or {}))
+        return InProcessResponse(status, content, response_headers)
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*- #
+
+import threading
+import time
+
+import requests
+
+from .exceptions import OctoparseError
+from .ratelimit import RateLimiter
+
+STARTED = 'started'
+FINISHED = 'finished'
+STALLED = 'stalled'
+ERROR = 'error'
+
+# getTaskStatusByIdList statuses (compared lower case)
+RUNNING_STATUSES = ('running',)
+FINISHED_STATUSES = ('completed', 'stopped', 'finished')
+
+
+class TaskWatcher:
+    """
+    Watches the state of many tasks at a fixed request rate & reports
+    when they start, finish or stall.
+
+    On the Advanced API the statuses are polled in batches with
+    get_task_status(). On the Standard API, which has no status, the
+    total row count of each task is polled (a 1 row data page): a task is
+    running while its total grows & finished once it didn't grow for
+    idle_timeout seconds.
+    A running task whose total didn't grow for stall_timeout seconds is
+    reported as stalled (on the Advanced API this costs a 1 row data page
+    per running task & poll).
+
+    Each task is polled on its own adaptive interval: it is reset to
+    min_interval when the task changes & doubled up to max_interval
+    while it doesn't.
+
+    Events are dicts: {'task_id', 'event', 'status', 'total', 'error'}
+    with event one of 'started', 'finished', 'stalled' or 'error'.
+    """
+
+    def __init__(self, octo, task_ids=(), advanced_api=None, min_interval=10, max_interval=300,
+                 batch_size=100, rate=1.0, stall_timeout=600, idle_timeout=120, on_event=None):
+        """
+        Initialize the watcher
+        :param octo: Octoparse client
+        :param task_ids: octoparse task ids to watch
+        :param advanced_api: poll statuses (Advanced API) or totals (default: as the client)
+        :param min_interval: shortest seconds between polls of a task
+        :param max_interval: longest seconds between polls of a task
+        :param batch_size: task ids per get_task_status call
+        :param rate: max requests per second sent by the watcher (None: unlimited)
+        :param stall_timeout: seconds without new rows after which a running task is stalled (None: disabled)
+        :param idle_timeout: seconds without new rows after which a task is finished (Standard API)
+        :param on_event: optional callable(event) called for every event
+        """
+        self.octo = octo
+        self.advanced_api = octo.advanced_api if advanced_api is None else advanced_api
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.batch_size = batch_size
+        self.stall_timeout = stall_timeout
+        self.idle_timeout = idle_timeout
+        self.on_event = on_event
+        self.rate_limiter = RateLimiter(rate) if rate else None
+        self._tasks = {}
+        self.add(task_ids)
+
+    def add(self, task_ids):
+        """
+        Start watching tasks (the ones already watched are ignored)
+        :param task_ids: octoparse task ids
+        """
+        now = time.monotonic()
+        for task_id in task_ids:
+            if task_id not in self._tasks:
+                self._tasks[task_id] = {'status': None, 'total': None, 'running': False, 'finished': False,
+                                        'stalled': False, 'changed': now, 'interval': self.min_interval,
+                                        'next_poll': now}
+
+    def remove(self, task_ids):
+        """
+        Stop watching tasks
+        :param task_ids: octoparse task ids
+        """
+        for task_id in task_ids:
+            self._tasks.pop(task_id, None)
+
+    def state(self, task_id):
+        """
+        Last known state of a task
+        :param task_id: octoparse task id
+        :return: dict ('status', 'total', 'running', 'finished', 'stalled')
+        """
+        state = self._tasks[task_id]
+        return {key: state[key] for key in ('status', 'total', 'running', 'finished', 'stalled')}
+
+    @property
+    def running(self):
+        """
+        List of the task ids known to be running
+        """
+        return [task_id for task_id, state in self._tasks.items() if state['running']]
+
+    @property
+    def finished(self):
+        """
+        Whether every watched task is finished
+        """
+        return all(state['finished'] for state in self._tasks.values())
+
+    def next_poll_in(self):
+        """
+        Seconds till a task is due
+        """
+        if not self._tasks:
+            return self.max_interval
+        next_poll = min(state['next_poll'] for state in self._tasks.values())
+        return max(0.0, next_poll - time.monotonic())
+
+    def _call(self, method, *args):
+        """
+        Call the client through the rate limiter of the watcher
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return method(*args)
+
+    def _get_total(self, task_id):
+        """
+        Total No. of rows of a task
+        """
+        response = self._call(self.octo._get_task_page, task_id, 1, 0)
+        return response.get('data', {}).get('total', 0)
+
+    @staticmethod
+    def _event(task_id, event, state, error=None):
+        return {'task_id': task_id, 'event': event, 'status': state['status'], 'total': state['total'],
+                'error': error}
+
+    def _update_total(self, task_id, state, total, now, events):
+        """
+        Record the total of a task, tracking growth & stalls
+        :return: whether the total grew
+        """
+        known = state['total'] is not None
+        grew = known and total > state['total']
+        state['total'] = total
+        if grew:
+            state['changed'] = now
+            state['stalled'] = False
+        elif (known and state['running'] and not state['stalled'] and self.stall_timeout is not None
+              and now - state['changed'] >= self.stall_timeout):
+            state['stalled'] = True
+            events.append(self._event(task_id, STALLED, state))
+        return grew
+
+    def _poll_statuses(self, task_ids, now, events):
+        """
+        Poll the statuses of tasks in batches (Advanced API)
+        :return: set of the task ids which changed
+        """
+        changed = set()
+        for start in range(0, len(task_ids), self.batch_size):
+            batch = task_ids[start:start + self.batch_size]
+            try:
+                response = self._call(self.octo.get_task_status, batch)
+            except (OctoparseError, requests.RequestException) as e:
+                events.extend(self._event(task_id, ERROR, self._tasks[task_id], e) for task_id in batch)
+                continue
+            for entry in response.get('data') or []:
+                state = self._tasks.get(entry.get('taskId'))
+                if state is None:
+                    continue
+                task_id = entry['taskId']
+                status = str(entry.get('status', '')).lower()
+                running = status in RUNNING_STATUSES
+                if status != state['status']:
+                    changed.add(task_id)
+                if running and not state['running']:
+                    state['changed'] = now
+                    state['stalled'] = False
+                    events.append(self._event(task_id, STARTED, dict(state, status=status)))
+                elif state['running'] and not running:
+                    events.append(self._event(task_id, FINISHED, dict(state, status=status)))
+                state['status'] = status
+                state['running'] = running
+                state['finished'] = status in FINISHED_STATUSES
+
+        if self.stall_timeout is not None:
+            for task_id in task_ids:
+                state = self._tasks[task_id]
+                if not state['running']:
+                    continue
+                try:
+                    if self._update_total(task_id, state, self._get_total(task_id), now, events):
+                        changed.add(task_id)
+                except (OctoparseError, requests.RequestException) as e:
+                    events.append(self._event(task_id, ERROR, state, e))
+        return changed
+
+    def _poll_totals(self, task_ids, now, events):
+        """
+        Poll the totals of tasks (Standard API)
+        :return: set of the task ids which changed
+        """
+        changed = set()
+        for task_id in task_ids:
+            state = self._tasks[task_id]
+            try:
+                total = self._get_total(task_id)
+            except (OctoparseError, requests.RequestException) as e:
+                events.append(self._event(task_id, ERROR, state, e))
+                continue
+            if self._update_total(task_id, state, total, now, events):
+                changed.add(task_id)
+                state['finished'] = False
+                if not state['running']:
+                    state['running'] = True
+                    events.append(self._event(task_id, STARTED, state))
+            elif now - state['changed'] >= self.idle_timeout and not state['finished']:
+                state['finished'] = True
+                if state['running']:
+                    state['running'] = False
+                    changed.add(task_id)
+                    events.append(self._event(task_id, FINISHED, state))
+        return changed
+
+    def poll(self):
+        """
+        Poll the tasks which are due
+        :return: list of events
+        """
+        now = time.monotonic()
+        due = [task_id for task_id, state in self._tasks.items() if state['next_poll'] <= now]
+        events = []
+        if due:
+            if self.advanced_api:
+                changed = self._poll_statuses(due, now, events)
+            else:
+                changed = self._poll_totals(due, now, events)
+            for task_id in due:
+                state = self._tasks[task_id]
+                if task_id in changed:
+                    state['interval'] = self.min_interval
+                else:
+                    state['interval'] = min(self.max_interval, state['interval'] * 2)
+                state['next_poll'] = now + state['interval']
+
+        if self.on_event is not None:
+            for event in events:
+                self.on_event(event)
+        return events
+
+    def watch(self, stop=None, until_finished=False):
+        """
+        Generator of events, polling the tasks as they are due
+        :param stop: optional threading.Event to stop watching
+        :param until_finished: return once every task is finished
+        :return: event dict
+        """
+        if stop is None:
+            stop = threading.Event()
+        while not stop.is_set():
+            for event in self.poll():
+                yield event
+            if until_finished and self.finished:
+                return
+            stop.wait(self.next_poll_in())
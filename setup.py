@@ -11,6 +11,16 @@ requires = [
     'python-dotenv>=0.15.0',
 ]
 
+extras = {
+    'async': ['httpx>=0.18.0'],
+    'arrow': ['pyarrow>=3.0.0'],
+    'polars': ['polars>=0.13.0', 'pyarrow>=3.0.0'],
+    'zstd': ['zstandard>=0.15.0'],
+    'fastjson': ['orjson>=3.0.0'],
+    'http2': ['httpx[http2]>=0.18.0'],
+    'otel': ['opentelemetry-api>=1.0.0'],
+}
+
 about = {}
 
 with open(os.path.join(here, 'octoparse', '__version__.py'), mode='r', encoding='utf-8') as f:
@@ -30,10 +40,11 @@ setuptools.setup(
     url=about['__url__'],
     packages=packages,
     install_requires=requires,
+    extras_require=extras,
+    python_requires='>=3.7',
     license=about['__license__'],
     classifiers=[
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
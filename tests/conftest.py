@@ -0,0 +1,15 @@
+import os
+
+import pytest
+
+from octoparse import TokenStore
+
+
+@pytest.fixture
+def credentials(monkeypatch, tmp_path):
+    """
+    Credentials in the environment & a token store in a temporary directory
+    """
+    monkeypatch.setenv('OCTOPARSE_USERNAME', 'user')
+    monkeypatch.setenv('OCTOPARSE_PASSWORD', 'pass')
+    return TokenStore(os.path.join(str(tmp_path), 'token.json'))
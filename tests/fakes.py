@@ -0,0 +1,137 @@
+import json
+import threading
+
+from octoparse import APIError, RetryPolicy
+
+
+class FakeOctoparse:
+    """
+    In-memory stand in for the client, its tasks are scripted by each test:
+
+    - pages: task id -> list of data pages, served as GetDataOfTaskByOffset
+      responses where the offset of a page is its index (fail_after: page No.
+      raising a ConnectionError)
+    - totals: task id -> total No. of rows reported by a data page
+    - batches: task id -> queue of not exported batches, the head batch is
+      removed by update_data_status
+    - statuses: task id -> status, start_tasks sets 'Running' & a running task
+      of polls completes after that many status polls (fail_status: status
+      requests raise APIError)
+    - start_statuses: task id -> startTask status (1 started, 2 running, 6 denied)
+    - loop_failures: call No. -> 'lost' (applied, then the call fails) or
+      'rejected', for the calls updating loop lists
+    """
+
+    def __init__(self, pages=None, fail_after=None, totals=None, batches=None, statuses=None, polls=None,
+                 start_statuses=None, loop_failures=None, advanced_api=False):
+        self.advanced_api = advanced_api
+        self.metadata_cache = None
+        self.retry_policy = RetryPolicy(backoff_base=0.001)
+        self.lock = threading.Lock()
+
+        self.pages = pages or {}
+        self.fail_after = fail_after
+        self.offsets = []
+        self.totals = totals or {}
+        self.page_calls = 0
+
+        self.batches = batches or {}
+        self.updates = []
+
+        self.statuses = statuses or {}
+        self.polls = dict(polls or {})
+        self.fail_status = False
+        self.status_calls = []
+        self.start_statuses = start_statuses or {}
+        self.running = set()
+        self.max_running = 0
+        self.stopped = []
+
+        self.loops = {}
+        self.loop_failures = loop_failures or {}
+        self.calls = []
+
+    # data pages
+
+    def _iter_task_pages(self, task_id, size=1000, offset=0):
+        pages = self.pages[task_id]
+        for number in range(offset, len(pages)):
+            if number == self.fail_after:
+                raise ConnectionError('connection lost')
+            self.offsets.append(number)
+            yield {'data': {'offset': number + 1, 'restTotal': len(pages) - number - 1,
+                            'dataList': pages[number]}}
+
+    def _get_task_page(self, task_id, size, offset):
+        self.page_calls += 1
+        return {'data': {'offset': 1, 'total': self.totals.get(task_id, 0), 'restTotal': 0, 'dataList': []}}
+
+    # not exported data
+
+    def get_not_exported_data(self, task_id, size=1000):
+        with self.lock:
+            pending = self.batches[task_id]
+            return {'total': 0, 'currentTotal': 0, 'dataList': pending[0] if pending else []}
+
+    def update_data_status(self, task_id):
+        with self.lock:
+            self.batches[task_id].pop(0)
+            self.updates.append(task_id)
+        return {'error': 'success'}
+
+    # task runs
+
+    def start_tasks(self, task_ids, workers=8, retries=3):
+        summary = {}
+        for task_id in task_ids:
+            status = self.start_statuses.get(task_id, 1)
+            outcome = {1: 'started', 2: 'running', 6: 'denied'}[status]
+            summary.setdefault(outcome, {})[task_id] = {'status': status, 'attempts': 1, 'error': None}
+            if outcome == 'started':
+                self.statuses[task_id] = 'Running'
+                self.running.add(task_id)
+        self.max_running = max(self.max_running, len(self.running))
+        return summary
+
+    def stop_task(self, task_id):
+        self.stopped.append(task_id)
+        self.statuses[task_id] = 'Stopped'
+        self.running.discard(task_id)
+        return {'error': 'success'}
+
+    def get_task_status(self, task_id_list):
+        self.status_calls.append(list(task_id_list))
+        if self.fail_status:
+            raise APIError('failed', status_code=503)
+        data = []
+        for task_id in task_id_list:
+            if self.statuses.get(task_id) == 'Running' and task_id in self.polls:
+                self.polls[task_id] -= 1
+                if self.polls[task_id] < 0:
+                    self.statuses[task_id] = 'Completed'
+                    self.running.discard(task_id)
+            data.append({'taskId': task_id, 'status': self.statuses.get(task_id, 'Ready')})
+        return {'data': data, 'error': 'success'}
+
+    # loop lists
+
+    def _apply(self, task_id, values, replace):
+        self.calls.append(len(values))
+        failure = self.loop_failures.get(len(self.calls))
+        if failure == 'rejected':
+            return {'error': 'failed'}
+        if replace:
+            self.loops[task_id] = []
+        self.loops.setdefault(task_id, []).extend(values)
+        if failure == 'lost':
+            raise APIError('connection reset', status_code=502)
+        return {'error': 'success'}
+
+    def update_task_param(self, task_id, name, value):
+        return self._apply(task_id, json.loads(value), True)
+
+    def add_url_text_to_loop(self, task_id, name, value):
+        return self._apply(task_id, json.loads(value), False)
+
+    def get_task_params(self, task_id, name):
+        return {'data': list(self.loops.get(task_id, [])), 'error': 'success'}
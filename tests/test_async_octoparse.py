@@ -0,0 +1,202 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from urllib.parse import parse_qs
+
+import pytest
+
+httpx = pytest.importorskip('httpx')
+
+from octoparse import AsyncOctoparse, APIError, TokenStore
+
+BASE_URL = 'https://dataapi.octoparse.com/'
+
+TOKEN_ENTITY = {'access_token': '656kdjfdkjf-SkjfdJFDlererrtrtpfP',
+                'token_type': 'bearer',
+                'expires_in': 99999,
+                'refresh_token': '343j656jh234jh343jhjh3j56jhjh45'
+                }
+
+
+class MockApi:
+    """
+    Minimal in-process Octoparse api for httpx.MockTransport
+    """
+
+    def __init__(self, pages=3, page_size=2):
+        self.pages = pages
+        self.page_size = page_size
+        self.token_requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request):
+        path = request.url.path
+        if path == '/token':
+            self.token_requests += 1
+            assert parse_qs(request.content.decode())['grant_type'] == ['password']
+            return httpx.Response(200, json=TOKEN_ENTITY)
+        assert request.headers['Authorization'] == 'bearer ' + TOKEN_ENTITY['access_token']
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if path == '/api/alldata/GetDataOfTaskByOffset':
+            task_id = request.url.params['taskId']
+            page = int(request.url.params['offset'])
+            rows = [{'task': task_id, 'row': page * self.page_size + i} for i in range(self.page_size)]
+            rest = (self.pages - page - 1) * self.page_size
+            return httpx.Response(200, json={'data': {'offset': page + 1, 'total': self.pages * self.page_size,
+                                                      'restTotal': rest, 'dataList': rows}})
+        if path == '/api/taskgroup':
+            return httpx.Response(200, json={'data': [{'taskGroupId': 1}]})
+        if path == '/api/task/startTask':
+            return httpx.Response(200, json={'data': 1, 'error': 'success'})
+        return httpx.Response(404, content=json.dumps({'error': 'not found'}))
+
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setenv("OCTOPARSE_USERNAME", 'myuser')
+    monkeypatch.setenv("OCTOPARSE_PASSWORD", 'mypass')
+    yield MockApi()
+    for path in ('octoparse_token.json', 'octoparse_token.json.lock'):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _client(api, **kwargs):
+    return AsyncOctoparse(client=httpx.AsyncClient(transport=httpx.MockTransport(api)), **kwargs)
+
+
+def test_get_task_data(api):
+    """
+    Test get_task_data follows the offsets till restTotal is 0
+    """
+    async def run():
+        async with _client(api) as octo:
+            return await octo.get_task_data('task-1')
+
+    data = asyncio.run(run())
+    assert [row['row'] for row in data] == list(range(6))
+
+
+def test_get_task_data_generator(api):
+    """
+    Test the async generator yields one page at a time
+    """
+    async def run():
+        async with _client(api) as octo:
+            return [page async for page in octo.get_task_data_generator('task-1')]
+
+    pages = asyncio.run(run())
+    assert len(pages) == 3
+    assert all(len(page) == 2 for page in pages)
+
+
+def test_get_tasks_data_shares_login(api):
+    """
+    Test many tasks are drained concurrently with a single login
+    """
+    task_ids = ['task-{}'.format(i) for i in range(10)]
+
+    async def run():
+        async with _client(api) as octo:
+            return await octo.get_tasks_data(task_ids)
+
+    results = asyncio.run(run())
+    assert api.token_requests == 1
+    assert api.max_in_flight > 1
+    assert sorted(results) == task_ids
+    assert all(len(rows) == 6 for rows in results.values())
+
+
+def test_token_shared_with_other_processes(api, tmp_path):
+    """
+    Test the token file lock is taken, a login of another process in progress is waited for & reused
+    """
+    store = TokenStore(str(tmp_path / 'token.json'))
+    locked = threading.Event()
+
+    def other_process():
+        with store.lock():
+            locked.set()
+            time.sleep(0.1)
+            store.save(dict(TOKEN_ENTITY, datetime=datetime.now()))
+
+    async def run():
+        async with _client(api, token_store=store) as octo:
+            ticks = 0
+            task = asyncio.ensure_future(octo.list_all_task_groups())
+            while not task.done():
+                # the event loop isn't blocked while waiting for the lock
+                ticks += 1
+                await asyncio.sleep(0.01)
+            return await task, ticks
+
+    thread = threading.Thread(target=other_process)
+    thread.start()
+    locked.wait()
+    groups, ticks = asyncio.run(run())
+    thread.join()
+    assert groups == [{'taskGroupId': 1}]
+    assert api.token_requests == 0
+    assert ticks > 3
+
+
+def test_max_concurrency(api):
+    """
+    Test max_concurrency bounds the requests in flight
+    """
+    async def run():
+        async with _client(api, max_concurrency=2) as octo:
+            return await octo.get_tasks_data(['task-{}'.format(i) for i in range(6)])
+
+    asyncio.run(run())
+    assert api.max_in_flight == 2
+
+
+def test_other_endpoints(api):
+    """
+    Test simple endpoints
+    """
+    async def run():
+        async with _client(api) as octo:
+            return await octo.list_all_task_groups(), await octo.start_task('task-1')
+
+    groups, status = asyncio.run(run())
+    assert groups == [{'taskGroupId': 1}]
+    assert status['data'] == 1
+
+
+def test_error_status(api):
+    """
+    Test an error status raises APIError instead of returning the error body
+    """
+    async def run():
+        async with _client(api) as octo:
+            await octo.clear_task_data('task-1')
+
+    with pytest.raises(APIError) as e:
+        asyncio.run(run())
+    assert e.value.status_code == 404
+    assert str(e.value) == 'POST api/task/removeDataByTaskId failed with status 404'
+
+
+def test_metrics_endpoint(api):
+    """
+    Test the query of a path isn't part of the metrics endpoint
+    """
+    async def run():
+        async with _client(api) as octo:
+            for task_id in ('task-1', 'task-2'):
+                with pytest.raises(APIError):
+                    await octo.clear_task_data(task_id)
+            return octo.metrics.snapshot()['endpoints']
+
+    endpoints = asyncio.run(run())
+    assert sorted(endpoints) == ['api/task/removeDataByTaskId', 'token']
+    assert endpoints['api/task/removeDataByTaskId']['requests'] == {404: 2}
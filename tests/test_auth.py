@@ -0,0 +1,139 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from octoparse import TokenManager, TokenStore, APIError
+
+TOKEN_ENTITY = {'access_token': '656kdjfdkjf-SkjfdJFDlererrtrtpfP',
+                'token_type': 'bearer',
+                'expires_in': 3600,
+                'refresh_token': '343j656jh234jh343jhjh3j56jhjh45'
+                }
+
+
+class FakeResponse:
+
+    def __init__(self, json_data, status_code=200):
+        self._json = json_data
+        self.status_code = status_code
+
+    def json(self):
+        return dict(self._json)
+
+
+class FakeTokenEndpoint:
+    """
+    Counts the token requests, slow enough for threads to race
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = []
+
+    def __call__(self, content):
+        self.requests.append(content.split('grant_type=')[1])
+        time.sleep(self.delay)
+        return FakeResponse(dict(TOKEN_ENTITY, access_token='token-{}'.format(len(self.requests))))
+
+
+def test_token_store(tmp_path):
+    """
+    Test the token entity survives a json round trip
+    """
+    store = TokenStore(str(tmp_path / 'token.json'))
+    assert store.load() is None
+    token_entity = dict(TOKEN_ENTITY, datetime=datetime.now())
+    store.save(token_entity)
+    assert store.load() == token_entity
+    with store.lock():
+        pass
+
+
+def test_single_flight(credentials, tmp_path):
+    """
+    Test concurrent threads share a single login
+    """
+    endpoint = FakeTokenEndpoint(delay=0.05)
+    manager = TokenManager(endpoint, store=TokenStore(str(tmp_path / 'token.json')))
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(manager.get_access_token())) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert endpoint.requests == ['password']
+    assert tokens == ['token-1'] * 16
+
+
+def test_proactive_refresh(credentials, tmp_path):
+    """
+    Test a token is refreshed before it expires
+    """
+    store = TokenStore(str(tmp_path / 'token.json'))
+    store.save(dict(TOKEN_ENTITY, datetime=datetime.now() - timedelta(seconds=3500)))
+    endpoint = FakeTokenEndpoint()
+    manager = TokenManager(endpoint, store=store, refresh_margin=300)
+    assert manager.get_access_token() == 'token-1'
+    assert endpoint.requests == ['refresh_token']
+    assert store.load()['access_token'] == 'token-1'
+
+
+def test_short_lived_token(credentials, tmp_path):
+    """
+    Test a token living less than the refresh margin isn't refreshed on every call
+    """
+    endpoint = FakeTokenEndpoint()
+
+    def request_token(content):
+        response = endpoint(content)
+        response._json['expires_in'] = 120
+        return response
+
+    manager = TokenManager(request_token, store=TokenStore(str(tmp_path / 'token.json')), refresh_margin=300)
+    assert [manager.get_access_token() for _ in range(20)] == ['token-1'] * 20
+    assert endpoint.requests == ['password']
+
+    # refreshed once past half its lifetime
+    manager.token_entity['datetime'] -= timedelta(seconds=61)
+    manager.store.save(manager.token_entity)
+    assert manager.get_access_token() == 'token-2'
+    assert endpoint.requests == ['password', 'refresh_token']
+
+
+def test_refresh_rejected(credentials, tmp_path):
+    """
+    Test a rejected refresh token falls back to a login
+    """
+    store = TokenStore(str(tmp_path / 'token.json'))
+    store.save(dict(TOKEN_ENTITY, datetime=datetime.now() - timedelta(seconds=3500)))
+    endpoint = FakeTokenEndpoint()
+
+    def request_token(content):
+        if 'grant_type=refresh_token' in content:
+            raise APIError('POST token failed with status 400', status_code=400)
+        return endpoint(content)
+
+    manager = TokenManager(request_token, store=store, refresh_margin=300)
+    assert manager.get_access_token() == 'token-1'
+    assert endpoint.requests == ['password']
+
+
+def test_reuse_token_from_disk(credentials, tmp_path):
+    """
+    Test a fresh token saved by another process is used without a round-trip
+    """
+    path = str(tmp_path / 'token.json')
+    endpoint = FakeTokenEndpoint()
+    manager = TokenManager(endpoint, store=TokenStore(path))
+    assert manager.get_access_token() == 'token-1'
+
+    other_endpoint = FakeTokenEndpoint()
+    other = TokenManager(other_endpoint, store=TokenStore(path))
+    assert other.get_access_token() == 'token-1'
+    assert other_endpoint.requests == []
+
+    # the first process refreshed while the token of the other is about to expire
+    other.token_entity['datetime'] -= timedelta(seconds=3500)
+    manager.refresh()
+    assert other.get_access_token() == 'token-2'
+    assert other_endpoint.requests == []
@@ -0,0 +1,81 @@
+import time
+
+from octoparse import PageCache, MetadataCache
+
+
+def _page(rows, next_offset, rest_total, total):
+    return {'offset': next_offset, 'restTotal': rest_total, 'total': total, 'dataList': rows}
+
+
+def test_page_cache(tmp_path):
+    """
+    Test pages are stored, looked up & invalidated per task
+    """
+    cache = PageCache(str(tmp_path / 'cache.sqlite'))
+    cache.put('task-1', 0, 2, _page([{'a': 1}, {'a': 2}], 2, 1, 3))
+    cache.put('task-1', 2, 2, _page([{'a': 3}], 3, 0, 3))
+    cache.put('task-2', 0, 2, _page([{'b': 1}], 1, 0, 1))
+
+    assert cache.get('task-1', 0)['dataList'] == [{'a': 1}, {'a': 2}]
+    assert cache.get('task-1', 1) is None
+    assert cache.tail('task-1') == (2, {'offset': 3, 'restTotal': 0, 'total': 3, 'size': 2,
+                                        'dataList': [{'a': 3}]})
+
+    cache.extend_tail('task-1', 2, 5)
+    assert cache.tail('task-1') is None
+
+    cache.invalidate('task-1')
+    assert cache.get('task-1', 0) is None
+    assert cache.get('task-2', 0) is not None
+    cache.close()
+
+
+def test_page_cache_eviction(tmp_path):
+    """
+    Test the least recently used pages are evicted over max_bytes
+    """
+    cache = PageCache(str(tmp_path / 'cache.sqlite'), max_bytes=10 ** 9)
+    rows = [{'text': str(i) * 50} for i in range(20)]
+    cache.put('task-1', 0, 20, _page(rows, 1, 1, 40))
+    page_bytes = cache.nbytes
+    cache.max_bytes = page_bytes * 2
+    cache.put('task-1', 1, 20, _page(rows, 2, 1, 40))
+    cache.get('task-1', 0)
+    cache.put('task-1', 2, 20, _page(rows, 3, 0, 40))
+    assert cache.get('task-1', 0) is not None
+    assert cache.get('task-1', 1) is None
+    assert cache.nbytes <= page_bytes * 2
+
+
+def test_metadata_cache_ttl_lru():
+    """
+    Test entries expire after the endpoint ttl & the least recently used are dropped
+    """
+    cache = MetadataCache(maxsize=2, ttls={'get_task_params': 0.05})
+    cache.set('list_all_tasks_in_group', 1, value=['a'])
+    cache.set('list_all_tasks_in_group', 2, value=['b'])
+    assert cache.get('list_all_tasks_in_group', 1) == (True, ['a'])
+    cache.set('list_all_tasks_in_group', 3, value=['c'])
+    assert cache.get('list_all_tasks_in_group', 2) == (False, None)
+    assert cache.get('list_all_tasks_in_group', 1) == (True, ['a'])
+
+    cache.set('get_task_params', 'task', 'loopAction1.UrlList', value={'data': []})
+    assert cache.get('get_task_params', 'task', 'loopAction1.UrlList')[0]
+    time.sleep(0.06)
+    assert cache.get('get_task_params', 'task', 'loopAction1.UrlList') == (False, None)
+
+
+def test_metadata_cache_invalidate():
+    """
+    Test invalidation by endpoint & task id
+    """
+    cache = MetadataCache()
+    cache.set('get_task_params', 'task-1', 'name', value=1)
+    cache.set('get_task_params', 'task-2', 'name', value=2)
+    cache.set('list_all_task_groups', value=[])
+    cache.invalidate('get_task_params', task_id='task-1')
+    assert not cache.get('get_task_params', 'task-1', 'name')[0]
+    assert cache.get('get_task_params', 'task-2', 'name')[0]
+    assert cache.get('list_all_task_groups')[0]
+    cache.invalidate()
+    assert not cache.get('list_all_task_groups')[0]
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from octoparse.decoder import DataListParser, get_loads, loads
+
+PAGE = {'data': {'offset': 3, 'total': 3, 'restTotal': 0,
+                 'dataList': [{'title': 'ünïcode ✓', 'price': 1.5}, {'title': 'b', 'price': 10}, {}]},
+        'error': 'success', 'error_Description': 'Action Success'}
+
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def test_loads_backends():
+    """
+    Test every available backend decodes the same
+    """
+    body = json.dumps(PAGE).encode('utf-8')
+    assert loads(body) == PAGE
+    assert get_loads('json')(body) == PAGE
+    with pytest.raises(ValueError):
+        get_loads('yaml')
+
+
+@pytest.mark.parametrize('size', [1, 2, 7, 1024])
+def test_data_list_parser(size):
+    """
+    Test rows are parsed incrementally whatever the chunk boundaries
+    (including multibyte characters split between chunks)
+    """
+    body = json.dumps(PAGE, ensure_ascii=False, indent=1).encode('utf-8')
+    parser = DataListParser(chunked(body, size))
+    assert list(parser) == PAGE['data']['dataList']
+    assert parser.rows == 3
+    assert parser.envelope == dict(PAGE, data=dict(PAGE['data'], dataList=[]))
+
+
+def test_data_list_parser_numbers():
+    """
+    Test a row cut at the end of a chunk isn't yielded early
+    """
+    parser = DataListParser([b'{"data": {"dataList": [12', b'34, 5', b'6]}}'])
+    assert list(parser) == [1234, 56]
+
+
+def test_data_list_parser_error_payload():
+    """
+    Test a response without dataList is decoded as a whole
+    """
+    parser = DataListParser(chunked(b'{"error": "Unauthorized", "error_Description": "bad token"}', 5))
+    assert list(parser) == []
+    assert parser.envelope['error'] == 'Unauthorized'
+
+
+def test_data_list_parser_truncated():
+    """
+    Test a truncated body raises
+    """
+    body = json.dumps(PAGE).encode('utf-8')
+    with pytest.raises(ValueError):
+        list(DataListParser(chunked(body[:60], 8)))
@@ -0,0 +1,67 @@
+import threading
+
+from octoparse import drain_not_exported
+from tests.fakes import FakeOctoparse
+
+
+def test_drain_not_exported():
+    """
+    Test every batch reaches the sink before its status is updated
+    """
+    octo = FakeOctoparse(batches={'task-1': [[{'row': 1}, {'row': 2}], [{'row': 3}]],
+                                  'task-2': [[{'row': 4}]],
+                                  'task-3': []})
+    received = []
+
+    def sink(task_id, data):
+        # the batch is still pending while the sink handles it
+        assert octo.batches[task_id][0] == data
+        received.append((task_id, data))
+        return True
+
+    progress = []
+    stats = drain_not_exported(octo, ['task-1', 'task-2', 'task-3'], sink, workers=2,
+                               on_progress=lambda task_id, s: progress.append((task_id, s['rows'])))
+    assert sorted(octo.updates) == ['task-1', 'task-1', 'task-2']
+    assert len(received) == 3
+    assert (stats['task-1']['rows'], stats['task-1']['batches']) == (3, 2)
+    assert stats['task-2']['rows'] == 1
+    assert stats['task-3']['rows'] == 0
+    assert all(s['error'] is None and s['rows_per_second'] >= 0 for s in stats.values())
+    assert ('task-1', 3) in progress
+
+
+def test_drain_sink_failure():
+    """
+    Test an unconfirmed batch isn't marked exported & other tasks carry on
+    """
+    octo = FakeOctoparse(batches={'task-1': [[{'row': 1}]], 'task-2': [[{'row': 2}]]})
+
+    def sink(task_id, data):
+        if task_id == 'task-1':
+            raise IOError('disk full')
+        return True
+
+    stats = drain_not_exported(octo, ['task-1', 'task-2'], sink)
+    assert octo.updates == ['task-2']
+    assert isinstance(stats['task-1']['error'], IOError)
+    assert octo.batches['task-1'] == [[{'row': 1}]]
+
+    stats = drain_not_exported(octo, ['task-1'], lambda task_id, data: False)
+    assert isinstance(stats['task-1']['error'], RuntimeError)
+    assert octo.batches['task-1'] == [[{'row': 1}]]
+
+
+def test_drain_follow():
+    """
+    Test follow mode keeps polling till stopped
+    """
+    octo = FakeOctoparse(batches={'task-1': [[{'row': 1}]]})
+    stop = threading.Event()
+
+    def sink(task_id, data):
+        stop.set()
+        return True
+
+    stats = drain_not_exported(octo, ['task-1'], sink, follow=True, poll_interval=0.01, stop=stop)
+    assert stats['task-1']['rows'] == 1
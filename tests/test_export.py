@@ -0,0 +1,192 @@
+import csv
+import gzip
+import io
+import json
+import os
+
+import pytest
+
+from octoparse import export_task_data, CheckpointStore
+from tests.fakes import FakeOctoparse
+
+PAGES = [[{"state": "Texas", "city": "Plano"}, {"state": "Texas", "city": "Houston"}],
+         [{"state": "Texas", "city": "Austin"}, {"state": "Ohio", "city": "Akron"}],
+         [{"state": "Iowa", "city": "Ames"}]]
+ROWS = [row for page in PAGES for row in page]
+
+
+def test_export_ndjson(tmp_path):
+    """
+    Test ndjson export with & without gzip
+    """
+    path = str(tmp_path / 'data.ndjson')
+    result = export_task_data(FakeOctoparse(pages={'task': PAGES}), 'task', path)
+    assert result == {'rows': 5, 'files': [path]}
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == ROWS
+
+    path = str(tmp_path / 'data.ndjson.gz')
+    export_task_data(FakeOctoparse(pages={'task': PAGES}), 'task', path, compression='gzip')
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == ROWS
+
+
+def test_export_zstd(tmp_path):
+    """
+    Test zstd compressed export
+    """
+    zstandard = pytest.importorskip('zstandard')
+    path = str(tmp_path / 'data.ndjson.zst')
+    export_task_data(FakeOctoparse(pages={'task': PAGES}), 'task', path, compression='zstd')
+    with open(path, 'rb') as f:
+        reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+        lines = io.TextIOWrapper(reader, encoding='utf-8').read().splitlines()
+    assert [json.loads(line) for line in lines] == ROWS
+
+
+def test_export_csv_rollover(tmp_path):
+    """
+    Test csv export rolls over to a new file with its own header
+    """
+    path = str(tmp_path / 'data.csv')
+    result = export_task_data(FakeOctoparse(pages={'task': PAGES}), 'task', path, file_format='csv', max_file_size=1)
+    assert result['files'] == [str(tmp_path / 'data-0000{}.csv'.format(part)) for part in range(3)]
+    rows = []
+    for name in result['files']:
+        with open(name, newline='', encoding='utf-8') as f:
+            rows += list(csv.DictReader(f))
+    assert rows == ROWS
+    assert not os.path.exists(path)
+
+
+def test_export_parquet(tmp_path):
+    """
+    Test parquet export writes one row group per page
+    """
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'data.parquet')
+    export_task_data(FakeOctoparse(pages={'task': PAGES}), 'task', path, file_format='parquet')
+    parquet_file = pq.ParquetFile(path)
+    assert parquet_file.num_row_groups == 3
+    assert parquet_file.read().to_pylist() == ROWS
+
+
+@pytest.mark.parametrize('file_format', ['csv', 'parquet'])
+def test_export_column_drift(tmp_path, file_format):
+    """
+    Test a column first appearing on a later page isn't silently dropped
+    """
+    if file_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    pages = [PAGES[0], [{"state": "Ohio", "city": "Akron"}, {"state": "Iowa", "city": "Ames", "zip": 50010}]]
+    path = str(tmp_path / ('data.' + file_format))
+    with pytest.raises(ValueError, match="'zip' at offset 3"):
+        export_task_data(FakeOctoparse(pages={'task': pages}), 'task', path, file_format=file_format)
+
+    result = export_task_data(FakeOctoparse(pages={'task': pages}), 'task', path, file_format=file_format, columns=['city', 'zip'])
+    assert result['rows'] == 4
+    if file_format == 'csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            assert list(csv.DictReader(f))[-1] == {'city': 'Ames', 'zip': '50010'}
+
+
+@pytest.mark.parametrize('file_format', ['ndjson', 'csv', 'parquet'])
+def test_export_columns(tmp_path, file_format):
+    """
+    Test only the chosen columns are written, in every format
+    """
+    if file_format == 'parquet':
+        pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / ('data.' + file_format))
+    export_task_data(FakeOctoparse(pages={'task': PAGES}), 'task', path, file_format=file_format, columns=['city'])
+    if file_format == 'ndjson':
+        with open(path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+    elif file_format == 'csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        rows = pq.read_table(path).to_pylist()
+    assert rows == [{'city': row['city']} for row in ROWS]
+
+
+def test_export_parquet_type_drift(tmp_path):
+    """
+    Test a parquet column whose type changes is written as string or raises naming the column
+    """
+    pq = pytest.importorskip('pyarrow.parquet')
+    pages = [[{"city": "Plano", "zip": None, "price": 1}], [{"city": "Akron", "zip": 44301, "price": 1}]]
+    path = str(tmp_path / 'data.parquet')
+    export_task_data(FakeOctoparse(pages={'task': pages}), 'task', path, file_format='parquet')
+    assert pq.read_table(path).column('zip').to_pylist() == [None, '44301']
+
+    pages.append([{"city": "Ames", "zip": None, "price": 2.5}])
+    with pytest.raises(ValueError, match="'price' at offset 2"):
+        export_task_data(FakeOctoparse(pages={'task': pages}), 'task', path, file_format='parquet')
+
+
+def test_export_failure_leaves_no_file(tmp_path):
+    """
+    Test a failed export doesn't leave a file that looks complete
+    """
+    path = str(tmp_path / 'data.ndjson')
+    with pytest.raises(ConnectionError):
+        export_task_data(FakeOctoparse(pages={'task': PAGES}, fail_after=2), 'task', path)
+    assert os.listdir(str(tmp_path)) == []
+
+
+@pytest.mark.parametrize('file_format,compression,max_file_size', [
+    ('ndjson', None, None),
+    ('ndjson', 'gzip', None),
+    ('csv', None, 1),
+    ('parquet', None, 1),
+])
+def test_export_resume(tmp_path, file_format, compression, max_file_size):
+    """
+    Test an interrupted export resumes from its checkpoint & only fetches the tail
+    """
+    if file_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    checkpoint = CheckpointStore(str(tmp_path / 'checkpoints'))
+    path = str(tmp_path / 'data.{}'.format(file_format))
+    with pytest.raises(ConnectionError):
+        export_task_data(FakeOctoparse(pages={'task': PAGES}, fail_after=2), 'task', path, file_format=file_format,
+                         compression=compression, max_file_size=max_file_size, checkpoint=checkpoint)
+    assert checkpoint.load('task')['rows'] == 4
+
+    octo = FakeOctoparse(pages={'task': PAGES})
+    result = export_task_data(octo, 'task', path, file_format=file_format, compression=compression,
+                              max_file_size=max_file_size, checkpoint=checkpoint)
+    assert octo.offsets == [2]
+    assert result['rows'] == 5
+    assert checkpoint.load('task') is None
+
+    rows = []
+    for name in result['files']:
+        if file_format == 'parquet':
+            import pyarrow.parquet as pq
+            rows += pq.read_table(name).to_pylist()
+        elif file_format == 'csv':
+            with open(name, newline='', encoding='utf-8') as f:
+                rows += list(csv.DictReader(f))
+        else:
+            opener = gzip.open if compression == 'gzip' else open
+            with opener(name, 'rt', encoding='utf-8') as f:
+                rows += [json.loads(line) for line in f]
+    assert rows == ROWS
+    assert not [name for name in os.listdir(str(tmp_path)) if name.endswith('.tmp')]
+
+
+def test_checkpoint_store(tmp_path):
+    """
+    Test checkpoints are saved & deleted per task
+    """
+    checkpoint = CheckpointStore(str(tmp_path))
+    assert checkpoint.load('task/1') is None
+    checkpoint.save('task/1', offset=20, rows=10, path='data.csv')
+    checkpoint.save('task-2', offset=5, rows=5)
+    state = checkpoint.load('task/1')
+    assert (state['offset'], state['rows'], state['path']) == (20, 10, 'data.csv')
+    checkpoint.delete('task/1')
+    assert checkpoint.load('task/1') is None
+    assert checkpoint.load('task-2')['offset'] == 5
@@ -0,0 +1,63 @@
+from octoparse import harvest_tasks
+from tests.fakes import FakeOctoparse
+
+
+def _batches(rows):
+    """
+    Not exported rows served in batches of 2
+    """
+    return [[{'row': i} for i in range(start, min(start + 2, rows))] for start in range(0, rows, 2)]
+
+
+def test_harvest_tasks():
+    """
+    Test tasks are started within the running cap & harvested as they finish
+    """
+    task_ids = ['task-{}'.format(i) for i in range(6)]
+    octo = FakeOctoparse(polls={task_id: i % 3 + 1 for i, task_id in enumerate(task_ids)},
+                         batches={task_id: _batches(i + 1) for i, task_id in enumerate(task_ids)},
+                         start_statuses={'task-5': 6}, advanced_api=True)
+    received = {}
+    stages = []
+
+    def sink(task_id, data):
+        received[task_id] = received.get(task_id, 0) + len(data)
+        return True
+
+    results = harvest_tasks(octo, task_ids, sink, max_running=2, min_interval=0, status_rate=None,
+                            on_progress=lambda task_id, result: stages.append((task_id, result['stage'])))
+
+    assert octo.max_running <= 2
+    assert received == {task_id: i + 1 for i, task_id in enumerate(task_ids[:5])}
+    for task_id in task_ids[:5]:
+        assert results[task_id]['stage'] == 'done'
+        assert results[task_id]['start'] == 'started'
+        assert results[task_id]['harvest']['rows'] == received[task_id]
+    assert results['task-5']['stage'] == 'failed'
+    assert results['task-5']['start'] == 'denied'
+    assert [stage for task_id, stage in stages if task_id == 'task-0'] == ['starting', 'running', 'harvesting',
+                                                                           'done']
+
+
+def test_harvest_tasks_run_timeout():
+    """
+    Test a task running too long is stopped & harvested
+    """
+    octo = FakeOctoparse(polls={'task-1': 10 ** 9}, batches={'task-1': _batches(3)}, advanced_api=True)
+    results = harvest_tasks(octo, ['task-1'], lambda task_id, data: True, min_interval=0, status_rate=None,
+                            run_timeout=0.05)
+    assert octo.stopped == ['task-1']
+    assert results['task-1']['timed_out'] == 'run'
+    assert results['task-1']['stage'] == 'done'
+    assert results['task-1']['harvest']['rows'] == 3
+
+
+def test_harvest_tasks_start_grace():
+    """
+    Test a task completed before it was seen running is harvested after start_grace
+    """
+    octo = FakeOctoparse(polls={'task-1': 0}, batches={'task-1': _batches(1)}, advanced_api=True)
+    results = harvest_tasks(octo, ['task-1'], lambda task_id, data: True, min_interval=0, status_rate=None,
+                            start_grace=0.05)
+    assert results['task-1']['stage'] == 'done'
+    assert results['task-1']['run_seconds'] >= 0.05
@@ -0,0 +1,71 @@
+import pytest
+
+from octoparse import load_loop_values, load_loops
+from octoparse.loop import _batch_values
+from tests.fakes import FakeOctoparse
+
+
+URLS = ['https://example.com/item/{}'.format(i) for i in range(25)]
+
+
+def test_batch_values():
+    """
+    Test batches are limited in items & encoded size
+    """
+    assert [len(batch) for batch in _batch_values(URLS, 10, 10000)] == [10, 10, 5]
+    batches = _batch_values(URLS, 1000, 200)
+    assert sum(batches, []) == URLS
+    assert all(len(batch) < 10 for batch in batches)
+    with pytest.raises(ValueError):
+        _batch_values(['x' * 300], 10, 200)
+
+
+def test_load_loop_values():
+    """
+    Test the values are loaded in order & verified
+    """
+    octo = FakeOctoparse()
+    octo.loops['task-1'] = ['old']
+    report = load_loop_values(octo, 'task-1', 'loopAction1.UrlList', URLS, batch_size=10)
+    assert octo.loops['task-1'] == URLS
+    assert report['loaded'] == 25 and report['count'] == 25 and report['verified']
+    assert [batch['size'] for batch in report['batches']] == [10, 10, 5]
+    assert report['error'] is None
+
+    report = load_loop_values(octo, 'task-1', 'loopAction1.UrlList', ['extra'], replace=False)
+    assert octo.loops['task-1'] == URLS + ['extra']
+    assert report['count'] == 26 and report['verified']
+
+
+def test_load_loop_values_retries():
+    """
+    Test a rejected batch is retried & a batch applied despite an error isn't sent twice
+    """
+    octo = FakeOctoparse(loop_failures={2: 'lost', 3: 'rejected'})
+    report = load_loop_values(octo, 'task-1', 'loopAction1.UrlList', URLS, batch_size=10)
+    assert octo.loops['task-1'] == URLS
+    assert octo.calls == [10, 10, 5, 5]
+    assert [batch['attempts'] for batch in report['batches']] == [1, 1, 2]
+    assert report['verified']
+
+
+def test_load_loop_values_failure():
+    """
+    Test loading stops at a batch failing after retries
+    """
+    octo = FakeOctoparse(loop_failures={2: 'rejected', 3: 'rejected'})
+    report = load_loop_values(octo, 'task-1', 'loopAction1.UrlList', URLS, batch_size=10, retries=1)
+    assert octo.loops['task-1'] == URLS[:10]
+    assert report['loaded'] == 10 and report['count'] == 10 and report['verified']
+    assert len(report['batches']) == 2
+    assert report['error'] is not None
+
+
+def test_load_loops():
+    """
+    Test many tasks are loaded
+    """
+    octo = FakeOctoparse()
+    reports = load_loops(octo, {'task-1': URLS, 'task-2': URLS[:3]}, 'loopAction1.UrlList', batch_size=10)
+    assert octo.loops == {'task-1': URLS, 'task-2': URLS[:3]}
+    assert all(report['verified'] for report in reports.values())
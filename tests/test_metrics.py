@@ -0,0 +1,90 @@
+import pytest
+
+from benchmarks.mock_server import MockOctoparseServer
+from octoparse import Octoparse, RetryPolicy, APIError, InProcessTransport, Metrics
+
+BASE_URL = 'http://api.test/'
+
+
+def test_histogram():
+    """
+    Test latencies fall in their buckets
+    """
+    metrics = Metrics(buckets=(0.1, 1))
+    metrics.observe_request('api/task', 200, 0.05, 10)
+    metrics.observe_request('api/task', 200, 0.1, 10)
+    metrics.observe_request('api/task', 503, 5, 0)
+    metrics.observe_rows('api/task', 3)
+    metrics.observe_retry('api/task')
+    metrics.observe_token('password')
+    snapshot = metrics.snapshot()
+    stats = snapshot['endpoints']['api/task']
+    assert stats['requests'] == {200: 2, 503: 1}
+    assert stats['latency']['buckets'] == [(0.1, 2), (1.0, 2), (float('inf'), 3)]
+    assert stats['latency']['count'] == 3
+    assert stats['latency']['sum'] == pytest.approx(5.15)
+    assert (stats['bytes'], stats['rows'], stats['retries']) == (20, 3, 1)
+    assert snapshot['token_requests'] == {'password': 1}
+    metrics.reset()
+    assert metrics.snapshot() == {'endpoints': {}, 'token_requests': {}}
+
+
+def test_exposition():
+    """
+    Test the OpenMetrics & Prometheus text formats
+    """
+    metrics = Metrics(buckets=(0.5,))
+    metrics.observe_request('api/task', 200, 0.25, 100)
+    metrics.observe_request('api/task', 'error', 1.0)
+    metrics.observe_token('refresh_token')
+    text = metrics.to_openmetrics()
+    lines = text.splitlines()
+    assert lines[-1] == '# EOF'
+    assert '# TYPE octoparse_requests counter' in lines
+    assert 'octoparse_requests_total{endpoint="api/task",status="200"} 1' in lines
+    assert 'octoparse_requests_total{endpoint="api/task",status="error"} 1' in lines
+    assert '# TYPE octoparse_request_duration_seconds histogram' in lines
+    assert 'octoparse_request_duration_seconds_bucket{endpoint="api/task",le="0.5"} 1' in lines
+    assert 'octoparse_request_duration_seconds_bucket{endpoint="api/task",le="+Inf"} 2' in lines
+    assert 'octoparse_request_duration_seconds_sum{endpoint="api/task"} 1.25' in lines
+    assert 'octoparse_response_bytes_total{endpoint="api/task"} 100' in lines
+    assert 'octoparse_token_requests_total{grant="refresh_token"} 1' in lines
+
+    prometheus = metrics.to_prometheus().splitlines()
+    assert '# TYPE octoparse_requests_total counter' in prometheus
+    assert '# EOF' not in prometheus
+
+
+def test_client_metrics(credentials):
+    """
+    Test the client records its api calls
+    """
+    server = MockOctoparseServer(tasks=['task-1'], rows=2500, columns=3)
+    metrics = Metrics()
+    octo = Octoparse(base_url=BASE_URL, token_store=credentials, transport=InProcessTransport(server.handle),
+                     metrics=metrics)
+    assert len(octo.get_task_data('task-1')) == 2500
+    assert len(list(octo.stream_task_rows('task-1', size=1000))) == 2500
+
+    snapshot = metrics.snapshot()
+    assert snapshot['token_requests'] == {'password': 1}
+    assert snapshot['endpoints']['token']['requests'] == {200: 1}
+    stats = snapshot['endpoints']['api/alldata/GetDataOfTaskByOffset']
+    assert stats['requests'] == {200: 6}
+    assert stats['rows'] == 5000
+    assert stats['latency']['count'] == 6
+    assert stats['bytes'] > 2 * 2500 * 3 * 20
+
+
+def test_client_retries(credentials):
+    """
+    Test retries & failed requests are recorded
+    """
+    server = MockOctoparseServer(tasks=['task-1'], error_rate=1.0)
+    octo = Octoparse(base_url=BASE_URL, token_store=credentials, transport=InProcessTransport(server.handle),
+                     retry_policy=RetryPolicy(max_retries=2, backoff_base=0))
+    with pytest.raises(APIError):
+        octo.list_all_task_groups()
+    stats = octo.metrics.snapshot()['endpoints']['api/taskgroup']
+    assert stats['requests'] == {503: 3}
+    assert stats['retries'] == 2
@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+
+from benchmarks.mock_server import MockOctoparseServer
+from benchmarks.run import compare
+from octoparse import Octoparse, TokenStore, RetryPolicy, drain_not_exported
+
+
+@pytest.fixture
+def server():
+    with MockOctoparseServer(tasks=['task-1', 'task-2'], rows=2500, columns=3, run_seconds=0) as server:
+        yield server
+
+
+@pytest.fixture
+def octo(server, monkeypatch, tmp_path):
+    monkeypatch.setenv('OCTOPARSE_USERNAME', 'user')
+    monkeypatch.setenv('OCTOPARSE_PASSWORD', 'pass')
+    with Octoparse(advanced_api=True, base_url=server.url,
+                   token_store=TokenStore(os.path.join(str(tmp_path), 'token.json'))) as octo:
+        yield octo
+
+
+def test_task_data(server, octo):
+    """
+    Test data pages are served by offset
+    """
+    data = octo.get_task_data('task-1')
+    assert len(data) == 2500
+    assert data[1234] == server.row(1234)
+    assert octo.get_task_data_df('task-1', size=700).shape == (2500, 3)
+    assert server.requests['api/alldata/GetDataOfTaskByOffset'] == 3 + 4
+    assert octo.list_all_tasks_in_group(1)[0]['taskId'] == 'task-1'
+
+
+def test_not_exported(server, octo):
+    """
+    Test not exported data is drained
+    """
+    stats = drain_not_exported(octo, ['task-1'], lambda task_id, data: True, size=1000)
+    assert stats['task-1']['rows'] == 2500
+    assert octo.get_not_exported_data('task-1')['dataList'] == []
+
+
+def test_task_control(octo):
+    """
+    Test started tasks complete
+    """
+    assert list(octo.start_tasks(['task-1', 'task-2'])) == ['started']
+    statuses = octo.get_task_status(['task-1', 'task-2'])['data']
+    assert [status['status'] for status in statuses] == ['Completed', 'Completed']
+
+
+def test_errors_and_token_refresh(server, octo):
+    """
+    Test injected errors are retried & expired tokens refreshed
+    """
+    server.error_rate = 0.3
+    octo.retry_policy = RetryPolicy(max_retries=10, backoff_base=0.001, budget=100)
+    octo.circuit_breaker_threshold = None
+    assert len(octo.get_task_data('task-1', size=100)) == 2500
+
+    # tokens are refreshed half way through their 2s lifetime
+    server.error_rate = 0
+    server.token_expires_in = 2
+    octo.token_manager.refresh()
+    tokens = server.requests['token']
+    time.sleep(1.05)
+    assert len(octo.get_task_data('task-1', size=100)) == 2500
+    assert server.requests['token'] > tokens
+
+
+def test_compare():
+    """
+    Test regressions over the tolerance are reported
+    """
+    baseline = [{'benchmark': 'b', 'rows_per_second': 1000, 'p99_ms': 10, 'peak_rss_mb': 100}]
+    assert compare([dict(baseline[0], rows_per_second=950)], baseline, 0.1) == []
+    assert len(compare([{'benchmark': 'b', 'rows_per_second': 800, 'p99_ms': 20, 'peak_rss_mb': 100}],
+                       baseline, 0.1)) == 2
@@ -1,7 +1,8 @@
-from octoparse import Octoparse
+from octoparse import Octoparse, RetryPolicy, APIError
 import os
 import pytest
 import pandas as pd
+import requests
 import responses
 
 BASE_URL = 'https://dataapi.octoparse.com/'
@@ -28,8 +29,12 @@ def octoparse(monkeypatch):
                                                           "grant_type": "password"})
                  ])
 
-        yield Octoparse()
-        os.remove('octoparse_token.pickle')
+        octoparse = Octoparse()
+        # authentication is lazy, log in while the token endpoint is mocked
+        octoparse.log_in()
+        yield octoparse
+        os.remove('octoparse_token.json')
+        os.remove('octoparse_token.json.lock')
 
 
 def test_refresh_token(octoparse):
@@ -124,6 +129,10 @@ def test_get_task_data(octoparse):
         data = octoparse.get_task_data(task_id=TASK_ID)
         assert data == dataList
 
+        rows = octoparse.get_task_data_rowset(task_id=TASK_ID)
+        assert rows.columns == ('state', 'city')
+        assert rows.to_dicts() == dataList
+
 
 # @pytest.mark.skip(reason="no way of currently testing this")
 def test_get_task_data_df(octoparse):
@@ -295,3 +304,429 @@ def test_update_data_status(octoparse):
                  )
         resp = octoparse.update_data_status(task_id=task_id)
         assert resp == resp_data
+
+
+def test_close_owned_session(octoparse):
+    """
+    Test close releases the pooled session owned by the client
+    """
+    adapters = list(octoparse.session.adapters.values())
+    octoparse.close()
+    assert all(len(adapter.poolmanager.pools) == 0 for adapter in adapters)
+
+
+def test_shared_session(monkeypatch):
+    """
+    Test a caller-provided session is used for every call & not closed by the client
+    """
+    monkeypatch.setenv("OCTOPARSE_USERNAME", OCTOPARSE_USERNAME)
+    monkeypatch.setenv("OCTOPARSE_PASSWORD", OCTOPARSE_PASSWORD)
+    session = requests.Session()
+    calls = []
+    monkeypatch.setattr(session, 'close', lambda: calls.append('close'))
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.POST, BASE_URL + 'token', json=TOKEN_ENTITY, status=200)
+        rsps.add(responses.GET, BASE_URL + 'api/taskgroup', json={'data': []}, status=200)
+        with Octoparse(session=session) as octo:
+            assert octo.session is session
+            assert octo.list_all_task_groups() == []
+    assert calls == []
+    os.remove('octoparse_token.json')
+    os.remove('octoparse_token.json.lock')
+
+
+def test_export_tasks(octoparse):
+    """
+    Test export_tasks drains many tasks & reports errors per task
+    """
+    TASKS = {'task-1': [{'city': 'Plano'}, {'city': 'Houston'}],
+             'task-2': [{'city': 'Austin'}]}
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        for task_id, dataList in TASKS.items():
+            rsps.add(responses.GET,
+                     BASE_URL + 'api/alldata/GetDataOfTaskByOffset?taskId={}&offset=0&size=1000'.format(task_id),
+                     json={"data": {"offset": 0, "total": len(dataList), "restTotal": 0, "dataList": dataList}},
+                     status=200)
+        rsps.add(responses.GET, BASE_URL + 'api/alldata/GetDataOfTaskByOffset?taskId=task-3&offset=0&size=1000',
+                 json={'error': 'failed'}, status=500)
+
+        octoparse.retry_policy = RetryPolicy(max_retries=0)
+        results = octoparse.export_tasks(['task-1', 'task-2', 'task-3'], workers=3)
+        assert results['task-1'] == {'data': TASKS['task-1'], 'rows': 2, 'error': None}
+        assert results['task-2'] == {'data': TASKS['task-2'], 'rows': 1, 'error': None}
+        assert results['task-3']['data'] is None
+        assert isinstance(results['task-3']['error'], APIError)
+        assert results['task-3']['error'].status_code == 500
+
+        pages = []
+        results = octoparse.export_tasks(['task-1', 'task-2'], callback=lambda task_id, data: pages.append(task_id))
+        assert sorted(pages) == ['task-1', 'task-2']
+        assert results['task-1'] == {'data': None, 'rows': 2, 'error': None}
+
+
+def test_get_task_data_generator_prefetch(octoparse):
+    """
+    Test get_task_data_generator with read-ahead yields all the pages in order
+    """
+    TASK_ID = "a08f6125-e2b5-3878-5690-ded1ed971349"
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        for page in range(5):
+            rsps.add(responses.GET,
+                     BASE_URL + 'api/alldata/GetDataOfTaskByOffset?taskId={}&offset={}&size=2'.format(TASK_ID, page),
+                     json={"data": {"offset": page + 1, "total": 10, "restTotal": 8 - 2 * page,
+                                    "dataList": [{"row": 2 * page}, {"row": 2 * page + 1}]}},
+                     status=200)
+        pages = list(octoparse.get_task_data_generator(TASK_ID, size=2, prefetch=2))
+        assert [row['row'] for page in pages for row in page] == list(range(10))
+
+        # stopping early releases the background fetch
+        generator = octoparse.get_task_data_generator(TASK_ID, size=2, prefetch=1)
+        assert next(generator) == [{"row": 0}, {"row": 1}]
+        generator.close()
+
+
+def test_get_task_data_generator_prefetch_error(octoparse):
+    """
+    Test errors of the background fetch are raised to the caller
+    """
+    TASK_ID = "a08f6125-e2b5-3878-5690-ded1ed971349"
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.GET,
+                 BASE_URL + 'api/alldata/GetDataOfTaskByOffset?taskId={}&offset=0&size=1000'.format(TASK_ID),
+                 json={'error': 'failed'}, status=500)
+        octoparse.retry_policy = RetryPolicy(max_retries=0)
+        with pytest.raises(APIError):
+            list(octoparse.get_task_data_generator(TASK_ID, prefetch=2))
+
+
+def test_get_task_data_df_chunked(octoparse):
+    """
+    Test get_task_data_df builds the frame page by page with the options
+    """
+    TASK_ID = "a08f6125-e2b5-3878-5690-ded1ed971349"
+    pages = [[{"state": "Texas", "city": "Plano", "zip": 75023}, {"state": "Texas", "city": "Austin", "zip": 73301}],
+             [{"state": "Ohio", "city": "Akron", "zip": 44301}, {"state": "Texas", "city": "Waco", "zip": 76633}],
+             [{"state": "Iowa", "city": "Ames", "zip": 50010}]]
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        for page, dataList in enumerate(pages):
+            rsps.add(responses.GET,
+                     BASE_URL + 'api/alldata/GetDataOfTaskByOffset?taskId={}&offset={}&size=1000'.format(TASK_ID, page),
+                     json={"data": {"offset": page + 1, "total": 5, "restTotal": 2 if page < 2 else 0,
+                                    "dataList": dataList}},
+                     status=200)
+
+        df = octoparse.get_task_data_df(TASK_ID, chunk_rows=3)
+        assert df.equals(pd.DataFrame.from_dict([row for page in pages for row in page]))
+
+        df = octoparse.get_task_data_df(TASK_ID, columns=['state', 'zip'], downcast=True,
+                                        categories=['state'], chunk_rows=2)
+        assert list(df.columns) == ['state', 'zip']
+        assert isinstance(df['state'].dtype, pd.CategoricalDtype)
+        assert list(df['state']) == ['Texas', 'Texas', 'Ohio', 'Texas', 'Iowa']
+        assert df['zip'].dtype.itemsize < 8
+
+        df = octoparse.get_task_data_df(TASK_ID, max_rows=3)
+        assert list(df['city']) == ['Plano', 'Austin', 'Akron']
+
+
+def test_get_task_data_arrow(octoparse):
+    """
+    Test get_task_data_arrow & get_task_data_polars
+    """
+    pa = pytest.importorskip('pyarrow')
+    TASK_ID = "a08f6125-e2b5-3878-5690-ded1ed971349"
+    pages = [[{"state": "Texas", "city": "Plano", "zip": 75023, "note": None},
+              {"state": "Texas", "city": "Austin", "zip": 73301, "note": None}],
+             [{"state": "Ohio", "city": "Akron", "zip": 44301, "note": "new"}]]
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        for page, dataList in enumerate(pages):
+            rsps.add(responses.GET,
+                     BASE_URL + 'api/alldata/GetDataOfTaskByOffset?taskId={}&offset={}&size=1000'.format(TASK_ID, page),
+                     json={"data": {"offset": page + 1, "total": 3, "restTotal": 1 if page == 0 else 0,
+                                    "dataList": dataList}},
+                     status=200)
+
+        table = octoparse.get_task_data_arrow(TASK_ID)
+        assert table.schema == pa.schema([('state', pa.string()), ('city', pa.string()),
+                                          ('zip', pa.int64()), ('note', pa.string())])
+        assert table.to_pylist() == [row for page in pages for row in page]
+
+        table = octoparse.get_task_data_arrow(TASK_ID, columns=['city'], max_rows=2)
+        assert table.to_pydict() == {'city': ['Plano', 'Austin']}
+
+        pytest.importorskip('polars')
+        df = octoparse.get_task_data_polars(TASK_ID, columns=['state', 'zip'])
+        assert df.shape == (3, 2)
+        assert df['zip'].to_list() == [75023, 73301, 44301]
+
+
+def test_get_task_data_arrow_drift(octoparse):
+    """
+    Test get_task_data_arrow widens the schema when the types or the columns change between pages
+    """
+    pa = pytest.importorskip('pyarrow')
+    TASK_ID = "a08f6125-e2b5-3878-5690-ded1ed971349"
+    pages = [[{"zip": None, "price": 1, "note": "a"}, {"zip": None, "price": 2, "note": 1}],
+             [{"zip": 44301, "price": 2.5, "note": True, "city": "Akron"}],
+             [{"zip": 73301, "price": 3, "note": {"lang": "en"}}]]
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        for page, dataList in enumerate(pages):
+            rsps.add(responses.GET,
+                     BASE_URL + 'api/alldata/GetDataOfTaskByOffset?taskId={}&offset={}&size=1000'.format(TASK_ID, page),
+                     json={"data": {"offset": page + 1, "total": 4, "restTotal": 2 - page,
+                                    "dataList": dataList}},
+                     status=200)
+
+        table = octoparse.get_task_data_arrow(TASK_ID)
+        assert table.schema == pa.schema([('zip', pa.int64()), ('price', pa.float64()),
+                                          ('note', pa.string()), ('city', pa.string())])
+        assert table.to_pydict() == {'zip': [None, None, 44301, 73301], 'price': [1.0, 2.0, 2.5, 3.0],
+                                     'note': ['a', '1', 'true', '{"lang": "en"}'],
+                                     'city': [None, None, 'Akron', None]}
+
+
+def test_get_task_data_generator_checkpoint(octoparse, tmp_path):
+    """
+    Test get_task_data_generator resumes after the last confirmed page
+    """
+    from octoparse import CheckpointStore
+    TASK_ID = "a08f6125-e2b5-3878-5690-ded1ed971349"
+    checkpoint = CheckpointStore(str(tmp_path))
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        for page in range(3):
+            rsps.add(responses.GET,
+                     BASE_URL + 'api/alldata/GetDataOfTaskByOffset?taskId={}&offset={}&size=1000'.format(TASK_ID,
+                                                                                                        page * 10),
+                     json={"data": {"offset": (page + 1) * 10, "total": 3, "restTotal": 2 - page,
+                                    "dataList": [{"row": page}]}},
+                     status=200)
+        generator = octoparse.get_task_data_generator(TASK_ID, checkpoint=checkpoint)
+        assert next(generator) == [{"row": 0}]
+        assert next(generator) == [{"row": 1}]
+        generator.close()
+        assert checkpoint.load(TASK_ID)['offset'] == 10
+
+        pages = list(octoparse.get_task_data_generator(TASK_ID, checkpoint=checkpoint))
+        assert pages == [[{"row": 1}], [{"row": 2}]]
+        assert checkpoint.load(TASK_ID) is None
+
+
+def test_page_cache_refresh(octoparse, tmp_path):
+    """
+    Test get_task_data serves cached pages & only downloads rows past the cached tail
+    """
+    from octoparse import PageCache
+    TASK_ID = "a08f6125-e2b5-3878-5690-ded1ed971349"
+    url = BASE_URL + 'api/alldata/GetDataOfTaskByOffset?taskId={}&offset={}&size=2'
+    octoparse.page_cache = PageCache(str(tmp_path / 'cache.sqlite'))
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.GET, url.format(TASK_ID, 0),
+                 json={"data": {"offset": 2, "total": 3, "restTotal": 1, "dataList": [{"row": 0}, {"row": 1}]}})
+        rsps.add(responses.GET, url.format(TASK_ID, 2),
+                 json={"data": {"offset": 3, "total": 3, "restTotal": 0, "dataList": [{"row": 2}]}})
+        assert octoparse.get_task_data(TASK_ID, size=2) == [{"row": i} for i in range(3)]
+
+    with responses.RequestsMock() as rsps:
+        # two new rows were scraped, only the tail is requested
+        rsps.add(responses.GET, url.format(TASK_ID, 3),
+                 json={"data": {"offset": 5, "total": 5, "restTotal": 0, "dataList": [{"row": 3}, {"row": 4}]}})
+        assert octoparse.get_task_data(TASK_ID, size=2) == [{"row": i} for i in range(5)]
+        assert len(rsps.calls) == 1
+        assert octoparse.get_data_by_offset(TASK_ID, size=2, offset=0) == [{"row": 0}, {"row": 1}]
+
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.POST, BASE_URL + 'api/task/removeDataByTaskId?taskId={}'.format(TASK_ID),
+                 json={'error': 'success'})
+        octoparse.clear_task_data(TASK_ID)
+        assert octoparse.page_cache.get(TASK_ID, 0) is None
+
+
+def test_metadata_cache(octoparse):
+    """
+    Test metadata calls are served from the cache till a task parameter is updated
+    """
+    from octoparse import MetadataCache
+    TASK_ID = "a08f6125-e2b5-3878-5690-ded1ed971349"
+    octoparse.metadata_cache = MetadataCache()
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.GET, BASE_URL + 'api/taskgroup', json={'data': [{'taskGroupId': 1}]})
+        rsps.add(responses.POST, BASE_URL + 'api/task/GetTaskRulePropertyByName',
+                 json={'data': ['http://a.com'], 'error': 'success'})
+        rsps.add(responses.POST, BASE_URL + 'api/task/updateTaskRule', json={'error': 'success'})
+
+        for _ in range(3):
+            assert octoparse.list_all_task_groups() == [{'taskGroupId': 1}]
+            assert octoparse.get_task_params(TASK_ID, 'loopAction1.UrlList')['data'] == ['http://a.com']
+        assert len(rsps.calls) == 2
+
+        octoparse.update_task_param(TASK_ID, 'loopAction1.UrlList', 'http://b.com')
+        octoparse.get_task_params(TASK_ID, 'loopAction1.UrlList')
+        octoparse.list_all_task_groups()
+        assert len(rsps.calls) == 4
+
+
+def test_concurrency_limiter_throttled(octoparse):
+    """
+    Test 429 responses & throttling payloads shrink the concurrency limit
+    """
+    from octoparse import AdaptiveConcurrencyLimiter, RateLimiter
+    octoparse.concurrency_limiter = AdaptiveConcurrencyLimiter(initial=8)
+    octoparse.rate_limiter = RateLimiter(rate=1000)
+    octoparse.retry_policy = RetryPolicy(max_retries=0)
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.GET, BASE_URL + 'api/taskgroup', json={'error': 'TooManyRequests'}, status=429)
+        with pytest.raises(APIError):
+            octoparse.list_all_task_groups()
+        assert octoparse.concurrency_limiter.limit == 4
+
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.GET, BASE_URL + 'api/taskgroup',
+                 json={'error': 'failed', 'error_Description': 'Request too frequent'}, status=200)
+        with pytest.raises(APIError):
+            octoparse.list_all_task_groups()
+        assert octoparse.concurrency_limiter.limit == 2
+
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.GET, BASE_URL + 'api/taskgroup', json={'data': []}, status=200)
+        octoparse.list_all_task_groups()
+        assert octoparse.concurrency_limiter.in_flight == 0
+        assert octoparse.concurrency_limiter._limit == 2.5
+
+
+def test_retry_transient_errors(octoparse):
+    """
+    Test a transient 502 in the middle of get_task_data is retried
+    """
+    TASK_ID = "a08f6125-e2b5-3878-5690-ded1ed971349"
+    url = BASE_URL + 'api/alldata/GetDataOfTaskByOffset?taskId={}&offset={}&size=1000'
+    octoparse.retry_policy = RetryPolicy(backoff_base=0.001)
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.GET, url.format(TASK_ID, 0),
+                 json={"data": {"offset": 1, "total": 2, "restTotal": 1, "dataList": [{"row": 0}]}})
+        rsps.add(responses.GET, url.format(TASK_ID, 1), body='Bad Gateway', status=502,
+                 headers={'Retry-After': '0'})
+        rsps.add(responses.GET, url.format(TASK_ID, 1),
+                 json={"data": {"offset": 2, "total": 2, "restTotal": 0, "dataList": [{"row": 1}]}})
+        assert octoparse.get_task_data(TASK_ID) == [{"row": 0}, {"row": 1}]
+        assert len(rsps.calls) == 3
+
+
+def test_client_error_status(octoparse):
+    """
+    Test a 4xx raises APIError without retries & doesn't open the circuit breaker
+    """
+    octoparse.retry_policy = RetryPolicy(backoff_base=0.001)
+    octoparse.circuit_breaker_threshold = 1
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.GET, BASE_URL + 'api/taskgroup', json={'error': 'not found'}, status=404)
+        for _ in range(2):
+            with pytest.raises(APIError) as e:
+                octoparse.list_all_task_groups()
+            assert e.value.status_code == 404
+            assert e.value.response.json() == {'error': 'not found'}
+        assert len(rsps.calls) == 2
+
+
+def test_no_retry_for_non_idempotent(octoparse):
+    """
+    Test start_task isn't retried
+    """
+    octoparse.retry_policy = RetryPolicy(backoff_base=0.001)
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.POST, BASE_URL + 'api/task/startTask', body='error', status=503)
+        with pytest.raises(APIError):
+            octoparse.start_task('task-1')
+        assert len(rsps.calls) == 1
+
+
+def test_circuit_breaker(octoparse):
+    """
+    Test an endpoint failing repeatedly fails fast without sending requests
+    """
+    from octoparse import CircuitOpenError
+    octoparse.retry_policy = RetryPolicy(max_retries=0)
+    octoparse.circuit_breaker_threshold = 2
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.GET, BASE_URL + 'api/taskgroup', body='error', status=500)
+        rsps.add(responses.GET, BASE_URL + 'api/task?taskgroupId=1', json={'data': []})
+        for _ in range(2):
+            with pytest.raises(APIError):
+                octoparse.list_all_task_groups()
+        with pytest.raises(CircuitOpenError):
+            octoparse.list_all_task_groups()
+        assert len(rsps.calls) == 2
+        # other endpoints are not affected
+        assert octoparse.list_all_tasks_in_group(1) == []
+
+
+def test_circuit_breaker_trial_error(octoparse):
+    """
+    Test an unexpected error of the trial request opens the circuit again instead of keeping it half open
+    """
+    octoparse.retry_policy = RetryPolicy(max_retries=0)
+    octoparse.circuit_breaker_threshold = 1
+    octoparse.circuit_breaker_timeout = 0
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.GET, BASE_URL + 'api/taskgroup', body='error', status=503)
+        rsps.add(responses.GET, BASE_URL + 'api/taskgroup', body=requests.exceptions.ChunkedEncodingError())
+        rsps.add(responses.GET, BASE_URL + 'api/taskgroup', json={'data': [{'taskGroupId': 1}]})
+        with pytest.raises(APIError):
+            octoparse.list_all_task_groups()
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            octoparse.list_all_task_groups()
+        assert octoparse._get_circuit_breaker('api/taskgroup').state == 'open'
+        assert octoparse.list_all_task_groups() == [{'taskGroupId': 1}]
+        assert octoparse._get_circuit_breaker('api/taskgroup').state == 'closed'
+
+
+def test_stream_task_rows(octoparse):
+    """
+    Test stream_task_rows yields the rows of all the pages & raises api errors
+    """
+    TASK_ID = "a08f6125-e2b5-3878-5690-ded1ed971349"
+    url = BASE_URL + 'api/alldata/GetDataOfTaskByOffset?taskId={}&offset={}&size=2'
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        for page in range(3):
+            rsps.add(responses.GET, url.format(TASK_ID, page),
+                     json={"data": {"offset": page + 1, "total": 6, "restTotal": 4 - 2 * page,
+                                    "dataList": [{"row": 2 * page}, {"row": 2 * page + 1}]}},
+                     status=200)
+        assert [row['row'] for row in octoparse.stream_task_rows(TASK_ID, size=2)] == list(range(6))
+
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.GET, url.format(TASK_ID, 0),
+                 json={'error': 'Unauthorized', 'error_Description': 'task not found'}, status=200)
+        with pytest.raises(APIError):
+            list(octoparse.stream_task_rows(TASK_ID, size=2))
+
+
+def test_start_stop_tasks(octoparse):
+    """
+    Test bulk start/stop groups the tasks by outcome & retries status 100
+    """
+    import json
+    from urllib.parse import urlparse, parse_qs
+
+    octoparse.retry_policy = RetryPolicy(backoff_base=0.001)
+    statuses = {'task-1': [1], 'task-2': [2], 'task-3': [100, 1], 'task-4': [6], 'task-5': [100, 100, 100]}
+
+    def start(request):
+        task_id = parse_qs(urlparse(request.url).query)['taskId'][0]
+        if task_id == 'task-6':
+            return 500, {}, 'error'
+        return 200, {}, json.dumps({'data': statuses[task_id].pop(0), 'error': 'success'})
+
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add_callback(responses.POST, BASE_URL + 'api/task/startTask', callback=start)
+        summary = octoparse.start_tasks(['task-{}'.format(i) for i in range(1, 7)], workers=3, retries=2)
+    assert sorted(summary['started']) == ['task-1', 'task-3']
+    assert summary['started']['task-3']['attempts'] == 2
+    assert list(summary['running']) == ['task-2']
+    assert list(summary['denied']) == ['task-4']
+    assert summary['failed']['task-5'] == {'status': 100, 'attempts': 3, 'error': None}
+    assert isinstance(summary['error']['task-6']['error'], APIError)
+
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.POST, BASE_URL + 'api/task/stopTask', json={'data': None, 'error': 'success'})
+        summary = octoparse.stop_tasks(['task-1', 'task-2'])
+    assert sorted(summary['stopped']) == ['task-1', 'task-2']
@@ -0,0 +1,63 @@
+import threading
+import time
+
+from octoparse import RateLimiter, AdaptiveConcurrencyLimiter
+
+
+def test_rate_limiter():
+    """
+    Test the token bucket allows a burst then paces requests at rate
+    """
+    limiter = RateLimiter(rate=50, burst=5)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    assert time.monotonic() - start < 0.05
+    for _ in range(10):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.18
+
+
+def test_aimd_increase_decrease():
+    """
+    Test the limit grows with successes & is halved once per burst of throttling
+    """
+    limiter = AdaptiveConcurrencyLimiter(initial=4, min_limit=1, max_limit=8)
+    for _ in range(40):
+        limiter.release(limiter.acquire(), 'success')
+    assert limiter.limit == 8
+
+    tickets = [limiter.acquire() for _ in range(8)]
+    for ticket in tickets:
+        limiter.release(ticket, 'throttled')
+    assert limiter.limit == 4
+
+    limiter.release(limiter.acquire(), 'throttled')
+    assert limiter.limit == 2
+    limiter.release(limiter.acquire(), 'error')
+    assert limiter.limit == 2
+    for _ in range(4):
+        limiter.release(limiter.acquire(), 'throttled')
+    assert limiter.limit == 1
+
+
+def test_concurrency_bound():
+    """
+    Test no more than limit requests are in flight across threads
+    """
+    limiter = AdaptiveConcurrencyLimiter(initial=3, max_limit=3)
+    peak = []
+
+    def work():
+        ticket = limiter.acquire()
+        peak.append(limiter.in_flight)
+        time.sleep(0.01)
+        limiter.release(ticket, 'success')
+
+    threads = [threading.Thread(target=work) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) <= 3
+    assert limiter.in_flight == 0
@@ -0,0 +1,72 @@
+import time
+
+from octoparse import RetryPolicy, CircuitBreaker
+from octoparse.retry import _retry_after
+
+
+class FakeResponse:
+
+    def __init__(self, headers):
+        self.headers = headers
+
+
+def test_backoff():
+    """
+    Test exponential backoff is capped, jittered & honours Retry-After
+    """
+    policy = RetryPolicy(backoff_base=1, backoff_max=10, jitter=False)
+    assert [policy.backoff(attempt) for attempt in range(5)] == [1, 2, 4, 8, 10]
+    assert policy.backoff(0, retry_after=5) == 5
+    assert policy.backoff(0, retry_after=100) == 10
+
+    policy = RetryPolicy(backoff_base=1, backoff_max=10)
+    assert all(0 <= policy.backoff(3) <= 8 for _ in range(50))
+
+
+def test_retry_budget():
+    """
+    Test retries are limited per request & by the shared budget
+    """
+    policy = RetryPolicy(max_retries=3, budget=2, budget_ratio=0.5)
+    assert not policy.should_retry(3)
+    assert policy.should_retry(0)
+    assert policy.should_retry(1)
+    assert not policy.should_retry(0)
+    policy.record_request()
+    policy.record_request()
+    assert policy.should_retry(0)
+
+
+def test_retry_after_header():
+    """
+    Test Retry-After in seconds & as http date
+    """
+    assert _retry_after(FakeResponse({'Retry-After': '3'})) == 3
+    assert _retry_after(FakeResponse({})) is None
+    assert _retry_after(FakeResponse({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})) == 0
+    assert _retry_after(FakeResponse({'Retry-After': 'soon'})) is None
+
+
+def test_circuit_breaker_states():
+    """
+    Test the breaker opens, lets a trial through after the timeout & closes
+    """
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+    assert 0 < breaker.retry_in <= 0.05
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow()
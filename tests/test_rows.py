@@ -0,0 +1,67 @@
+import pickle
+
+from octoparse import RowSet
+
+DATA = [{'title': 'a', 'price': 1}, {'title': 'b', 'price': 2}, {'price': 3, 'title': 'c'}]
+
+
+def test_rowset():
+    """
+    Test rows are stored as tuples in column order & converted back
+    """
+    rows = RowSet.from_dicts(DATA)
+    assert rows.columns == ('title', 'price')
+    assert len(rows) == 3
+    assert rows[0] == ('a', 1)
+    assert rows[2] == ('c', 3)
+    assert list(rows) == [('a', 1), ('b', 2), ('c', 3)]
+    assert rows.column('price') == [1, 2, 3]
+    assert rows.get(1, 'title') == 'b'
+    assert rows.get(1, 'missing') is None
+    assert rows.to_dict(0) == DATA[0]
+    assert rows.to_dicts() == DATA
+
+    tail = rows[1:]
+    assert isinstance(tail, RowSet)
+    assert tail.to_dicts() == DATA[1:]
+
+
+def test_rowset_new_columns():
+    """
+    Test columns appearing later are added & missing values are None
+    """
+    rows = RowSet.from_dicts(DATA[:1])
+    rows.append({'title': 'b', 'url': 'http://b'})
+    rows.append({})
+    assert rows.columns == ('title', 'price', 'url')
+    assert list(rows) == [('a', 1, None), ('b', None, 'http://b'), (None, None, None)]
+
+
+def test_rowset_slice_new_columns():
+    """
+    Test new columns added to a slice don't change the schema of the result set it was sliced from
+    """
+    rows = RowSet.from_dicts(DATA)
+    tail = rows[1:]
+    tail.append({'title': 'd', 'url': 'http://d'})
+    assert tail.columns == ('title', 'price', 'url')
+    assert rows.columns == ('title', 'price')
+    assert rows.get(0, 'url') is None
+    assert rows.get(0, 'price') == 1
+    rows.append({'title': 'e', 'stock': 5})
+    assert rows.columns == ('title', 'price', 'stock')
+    assert rows[-1] == ('e', None, 5)
+
+
+def test_rowset_to_df():
+    """
+    Test conversion to DataFrame & pickling
+    """
+    rows = RowSet.from_dicts(DATA)
+    df = rows.to_df()
+    assert list(df.columns) == ['title', 'price']
+    assert df['price'].tolist() == [1, 2, 3]
+    assert RowSet().to_df().empty
+
+    copy = pickle.loads(pickle.dumps(rows))
+    assert copy.to_dicts() == DATA
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+from benchmarks.startup import HEAVY_MODULES, compare
+from octoparse import Octoparse, TokenStore, InProcessTransport
+
+
+def test_import_is_light():
+    """
+    Test importing octoparse doesn't load pandas, dotenv, httpx, etc.
+    """
+    code = 'import sys, octoparse; print(",".join(name for name in {!r} if name in sys.modules))'.format(
+        HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', code], check=True, stdout=subprocess.PIPE).stdout
+    assert output.decode('utf-8').strip() == ''
+
+
+def test_lazy_authentication(monkeypatch, tmp_path):
+    """
+    Test nothing is read, written or sent before the first request
+    """
+    monkeypatch.setenv('OCTOPARSE_USERNAME', 'user')
+    monkeypatch.setenv('OCTOPARSE_PASSWORD', 'pass')
+    calls = []
+
+    def handler(method, path, query, body, headers):
+        calls.append(path)
+        if path == 'token':
+            return 200, {'access_token': 'token', 'token_type': 'bearer', 'expires_in': 86400,
+                         'refresh_token': 'refresh'}, {}
+        return 200, {'error': 'success', 'data': []}, {}
+
+    path = os.path.join(str(tmp_path), 'token.json')
+    octo = Octoparse(base_url='http://api.test/', token_store=TokenStore(path), transport=InProcessTransport(handler))
+    assert calls == []
+    assert octo.token_entity is None
+    octo.close()
+    assert os.listdir(str(tmp_path)) == []
+
+    assert octo.list_all_task_groups() == []
+    assert calls == ['token', 'api/taskgroup']
+    assert octo.token_entity['access_token'] == 'token'
+    assert os.path.exists(path)
+
+
+def test_compare():
+    """
+    Test startup regressions are reported
+    """
+    baseline = {phase: {'median': 100.0, 'max': 120.0}
+                for phase in ('import_ms', 'init_ms', 'first_call_ms', 'process_ms')}
+    result = dict(baseline, import_ms={'median': 130.0, 'max': 140.0})
+    assert compare(result, baseline, 0.2) == ['import_ms: 100.0 -> 130.0']
+    assert compare(result, baseline, 0.5) == []
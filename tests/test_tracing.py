@@ -0,0 +1,167 @@
+import time
+
+import pytest
+
+from benchmarks.mock_server import MockOctoparseServer
+from octoparse import Octoparse, RetryPolicy, APIError, InProcessTransport
+from octoparse import Tracer, CallbackTracer, OpenTelemetryTracer
+
+BASE_URL = 'http://api.test/'
+
+
+@pytest.fixture
+def server():
+    return MockOctoparseServer(tasks=['task-1'], rows=2500, columns=3)
+
+
+class RecordingTracer(Tracer):
+
+    def __init__(self):
+        self.events = []
+
+    def start(self, name, context):
+        self.events.append(('start', name, dict(context)))
+        return len(self.events)
+
+    def end(self, span, name, context, error=None):
+        self.events.append(('end', name, dict(context), error))
+
+
+def test_get_task_data(server, credentials):
+    """
+    Test the export, page, token & request hooks are nested
+    """
+    tracer = RecordingTracer()
+    octo = Octoparse(base_url=BASE_URL, token_store=credentials, transport=InProcessTransport(server.handle),
+                     tracer=tracer)
+    assert tracer.events == []
+    octo.log_in()
+    assert [event[:2] for event in tracer.events] == [('start', 'token'), ('start', 'request'),
+                                                      ('end', 'request'), ('end', 'token')]
+    assert tracer.events[0][2] == {'grant': 'password'}
+    assert tracer.events[2][2]['status'] == 200
+
+    tracer.events = []
+    assert len(octo.get_task_data('task-1', size=1000)) == 2500
+    names = [event[:2] for event in tracer.events]
+    assert names[0] == ('start', 'export')
+    assert names[1:5] == [('start', 'page'), ('start', 'request'), ('end', 'request'), ('end', 'page')]
+    assert names[-1] == ('end', 'export')
+    pages = [event[2] for event in tracer.events if event[:2] == ('end', 'page')]
+    assert [(page['offset'], page['rows'], page['next_offset'], page['rest_total']) for page in pages] == \
+        [(0, 1000, 1000, 1500), (1000, 1000, 2000, 500), (2000, 500, 2500, 0)]
+    export = tracer.events[-1]
+    assert export[2]['pages'] == 3
+    assert export[2]['rows'] == 2500
+    assert export[3] is None
+
+
+def test_generator_consumer_time(server, credentials):
+    """
+    Test the time spent by the caller between pages is measured
+    """
+    ended = []
+    tracer = CallbackTracer(on_end=lambda name, context, seconds, error: ended.append((name, dict(context),
+                                                                                       seconds, error)))
+    octo = Octoparse(base_url=BASE_URL, token_store=credentials, transport=InProcessTransport(server.handle),
+                     tracer=tracer)
+    for data in octo.get_task_data_generator('task-1', size=1000):
+        time.sleep(0.05)
+    name, context, seconds, error = ended[-1]
+    assert name == 'export'
+    assert context['pages'] == 3
+    assert context['rows'] == 2500
+    assert context['consumer_seconds'] >= 0.15
+    assert seconds >= context['consumer_seconds']
+
+    # stopping early isn't an error
+    ended.clear()
+    next(octo.get_task_data_generator('task-1', size=1000))
+    assert ended[-1][0] == 'export'
+    assert ended[-1][1]['pages'] == 1
+    assert ended[-1][3] is None
+
+
+def test_errors(credentials):
+    """
+    Test failed requests reach the hooks, each attempt traced
+    """
+    server = MockOctoparseServer(tasks=['task-1'], error_rate=1.0)
+    tracer = RecordingTracer()
+    octo = Octoparse(base_url=BASE_URL, token_store=credentials, transport=InProcessTransport(server.handle),
+                     tracer=tracer, retry_policy=RetryPolicy(max_retries=1, backoff_base=0))
+    octo.log_in()
+    tracer.events = []
+    with pytest.raises(APIError):
+        octo.get_task_data('task-1')
+    requests = [event[2] for event in tracer.events if event[:2] == ('end', 'request')]
+    assert [(request['attempt'], request['status']) for request in requests] == [(0, 503), (1, 503)]
+    page, export = tracer.events[-2:]
+    assert page[1] == 'page' and isinstance(page[3], APIError)
+    assert export[1] == 'export' and isinstance(export[3], APIError)
+
+
+def test_opentelemetry(server, credentials):
+    """
+    Test the OpenTelemetry spans & their parents
+    """
+    pytest.importorskip('opentelemetry.sdk')
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    octo = Octoparse(base_url=BASE_URL, token_store=credentials, transport=InProcessTransport(server.handle),
+                     tracer=OpenTelemetryTracer(provider.get_tracer('test')))
+    octo.get_task_data('task-1', size=1000)
+    spans = {span.context.span_id: span for span in exporter.get_finished_spans()}
+    export = [span for span in spans.values() if span.name == 'octoparse.export'][0]
+    pages = [span for span in spans.values() if span.name == 'octoparse.page']
+    assert export.attributes['octoparse.rows'] == 2500
+    assert [page.attributes['octoparse.offset'] for page in pages] == [0, 1000, 2000]
+    assert all(page.parent.span_id == export.context.span_id for page in pages)
+    request = [span for span in spans.values() if span.name == 'octoparse.request'][-1]
+    assert spans[request.parent.span_id].name == 'octoparse.page'
+
+
+def test_opentelemetry_generators(credentials):
+    """
+    Test generators don't leak their export span into the caller's context
+    """
+    pytest.importorskip('opentelemetry.sdk')
+    from opentelemetry import trace
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    otel = provider.get_tracer('test')
+    server = MockOctoparseServer(tasks=['task-1', 'task-2'], rows=2500, columns=3)
+    octo = Octoparse(base_url=BASE_URL, token_store=credentials, transport=InProcessTransport(server.handle),
+                     tracer=OpenTelemetryTracer(otel))
+    before = trace.get_current_span()
+    first = octo.get_task_data_generator('task-1', size=1000)
+    second = octo.get_task_data_generator('task-2', size=1000)
+    next(first)
+    next(second)
+    assert trace.get_current_span() is before
+    with otel.start_as_current_span('caller'):
+        next(first)
+    first.close()
+    second.close()
+    assert trace.get_current_span() is before
+
+    spans = exporter.get_finished_spans()
+    caller = [span for span in spans if span.name == 'caller'][0]
+    assert caller.parent is None
+    exports = [span for span in spans if span.name == 'octoparse.export']
+    assert sorted(span.attributes['octoparse.task_id'] for span in exports) == ['task-1', 'task-2']
+    assert all(span.parent is None for span in exports)
+    ids = {span.context.span_id: span for span in spans}
+    for page in [span for span in spans if span.name == 'octoparse.page']:
+        assert ids[page.parent.span_id].name == 'octoparse.export'
+        assert ids[page.parent.span_id].attributes['octoparse.task_id'] == page.attributes['octoparse.task_id']
@@ -0,0 +1,149 @@
+import pytest
+import requests
+
+from benchmarks.mock_server import MockOctoparseServer
+from octoparse import Octoparse, RetryPolicy, APIError
+from octoparse import Transport, RequestsTransport, HttpxTransport, InProcessTransport
+from octoparse.transport import InProcessResponse
+
+httpx = pytest.importorskip('httpx')
+
+BASE_URL = 'http://api.test/'
+TOKEN_ENTITY = {'access_token': '656kdjfdkjf-SkjfdJFDlererrtrtpfP', 'token_type': 'bearer',
+                'expires_in': 86399, 'refresh_token': '343j656jh234jh343jhjh3j56jhjh45'}
+
+
+@pytest.fixture
+def server():
+    return MockOctoparseServer(tasks=['task-1'], rows=2500, columns=3, run_seconds=0)
+
+
+def test_in_process(server, credentials):
+    """
+    Test a client served in-process by the mock server
+    """
+    transport = InProcessTransport(server.handle)
+    with Octoparse(advanced_api=True, base_url=BASE_URL, token_store=credentials, transport=transport) as octo:
+        assert octo.session is None
+        data = octo.get_task_data('task-1', size=1000)
+        assert len(data) == 2500
+        assert data[1234] == server.row(1234)
+        assert list(octo.stream_task_rows('task-1', size=1000))[-1] == server.row(2499)
+        assert octo.start_task('task-1')['data'] == 1
+    assert server.requests['token'] == 1
+    assert transport.requests[0] == ('POST', BASE_URL + 'token')
+    assert ('GET', BASE_URL + 'api/alldata/GetDataOfTaskByOffset') in transport.requests
+
+
+def test_in_process_errors(credentials):
+    """
+    Test the retries work the same on any transport
+    """
+    calls = []
+
+    def handler(method, path, query, body, headers):
+        if path == 'token':
+            return 200, TOKEN_ENTITY, {}
+        calls.append(headers['authorization'])
+        return 503, {'error': 'ServerError'}, {'Retry-After': '0'}
+
+    octo = Octoparse(base_url=BASE_URL, token_store=credentials, transport=InProcessTransport(handler),
+                     retry_policy=RetryPolicy(max_retries=2, backoff_base=0))
+    with pytest.raises(APIError) as e:
+        octo.list_all_task_groups()
+    assert e.value.status_code == 503
+    assert calls == ['bearer ' + TOKEN_ENTITY['access_token']] * 3
+
+
+def test_stream_errors_closed(credentials):
+    """
+    Test streamed responses of failed attempts are closed
+    """
+    responses = []
+
+    class Response(InProcessResponse):
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    class RecordingTransport(InProcessTransport):
+
+        def request(self, method, url, headers=None, params=None, data=None, stream=False):
+            res = super().request(method, url, headers=headers, params=params, data=data, stream=stream)
+            responses.append(Response(res.status_code, res.content, res.headers))
+            return responses[-1]
+
+    def handler(method, path, query, body, headers):
+        if path == 'token':
+            return 200, TOKEN_ENTITY, {}
+        return 503, {'error': 'ServerError'}, {'Retry-After': '0'}
+
+    octo = Octoparse(base_url=BASE_URL, token_store=credentials, transport=RecordingTransport(handler),
+                     retry_policy=RetryPolicy(max_retries=2, backoff_base=0))
+    octo.log_in()
+    with pytest.raises(APIError) as e:
+        octo._request_response('GET', 'api/alldata/GetDataOfTaskByOffset', stream=True)
+    assert len(responses) == 4
+    assert all(res.closed for res in responses[1:])
+    assert e.value.response.content == b'{"error": "ServerError"}'
+
+
+def test_httpx_transport(credentials):
+    """
+    Test the httpx transport: bodies, streaming & error mapping
+    """
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        if request.url.path == '/token':
+            return httpx.Response(200, json=TOKEN_ENTITY)
+        if request.url.path == '/api/down':
+            raise httpx.ConnectError('refused', request=request)
+        return httpx.Response(200, json={'error': 'success', 'data': {'offset': 2, 'total': 2, 'restTotal': 0,
+                                                                       'dataList': [{'a': 1}, {'a': 2}]}})
+
+    transport = HttpxTransport(client=httpx.Client(transport=httpx.MockTransport(handler)))
+    octo = Octoparse(base_url=BASE_URL, token_store=credentials, transport=transport,
+                     retry_policy=RetryPolicy(max_retries=0))
+    assert octo.get_task_data('task-1') == [{'a': 1}, {'a': 2}]
+    assert seen[0].content == b'username=user&password=pass&grant_type=password'
+    assert list(octo.stream_task_rows('task-1')) == [{'a': 1}, {'a': 2}]
+    assert seen[-1].url.params['taskId'] == 'task-1'
+    assert seen[-1].headers['authorization'] == 'bearer ' + TOKEN_ENTITY['access_token']
+    with pytest.raises(requests.ConnectionError):
+        octo._request('GET', 'api/down')
+    octo.close()
+    # the client was passed in, it is left open
+    assert not transport.client.is_closed
+
+
+def test_httpx_http2():
+    """
+    Test the httpx transport negotiates HTTP/2 by default
+    """
+    pytest.importorskip('h2')
+    transport = HttpxTransport()
+    assert transport.client._transport._pool._http2
+    transport.close()
+    assert transport.client.is_closed
+
+
+def test_default_transport(credentials):
+    """
+    Test the default transport is a pooled requests session
+    """
+    session = requests.Session()
+    transport = RequestsTransport(session=session)
+    assert transport.session is session
+    transport.close()
+
+    # a hung connection ends in requests.Timeout, which is retried
+    sent = []
+    session.request = lambda method, url, **kwargs: sent.append(kwargs['timeout'])
+    RequestsTransport(session=session).request('GET', BASE_URL)
+    RequestsTransport(session=session, timeout=5).request('GET', BASE_URL)
+    assert sent == [30, 5]
+    with pytest.raises(NotImplementedError):
+        Transport().request('GET', BASE_URL)
@@ -0,0 +1,95 @@
+import threading
+
+from octoparse import TaskWatcher
+from tests.fakes import FakeOctoparse
+
+
+def kinds(events):
+    return sorted((event['task_id'], event['event']) for event in events)
+
+
+def test_watch_statuses():
+    """
+    Test statuses are polled in batches & transitions reported
+    """
+    octo = FakeOctoparse(advanced_api=True)
+    task_ids = ['task-{}'.format(i) for i in range(5)]
+    octo.statuses = {task_id: 'Ready' for task_id in task_ids}
+    received = []
+    watcher = TaskWatcher(octo, task_ids, min_interval=0, batch_size=2, rate=None, stall_timeout=None,
+                          on_event=received.append)
+
+    assert watcher.poll() == []
+    assert octo.status_calls == [task_ids[:2], task_ids[2:4], task_ids[4:]]
+
+    octo.statuses['task-1'] = 'Running'
+    assert kinds(watcher.poll()) == [('task-1', 'started')]
+    assert watcher.running == ['task-1']
+
+    octo.statuses['task-1'] = 'Completed'
+    assert kinds(watcher.poll()) == [('task-1', 'finished')]
+    assert watcher.state('task-1')['finished']
+    assert not watcher.finished
+    assert kinds(received) == [('task-1', 'finished'), ('task-1', 'started')]
+
+    octo.fail_status = True
+    events = watcher.poll()
+    assert len(events) == 5 and all(event['event'] == 'error' for event in events)
+
+
+def test_watch_stalled():
+    """
+    Test a running task without new rows is reported stalled once
+    """
+    octo = FakeOctoparse(advanced_api=True)
+    octo.statuses = {'task-1': 'Running'}
+    octo.totals = {'task-1': 10}
+    watcher = TaskWatcher(octo, ['task-1'], min_interval=0, rate=None, stall_timeout=0)
+    assert kinds(watcher.poll()) == [('task-1', 'started')]
+    assert kinds(watcher.poll()) == [('task-1', 'stalled')]
+    assert watcher.poll() == []
+    assert watcher.state('task-1')['stalled']
+
+    octo.totals['task-1'] = 20
+    watcher.poll()
+    assert not watcher.state('task-1')['stalled']
+
+
+def test_watch_totals():
+    """
+    Test tasks are started by a growing total & finished when idle (Standard API)
+    """
+    octo = FakeOctoparse()
+    octo.totals = {'task-1': 0, 'task-2': 5}
+    watcher = TaskWatcher(octo, ['task-1', 'task-2'], min_interval=0, rate=None, stall_timeout=None,
+                          idle_timeout=0)
+    assert watcher.poll() == []
+    assert watcher.finished
+
+    octo.totals['task-1'] = 100
+    assert kinds(watcher.poll()) == [('task-1', 'started')]
+    assert not watcher.finished
+    assert kinds(watcher.poll()) == [('task-1', 'finished')]
+    assert octo.page_calls == 6
+
+    events = list(watcher.watch(stop=threading.Event(), until_finished=True))
+    assert events == []
+
+
+def test_adaptive_interval():
+    """
+    Test unchanged tasks are polled less & less often
+    """
+    octo = FakeOctoparse(advanced_api=True)
+    octo.statuses = {'task-1': 'Ready'}
+    watcher = TaskWatcher(octo, ['task-1'], min_interval=10, max_interval=30, rate=None, stall_timeout=None)
+    # the first status is a change
+    watcher.poll()
+    assert watcher._tasks['task-1']['interval'] == 10
+    for interval in (20, 30, 30):
+        watcher._tasks['task-1']['next_poll'] = 0
+        watcher.poll()
+        assert watcher._tasks['task-1']['interval'] == interval
+    assert 0 < watcher.next_poll_in() <= 30
+    assert watcher.poll() == []
+    assert len(octo.status_calls) == 4